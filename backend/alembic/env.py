@@ -0,0 +1,68 @@
+"""
+Alembic 執行環境
+
+schema 以手寫 SQL 維護（不使用 ORM metadata / autogenerate），每個 revision 以 op.execute() / op.create_index() 撰寫
+連線使用 MIGRATION_DATABASE_URL（未設定時使用 DATABASE_URL）：
+- postgresql+psycopg 同時支援同步連線，遷移不需要 async engine
+- 需要線上建立索引的 revision 使用 autocommit_block() + CREATE INDEX CONCURRENTLY，
+  必須直連資料庫（session 層級連線），不可經 PgBouncer transaction pooling / Supabase pooler
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import settings
+
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# 不使用 autogenerate
+target_metadata = None
+
+
+def _database_url() -> str:
+    return settings.MIGRATION_DATABASE_URL or settings.DATABASE_URL
+
+
+def run_migrations_offline() -> None:
+    """輸出 SQL（alembic upgrade head --sql），不連線資料庫"""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """連線資料庫執行遷移，每個 revision 各自一個交易"""
+    engine = create_engine(
+        _database_url(),
+        poolclass=pool.NullPool,
+        connect_args={"prepare_threshold": None},
+    )
+
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,25 @@
+"""baseline：supabase_schema.sql + migrations/*.sql
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+既有資料庫的 schema 由 supabase_schema.sql 與 migrations/ 下的手寫 SQL 建立，
+此 revision 不做任何變更，只作為 Alembic 版本的起點：
+已套用所有 migrations/*.sql 的資料庫執行 `alembic stamp 0001` 後再 `alembic upgrade head`
+"""
+from typing import Sequence, Union
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,92 @@
+"""熱門查詢的複合索引（CREATE INDEX CONCURRENTLY）
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+依 app/queries.py 的具名查詢補上索引，取代只有單一欄位、無法同時處理篩選與排序的舊索引：
+- bids(project_id, status)：投標列表 / 接受投標時依專案與狀態篩選（取代 idx_bids_project_id）
+- bids(freelancer_id, created_at)：bids.mine 依接案者篩選並依 created_at 排序（取代 idx_bids_freelancer_id）
+- projects(status, created_at)：projects.list 依狀態篩選並依 created_at 排序（取代 idx_projects_status）
+- projects USING GIN (required_skills)：projects.list 的技能篩選（required_skills && :skills）
+- saved_projects(user_id, created_at)：saved_projects.list 依 created_at 排序（取代 idx_saved_projects_user_id）
+
+messages 不在此處理：
+- (conversation_id, created_at, id) 已由 idx_messages_conversation_cursor 提供
+- messages 已按月分區，分區表不支援 CREATE INDEX CONCURRENTLY
+- 未讀數改由 conversations 的已讀位置推導（見 app/services/conversation_reads.py），不再查詢 messages.is_read
+users.skills 亦不建立 GIN 索引：接案者搜尋已改查 freelancer_directory（其 skills 已有 GIN 索引）
+
+所有索引以 CONCURRENTLY 建立 / 刪除，不鎖住寫入，可在服務運行中執行：
+- 需直連資料庫（MIGRATION_DATABASE_URL），不可經 PgBouncer transaction pooling
+- CONCURRENTLY 不可在交易內執行，每個索引各自在 autocommit_block() 中執行
+- 建立中斷會留下 INVALID 的索引，重新執行時先刪除再重建
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (索引名稱, 資料表, 欄位, 索引方法, 被取代的舊索引)
+INDEXES = (
+    ("idx_bids_project_status", "bids", ["project_id", "status"], None, "idx_bids_project_id"),
+    ("idx_bids_freelancer_created", "bids", ["freelancer_id", "created_at"], None, "idx_bids_freelancer_id"),
+    ("idx_projects_status_created", "projects", ["status", "created_at"], None, "idx_projects_status"),
+    ("idx_projects_required_skills", "projects", ["required_skills"], "gin", None),
+    ("idx_saved_projects_user_created", "saved_projects", ["user_id", "created_at"], None, "idx_saved_projects_user_id"),
+)
+
+
+def _is_invalid(name: str) -> bool:
+    """索引是否為先前 CONCURRENTLY 建立中斷留下的 INVALID 索引（--sql 離線模式無法檢查）"""
+    if context.is_offline_mode():
+        return False
+    return bool(op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name},
+    ).scalar())
+
+
+def _create_index(name: str, table: str, columns: list, using: Optional[str]) -> None:
+    with op.get_context().autocommit_block():
+        if _is_invalid(name):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            name,
+            table,
+            columns,
+            postgresql_using=using,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def _drop_index(name: str, table: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    # 先建立新索引再刪除舊索引，過程中查詢一直有可用的索引
+    for name, table, columns, using, _ in INDEXES:
+        _create_index(name, table, columns, using)
+
+    for _, table, _, _, replaced in INDEXES:
+        if replaced:
+            _drop_index(replaced, table)
+
+
+def downgrade() -> None:
+    for _, table, columns, _, replaced in INDEXES:
+        if replaced:
+            _create_index(replaced, table, columns[:1], None)
+
+    for name, table, _, _, _ in INDEXES:
+        _drop_index(name, table)
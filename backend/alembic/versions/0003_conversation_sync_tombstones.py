@@ -0,0 +1,131 @@
+"""對話增量同步：刪除紀錄（tombstone）與列表顯示資料變動
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+GET /conversations/sync 的增量結果原本無法表示「對話已被刪除」，也收不到對方名稱 / 頭像、案件標題的變動：
+- conversation_tombstones：刪除對話時（撤回提案、刪除案件 / 使用者的 CASCADE）為雙方各記一筆，
+  增量同步以 removed_ids 回傳；保留 30 天（與 app/api/v1/conversations.py 的 SYNC_TOKEN_MAX_AGE 一致），
+  更舊的 sync_token 必須重新完整同步
+- users.name / avatar_url、projects.title 變動時更新相關對話的 changed_at
+  （changed_at 不在 updated_at trigger 的檢查範圍內，不會改變對話列表的順序）
+
+以 trigger 實作，所有寫入路徑（含 CASCADE 與管理後台）都會記錄
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # user_id 不設外鍵：刪除使用者時 CASCADE 刪除的對話也要留下紀錄（過期後清除）
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_tombstones (
+            conversation_id UUID NOT NULL,
+            user_id UUID NOT NULL,
+            deleted_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (conversation_id, user_id)
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conversation_tombstones_user_deleted
+            ON conversation_tombstones(user_id, deleted_at)
+    """)
+    op.execute("COMMENT ON TABLE conversation_tombstones IS '已刪除的對話，供 GET /conversations/sync 回傳 removed_ids（保留 30 天）'")
+
+    # deleted_at 與 changed_at 同樣使用 NOW()（交易開始時間），sync_token 的回推範圍同樣適用
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_conversation_tombstone()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO conversation_tombstones (conversation_id, user_id, deleted_at)
+            VALUES (OLD.id, OLD.initiator_id, NOW()), (OLD.id, OLD.recipient_id, NOW())
+            ON CONFLICT (conversation_id, user_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+            RETURN OLD;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prune_conversation_tombstones()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            DELETE FROM conversation_tombstones WHERE deleted_at < NOW() - INTERVAL '30 days';
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("DROP TRIGGER IF EXISTS record_conversation_tombstone ON conversations")
+    op.execute("""
+        CREATE TRIGGER record_conversation_tombstone AFTER DELETE ON conversations
+            FOR EACH ROW EXECUTE FUNCTION record_conversation_tombstone()
+    """)
+    # 刪除對話很少發生，過期紀錄在每次刪除後順便清除，不需要另外的排程
+    op.execute("DROP TRIGGER IF EXISTS prune_conversation_tombstones ON conversations")
+    op.execute("""
+        CREATE TRIGGER prune_conversation_tombstones AFTER DELETE ON conversations
+            FOR EACH STATEMENT EXECUTE FUNCTION prune_conversation_tombstones()
+    """)
+
+    # 對話列表顯示的參與者名稱 / 頭像（依 initiator / recipient 的 (…, changed_at) 索引更新）
+    op.execute("""
+        CREATE OR REPLACE FUNCTION touch_user_conversations()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE conversations SET changed_at = NOW() WHERE initiator_id = NEW.id;
+            UPDATE conversations SET changed_at = NOW() WHERE recipient_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("DROP TRIGGER IF EXISTS touch_user_conversations ON users")
+    op.execute("""
+        CREATE TRIGGER touch_user_conversations AFTER UPDATE OF name, avatar_url ON users
+            FOR EACH ROW
+            WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.avatar_url IS DISTINCT FROM NEW.avatar_url)
+            EXECUTE FUNCTION touch_user_conversations()
+    """)
+
+    # 對話列表顯示的案件標題（idx_conversations_project）
+    op.execute("""
+        CREATE OR REPLACE FUNCTION touch_project_conversations()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE conversations SET changed_at = NOW() WHERE project_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("DROP TRIGGER IF EXISTS touch_project_conversations ON projects")
+    op.execute("""
+        CREATE TRIGGER touch_project_conversations AFTER UPDATE OF title ON projects
+            FOR EACH ROW
+            WHEN (OLD.title IS DISTINCT FROM NEW.title)
+            EXECUTE FUNCTION touch_project_conversations()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS touch_project_conversations ON projects")
+    op.execute("DROP FUNCTION IF EXISTS touch_project_conversations()")
+    op.execute("DROP TRIGGER IF EXISTS touch_user_conversations ON users")
+    op.execute("DROP FUNCTION IF EXISTS touch_user_conversations()")
+    op.execute("DROP TRIGGER IF EXISTS prune_conversation_tombstones ON conversations")
+    op.execute("DROP FUNCTION IF EXISTS prune_conversation_tombstones()")
+    op.execute("DROP TRIGGER IF EXISTS record_conversation_tombstone ON conversations")
+    op.execute("DROP FUNCTION IF EXISTS record_conversation_tombstone()")
+    op.execute("DROP TABLE IF EXISTS conversation_tombstones")
@@ -3,18 +3,28 @@ Admin Endpoints
 對應原本的 src/app/api/v1/admin/*/route.ts
 使用 Raw SQL 優化
 """
+from datetime import date, datetime, timedelta
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy import text
 
-from ...db import get_db, parse_pg_array
-from ...models.user import User, UserRole
+from ... import queries
+from ...config import settings
+from ...db import get_db, retry_stats
+from ...routing import TransientRetryRoute
+from ...models.user import UserRole
 from ...models.project import ProjectStatus
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user, require_admin, PaginationParams
+from ...dependencies import CurrentUser, get_current_user, require_admin, PaginationParams
+from ...cache import invalidate_project_listings
+from ...services import user_stats, freelancer_directory, admin_rollups
 
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=TransientRetryRoute)
+
+# 每日統計單次查詢的最大區間
+MAX_DAILY_STATS_RANGE_DAYS = 366
 
 
 # ==================== 原: src/app/api/v1/admin/stats/route.ts ====================
@@ -22,7 +32,7 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 @router.get("/stats", response_model=SuccessResponse[dict])
 async def get_admin_stats(
     db = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     取得統計資訊（管理員專用） - 使用 Raw SQL
@@ -30,55 +40,122 @@ async def get_admin_stats(
     原始檔案: src/app/api/v1/admin/stats/route.ts
     
     RLS 邏輯: 只有管理員可查看
+    
+    讀取彙總表（admin_stats_snapshot / admin_daily_stats），不再每次 COUNT 全表；
+    快照超過 ADMIN_STATS_MAX_AGE_SECONDS 秒才重算。
+    最近 30 天以 UTC 日期計算（含今天共 30 天）
     """
-    # 一次性查詢所有統計（超快）
-    sql = """
-        SELECT 
-            (SELECT COUNT(*) FROM users) as total_users,
-            (SELECT COUNT(*) FROM projects) as total_projects,
-            (SELECT COUNT(*) FROM bids) as total_bids,
-            (SELECT COUNT(*) FROM projects WHERE status = 'draft') as draft_projects,
-            (SELECT COUNT(*) FROM projects WHERE status = 'open') as open_projects,
-            (SELECT COUNT(*) FROM projects WHERE status = 'in_progress') as in_progress_projects,
-            (SELECT COUNT(*) FROM projects WHERE status = 'completed') as completed_projects,
-            (SELECT COUNT(*) FROM projects WHERE status = 'cancelled') as cancelled_projects,
-            (SELECT COUNT(*) FROM projects WHERE status = 'closed') as closed_projects,
-            (SELECT COUNT(*) FROM users WHERE created_at >= NOW() - INTERVAL '30 days') as new_users_30d,
-            (SELECT COUNT(*) FROM projects WHERE created_at >= NOW() - INTERVAL '30 days') as new_projects_30d
+    overview = await admin_rollups.get_overview(db, settings.ADMIN_STATS_MAX_AGE_SECONDS)
+    
+    if overview is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="統計資料建立中，請稍後再試"
+        )
+    
+    by_status = overview["projects_by_status"]
+    overview["projects_by_status"] = {
+        project_status.value: int(by_status.get(project_status.value, 0))
+        for project_status in ProjectStatus
+    }
+    
+    return {
+        "success": True,
+        "data": overview
+    }
+
+
+@router.get("/stats/daily", response_model=SuccessResponse[dict])
+async def get_admin_daily_stats(
+    start: Optional[date] = Query(None, description="開始日期（含，UTC），預設為 end 前 29 天"),
+    end: Optional[date] = Query(None, description="結束日期（含，UTC），預設為今天"),
+    db = Depends(get_db),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    取得每日統計（管理員專用）
+    
+    每日註冊數、新案件數、新提案數與代幣流量，沒有資料的日期補 0
+    
+    RLS 邏輯: 只有管理員可查看
     """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
     
-    result = await db.execute(text(sql))
-    row = result.fetchone()
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="開始日期不可晚於結束日期"
+        )
+    
+    if (end - start).days >= MAX_DAILY_STATS_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"查詢區間最多 {MAX_DAILY_STATS_RANGE_DAYS} 天"
+        )
+    
+    days = await admin_rollups.get_daily(db, start, end)
+    totals = {
+        column: sum(day[column] for day in days)
+        for column in admin_rollups.DAILY_COLUMNS
+    }
     
     return {
         "success": True,
         "data": {
-            "total_users": int(row.total_users) or 0,
-            "total_projects": int(row.total_projects) or 0,
-            "total_bids": int(row.total_bids) or 0,
-            "projects_by_status": {
-                "draft": int(row.draft_projects) or 0,
-                "open": int(row.open_projects) or 0,
-                "in_progress": int(row.in_progress_projects) or 0,
-                "completed": int(row.completed_projects) or 0,
-                "cancelled": int(row.cancelled_projects) or 0,
-                "closed": int(row.closed_projects) or 0
-            },
-            "last_30_days": {
-                "new_users": int(row.new_users_30d) or 0,
-                "new_projects": int(row.new_projects_30d) or 0
-            }
+            "start": start,
+            "end": end,
+            "days": days,
+            "totals": totals
         }
     }
 
 
+# ==================== 具名查詢統計 ====================
+
+@router.get("/query-stats", response_model=SuccessResponse[list])
+async def get_query_stats(
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    取得 app/queries.py 各具名查詢的執行統計（管理員專用）
+    
+    以本 instance 啟動後累計，依總耗時由高至低排序
+    
+    RLS 邏輯: 只有管理員可查看
+    """
+    return {
+        "success": True,
+        "data": queries.stats_snapshot()
+    }
+
+
+# ==================== 資料庫重試統計 ====================
+
+@router.get("/db-retry-stats", response_model=SuccessResponse[dict])
+async def get_db_retry_stats(
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    取得暫時性資料庫錯誤的重試統計（管理員專用）
+    
+    以本 instance 啟動後累計：重試次數、重試後成功 / 仍失敗的交易數，以及各錯誤（SQLSTATE）的次數
+    
+    RLS 邏輯: 只有管理員可查看
+    """
+    return {
+        "success": True,
+        "data": retry_stats.as_dict()
+    }
+
+
 # ==================== 原: src/app/api/v1/admin/users/route.ts ====================
 
 @router.get("/users", response_model=SuccessResponse[dict])
 async def get_all_users(
     pagination: PaginationParams = Depends(),
     db = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     取得所有使用者（管理員專用） - 使用 Raw SQL
@@ -114,7 +191,7 @@ async def get_all_users(
             "id": str(row.id),
             "name": row.name,
             "email": row.email,
-            "roles": parse_pg_array(row.roles),
+            "roles": row.roles,
             "email_verified": row.email_verified,
             "created_at": row.created_at
         })
@@ -134,7 +211,7 @@ async def get_all_users(
 async def ban_user(
     user_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     封鎖使用者（管理員專用） - 使用 Raw SQL
@@ -174,7 +251,7 @@ async def ban_user(
 async def get_all_projects(
     pagination: PaginationParams = Depends(),
     db = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     取得所有專案（管理員專用） - 使用 Raw SQL
@@ -243,7 +320,7 @@ async def get_all_projects(
 async def remove_project(
     project_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     移除專案（管理員專用） - 使用 Raw SQL
@@ -252,6 +329,9 @@ async def remove_project(
     
     RLS 邏輯: 只有管理員可刪除任何專案
     """
+    # 提案會隨案件 cascade 刪除，先記下受影響的使用者
+    participants = await user_stats.project_participants(db, project_id)
+    
     # 刪除專案
     delete_sql = "DELETE FROM projects WHERE id = :project_id"
     result = await db.execute(text(delete_sql), {'project_id': str(project_id)})
@@ -262,6 +342,13 @@ async def remove_project(
             detail="專案不存在"
         )
     
+    await user_stats.refresh(db, participants)
+    await freelancer_directory.refresh(db, participants)
+    
+    # commit 後讓案件列表快取失效
+    await db.commit()
+    invalidate_project_listings()
+    
     return {
         "success": True,
         "message": "專案已刪除",
@@ -275,7 +362,7 @@ async def remove_project(
 async def get_activity_log(
     limit: int = 50,
     db = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     取得活動記錄（管理員專用） - 使用 Raw SQL
@@ -285,6 +372,7 @@ async def get_activity_log(
     RLS 邏輯: 只有管理員可查看
     
     注意：這裡回傳簡化版本（代幣交易記錄作為活動記錄）
+    只查詢最近 ACTIVITY_LOG_DAYS 天（token_transactions 按月分區，只會掃描最近的分區）
     """
     # 取得最近的交易記錄作為活動記錄（一次性取得所有資料）
     sql = """
@@ -297,11 +385,12 @@ async def get_activity_log(
             u.name as user_name
         FROM token_transactions t
         LEFT JOIN users u ON u.id = t.user_id
+        WHERE t.created_at >= LOCALTIMESTAMP - make_interval(days => CAST(:days AS integer))
         ORDER BY t.created_at DESC
         LIMIT :limit
     """
     
-    result = await db.execute(text(sql), {'limit': limit})
+    result = await db.execute(text(sql), {'limit': limit, 'days': settings.ACTIVITY_LOG_DAYS})
     rows = result.fetchall()
     
     activity_data = []
@@ -4,25 +4,25 @@ Authentication Endpoints
 使用 Raw SQL 優化
 """
 from datetime import datetime, timedelta
-from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 import uuid
 import secrets
 
-from ...db import get_db, parse_pg_array
-from ...models.user import User, UserRole
+from ...db import get_db
+from ...routing import TransientRetryRoute
+from ...models.user import UserRole
 from ...schemas.auth import (
     RegisterRequest, LoginRequest, RefreshTokenRequest,
     AuthResponse, UserInfo, VerifyEmailRequest, GoogleAuthRequest
 )
 from ...schemas.common import SuccessResponse
 from ...security import hash_password, verify_password, create_access_token, create_refresh_token, decode_token
-from ...config import settings
 from ...services.email_service import send_verification_email
+from ...services import token_ledger, freelancer_directory, refresh_tokens
 
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TransientRetryRoute)
 
 
 # ==================== 原: src/app/api/v1/auth/register/route.ts ====================
@@ -81,8 +81,11 @@ async def register(
     })
     user = result.fetchone()
     
-    # 轉換 roles（psycopg 返回字串格式，需要轉為 list）
-    user_roles = parse_pg_array(user.roles)
+    # 建立代幣帳戶（含新用戶贈送），查詢餘額時不再需要寫入
+    await token_ledger.open_account(db, user.id)
+    await freelancer_directory.refresh(db, [user.id])
+    
+    user_roles = user.roles
     
     # 生成 JWT tokens
     access_token = create_access_token({
@@ -96,18 +99,8 @@ async def register(
         "email": user.email
     })
     
-    # 儲存 refresh token
-    expires_at = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-    insert_token_sql = """
-        INSERT INTO refresh_tokens (id, user_id, token, expires_at, created_at)
-        VALUES (:id, :user_id, :token, :expires_at, NOW())
-    """
-    await db.execute(text(insert_token_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(user.id),
-        'token': refresh_token,
-        'expires_at': expires_at
-    })
+    # 儲存 refresh token（只保存雜湊）
+    await refresh_tokens.store(db, user.id, refresh_token)
     
     # 生成並儲存 email 驗證 token
     verification_token = secrets.token_urlsafe(32)
@@ -143,7 +136,7 @@ async def register(
             access_token=access_token,
             refresh_token=refresh_token,
             user=UserInfo(
-                id=UUID(user.id) if isinstance(user.id, str) else user.id,
+                id=user.id,
                 name=user.name,
                 email=user.email,
                 roles=user_roles,
@@ -212,8 +205,7 @@ async def login(
             detail="請先驗證您的電子郵件，檢查您的信箱以完成驗證"
         )
     
-    # 轉換 roles（psycopg 返回字串格式，需要轉為 list）
-    user_roles = parse_pg_array(user.roles)
+    user_roles = user.roles
     
     # 生成 JWT tokens
     access_token = create_access_token({
@@ -227,18 +219,8 @@ async def login(
         "email": user.email
     })
     
-    # 儲存 refresh token
-    expires_at = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-    insert_token_sql = """
-        INSERT INTO refresh_tokens (id, user_id, token, expires_at, created_at)
-        VALUES (:id, :user_id, :token, :expires_at, NOW())
-    """
-    await db.execute(text(insert_token_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(user.id),
-        'token': refresh_token,
-        'expires_at': expires_at
-    })
+    # 儲存 refresh token（只保存雜湊）
+    await refresh_tokens.store(db, user.id, refresh_token)
     
     return {
         "success": True,
@@ -247,7 +229,7 @@ async def login(
             access_token=access_token,
             refresh_token=refresh_token,
             user=UserInfo(
-                id=UUID(user.id) if isinstance(user.id, str) else user.id,
+                id=user.id,
                 name=user.name,
                 email=user.email,
                 roles=user_roles,
@@ -271,77 +253,41 @@ async def refresh_token(
     對應 Service: AuthService.refreshAccessToken()
     
     流程:
-    1. 驗證 refresh token
-    2. 檢查是否過期
-    3. 生成新的 tokens
-    4. 刪除舊的 refresh token
-    5. 儲存新的 refresh token
-    """
-    # 查找 refresh token 並包含使用者資訊
-    sql = """
-        SELECT 
-            rt.id as token_id,
-            rt.expires_at,
-            u.id as user_id,
-            u.name,
-            u.email,
-            u.roles,
-            u.avatar_url
-        FROM refresh_tokens rt
-        INNER JOIN users u ON u.id = rt.user_id
-        WHERE rt.token = :token
+    1. 驗證 refresh token 簽章與效期
+    2. 生成新的 refresh token
+    3. 刪除舊的 refresh token 並儲存新的（同一個 SQL 語句，以雜湊查詢）
+    4. 依最新的使用者資料生成 access token
+
+    過期的 token 不在此刪除，由背景工作定期清除
     """
-    result = await db.execute(text(sql), {'token': data.refresh_token})
-    token_record = result.fetchone()
-    
-    if not token_record:
+    payload = decode_token(data.refresh_token, use_cache=False)
+    if payload.get("type") != "refresh" or not payload.get("userId"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="無效的 Refresh Token"
         )
     
-    # 檢查是否過期
-    if datetime.utcnow() > token_record.expires_at:
-        # 刪除過期的 token
-        delete_sql = "DELETE FROM refresh_tokens WHERE id = :token_id"
-        await db.execute(text(delete_sql), {'token_id': str(token_record.token_id)})
+    new_refresh_token = create_refresh_token({
+        "userId": payload["userId"],
+        "email": payload.get("email")
+    })
+    
+    # 舊 token 不存在、已過期或已被使用（並發刷新）時不會寫入新 token
+    token_record = await refresh_tokens.rotate(db, data.refresh_token, new_refresh_token)
+    if not token_record:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh Token 已過期"
+            detail="無效的 Refresh Token"
         )
     
-    # 轉換 roles（psycopg 返回字串格式，需要轉為 list）
-    user_roles = parse_pg_array(token_record.roles)
+    user_roles = token_record["roles"]
     
-    # 生成新的 tokens
     new_access_token = create_access_token({
-        "userId": str(token_record.user_id),
-        "email": token_record.email,
+        "userId": str(token_record["user_id"]),
+        "email": token_record["email"],
         "roles": user_roles
     })
     
-    new_refresh_token = create_refresh_token({
-        "userId": str(token_record.user_id),
-        "email": token_record.email
-    })
-    
-    # 刪除舊的 refresh token
-    delete_sql = "DELETE FROM refresh_tokens WHERE id = :token_id"
-    await db.execute(text(delete_sql), {'token_id': str(token_record.token_id)})
-    
-    # 儲存新的 refresh token
-    expires_at = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-    insert_token_sql = """
-        INSERT INTO refresh_tokens (id, user_id, token, expires_at, created_at)
-        VALUES (:id, :user_id, :token, :expires_at, NOW())
-    """
-    await db.execute(text(insert_token_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(token_record.user_id),
-        'token': new_refresh_token,
-        'expires_at': expires_at
-    })
-    
     return {
         "success": True,
         "message": "Token 已刷新",
@@ -349,11 +295,11 @@ async def refresh_token(
             access_token=new_access_token,
             refresh_token=new_refresh_token,
             user=UserInfo(
-                id=UUID(token_record.user_id) if isinstance(token_record.user_id, str) else token_record.user_id,
-                name=token_record.name,
-                email=token_record.email,
+                id=token_record["user_id"],
+                name=token_record["name"],
+                email=token_record["email"],
                 roles=user_roles,
-                avatar_url=token_record.avatar_url
+                avatar_url=token_record["avatar_url"]
             )
         )
     }
@@ -375,9 +321,8 @@ async def logout(
     流程:
     1. 刪除 refresh token
     """
-    # 刪除 refresh token
-    delete_sql = "DELETE FROM refresh_tokens WHERE token = :token"
-    await db.execute(text(delete_sql), {'token': data.refresh_token})
+    # 刪除 refresh token（以雜湊查詢）
+    await refresh_tokens.revoke(db, data.refresh_token)
     
     return {
         "success": True,
@@ -501,6 +446,7 @@ async def google_auth(
                     'user_id': str(user.id)
                 })
                 user = result.fetchone()
+                await freelancer_directory.refresh(db, [user.id])
         else:
             # 建立新使用者
             user_id = uuid.uuid4()
@@ -521,9 +467,12 @@ async def google_auth(
                 'roles': roles_array
             })
             user = result.fetchone()
+            
+            # 建立代幣帳戶（含新用戶贈送）
+            await token_ledger.open_account(db, user.id)
+            await freelancer_directory.refresh(db, [user.id])
         
-        # 轉換 roles（psycopg 返回字串格式，需要轉為 list）
-        user_roles = parse_pg_array(user.roles)
+        user_roles = user.roles
         
         # 生成 JWT tokens
         access_token = create_access_token({
@@ -537,18 +486,8 @@ async def google_auth(
             "email": user.email
         })
         
-        # 儲存 refresh token
-        expires_at = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-        insert_token_sql = """
-            INSERT INTO refresh_tokens (id, user_id, token, expires_at, created_at)
-            VALUES (:id, :user_id, :token, :expires_at, NOW())
-        """
-        await db.execute(text(insert_token_sql), {
-            'id': str(uuid.uuid4()),
-            'user_id': str(user.id),
-            'token': refresh_token,
-            'expires_at': expires_at
-        })
+        # 儲存 refresh token（只保存雜湊）
+        await refresh_tokens.store(db, user.id, refresh_token)
         
         return {
             "success": True,
@@ -557,7 +496,7 @@ async def google_auth(
                 access_token=access_token,
                 refresh_token=refresh_token,
                 user=UserInfo(
-                    id=UUID(user.id) if isinstance(user.id, str) else user.id,
+                    id=user.id,
                     name=user.name,
                     email=user.email,
                     roles=user_roles,
@@ -4,18 +4,18 @@ Avatar Upload Endpoint
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
-from PIL import Image
 import io
 import base64
 
 from ...db import get_db
-from ...models.user import User
+from ...routing import TransientRetryRoute
 from ...schemas.avatar import AvatarUploadRequest, AvatarUploadResponse
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user
+from ...dependencies import CurrentUser, get_current_user
+from ...services import freelancer_directory
 
 
-router = APIRouter(prefix="/avatar", tags=["avatar"])
+router = APIRouter(prefix="/avatar", tags=["avatar"], route_class=TransientRetryRoute)
 
 
 def compress_and_resize_image(base64_data: str, max_size: tuple = (400, 400), quality: int = 85) -> str:
@@ -30,6 +30,9 @@ def compress_and_resize_image(base64_data: str, max_size: tuple = (400, 400), qu
     Returns:
         壓縮後的 Base64 數據
     """
+    # Pillow 匯入較慢，只有上傳頭像時才需要（縮短冷啟動時間）
+    from PIL import Image
+
     try:
         # 解析 data URI
         header, encoded = base64_data.split(',', 1)
@@ -90,7 +93,7 @@ def compress_and_resize_image(base64_data: str, max_size: tuple = (400, 400), qu
 async def upload_avatar(
     data: AvatarUploadRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     上傳使用者頭像
@@ -124,6 +127,8 @@ async def upload_avatar(
                 detail="使用者不存在"
             )
         
+        await freelancer_directory.refresh(db, [current_user.id])
+        
         return {
             "success": True,
             "message": "頭像上傳成功",
@@ -148,7 +153,7 @@ async def upload_avatar(
 @router.delete("/delete", response_model=SuccessResponse[dict])
 async def delete_avatar(
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     刪除使用者頭像（設為 NULL）
@@ -169,6 +174,8 @@ async def delete_avatar(
             detail="使用者不存在"
         )
     
+    await freelancer_directory.refresh(db, [current_user.id])
+    
     return {
         "success": True,
         "message": "頭像已刪除",
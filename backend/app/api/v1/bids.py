@@ -11,8 +11,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy import text
 import uuid
 
-from ...db import get_db, parse_pg_array
-from ...models.user import User
+from ... import queries
+from ...db import get_db
+from ...routing import TransientRetryRoute
 from ...models.project import ProjectStatus
 from ...models.bid import BidStatus
 from ...models.conversation import ConversationType
@@ -20,21 +21,56 @@ from ...models.notification import NotificationType
 from ...models.token import TransactionType
 from ...schemas.bid import BidCreate, BidResponse
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user, PaginationParams
+from ...dependencies import CurrentUser, get_current_user, PaginationParams
+from ...responses import success_response
+from ...serializers import float_or_none
+from ...cache import invalidate_project_listings
 from ...security import check_is_admin
+from ...services import token_ledger, user_stats, freelancer_directory, conversation_reads
 
 
-router = APIRouter(prefix="/bids", tags=["bids"])
+router = APIRouter(prefix="/bids", tags=["bids"], route_class=TransientRetryRoute)
+
+
+def _submit_proposal_key(project_id, freelancer_id) -> str:
+    """提交提案扣款的冪等 key：同一位接案者對同一個案件只扣款一次（撤回退款時釋放）"""
+    return f"submit_proposal:{project_id}:{freelancer_id}"
 
 
 # ==================== 原: src/app/api/v1/bids/me/route.ts ====================
 
+def _my_bid_item(row) -> dict:
+    """將 get_my_bids 主查詢的一列轉為回應用的 dict"""
+    return {
+        "id": str(row.id),
+        "project_id": str(row.project_id),
+        "proposal": row.proposal,
+        "bid_amount": float_or_none(row.bid_amount),
+        "estimated_days": row.estimated_days,
+        "status": row.status,
+        "created_at": row.created_at,
+        "project": {
+            "id": str(row.project_id_full),
+            "title": row.project_title,
+            "status": row.project_status,
+            "budget_min": float_or_none(row.budget_min),
+            "budget_max": float_or_none(row.budget_max),
+            "client": {
+                "id": str(row.client_id),
+                "name": row.client_name,
+                "avatar_url": row.client_avatar_url,
+                "rating": float_or_none(row.client_rating)
+            } if row.client_id else None
+        } if row.project_id_full else None
+    }
+
+
 @router.get("/me", response_model=SuccessResponse[dict])
 async def get_my_bids(
     status_filter: Optional[str] = Query(None, alias="status"),
     pagination: PaginationParams = Depends(),
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得我的投標
@@ -44,94 +80,28 @@ async def get_my_bids(
     
     RLS 邏輯: 只能查看自己的投標
     """
-    # 建立 WHERE 條件
-    where_conditions = ["b.freelancer_id = :user_id"]
+    # 狀態篩選（None 代表不篩選）
     params = {
         'user_id': str(current_user.id),
+        'status_filter': status_filter or None,
         'limit': pagination.limit,
         'offset': pagination.offset
     }
     
-    # 狀態篩選
-    if status_filter:
-        where_conditions.append("b.status = :status_filter")
-        params['status_filter'] = status_filter
-    
-    where_clause = " AND ".join(where_conditions)
-    
     # 計算總數
-    count_sql = f"""
-        SELECT COUNT(*)
-        FROM bids b
-        WHERE {where_clause}
-    """
-    count_result = await db.execute(text(count_sql), params)
+    count_result = await queries.execute(db, queries.MY_BIDS_COUNT, params)
     total = count_result.scalar() or 0
     
-    # 主查詢（使用 raw SQL）
-    sql = f"""
-        SELECT 
-            b.id,
-            b.project_id,
-            b.proposal,
-            b.bid_amount,
-            b.estimated_days,
-            b.status,
-            b.created_at,
-            p.id as project_id_full,
-            p.title as project_title,
-            p.status as project_status,
-            p.budget_min,
-            p.budget_max,
-            u.id as client_id,
-            u.name as client_name,
-            u.avatar_url as client_avatar_url,
-            u.rating as client_rating
-        FROM bids b
-        INNER JOIN projects p ON p.id = b.project_id
-        LEFT JOIN users u ON u.id = p.client_id
-        WHERE {where_clause}
-        ORDER BY b.created_at DESC
-        LIMIT :limit OFFSET :offset
-    """
-    
-    result = await db.execute(text(sql), params)
+    # 主查詢
+    result = await queries.execute(db, queries.MY_BIDS_LIST, params)
     rows = result.fetchall()
     
-    # 組裝回應
-    bids_data = []
-    for row in rows:
-        bid_dict = {
-            "id": str(row.id),
-            "project_id": str(row.project_id),
-            "proposal": row.proposal,
-            "bid_amount": float(row.bid_amount) if row.bid_amount else None,
-            "estimated_days": row.estimated_days,
-            "status": row.status,
-            "created_at": row.created_at,
-            "project": {
-                "id": str(row.project_id_full),
-                "title": row.project_title,
-                "status": row.project_status,
-                "budget_min": float(row.budget_min) if row.budget_min else None,
-                "budget_max": float(row.budget_max) if row.budget_max else None,
-                "client": {
-                    "id": str(row.client_id),
-                    "name": row.client_name,
-                    "avatar_url": row.client_avatar_url,
-                    "rating": float(row.client_rating) if row.client_rating else None
-                } if row.client_id else None
-            } if row.project_id_full else None
-        }
-        bids_data.append(bid_dict)
+    bids_data = [_my_bid_item(row) for row in rows]
     
-    return {
-        "success": True,
-        "data": {
-            "bids": bids_data,
-            "pagination": pagination.get_response_metadata(total)
-        }
-    }
+    return success_response({
+        "bids": bids_data,
+        "pagination": pagination.get_response_metadata(total)
+    })
 
 
 # ==================== 原: src/app/api/v1/bids/[id]/route.ts GET ====================
@@ -140,7 +110,7 @@ async def get_my_bids(
 async def get_bid_detail(
     bid_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得投標詳情
@@ -217,7 +187,7 @@ async def get_bid_detail(
                 "name": row.freelancer_name,
                 "avatar_url": row.freelancer_avatar_url,
                 "rating": float(row.freelancer_rating) if row.freelancer_rating else None,
-                "skills": parse_pg_array(row.freelancer_skills),
+                "skills": row.freelancer_skills,
                 "bio": row.freelancer_bio,
                 "portfolio_links": row.freelancer_portfolio_links
             } if row.freelancer_id_full else None,
@@ -237,7 +207,7 @@ async def get_bid_detail(
 async def accept_bid(
     bid_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     接受投標
@@ -370,6 +340,10 @@ async def accept_bid(
         'related_bid_id': str(bid_id)
     })
     
+    # 案件狀態已變更，commit 後讓案件列表快取失效
+    await db.commit()
+    invalidate_project_listings()
+    
     return {
         "success": True,
         "message": "投標已接受",
@@ -387,7 +361,7 @@ async def accept_bid(
 async def reject_bid(
     bid_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     拒絕投標
@@ -476,7 +450,7 @@ async def reject_bid(
 async def withdraw_bid(
     bid_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     撤回提案（7天後未被接受的提案可撤回，退還 100 代幣）
@@ -496,7 +470,8 @@ async def withdraw_bid(
             b.status,
             b.created_at,
             b.project_id,
-            p.title as project_title
+            p.title as project_title,
+            p.status as project_status
         FROM bids b
         LEFT JOIN projects p ON p.id = b.project_id
         WHERE b.id = :bid_id
@@ -577,37 +552,33 @@ async def withdraw_bid(
     """
     await db.execute(text(delete_bid_sql), {'bid_id': str(bid_id)})
     
-    # 5. 退還 100 代幣
-    update_token_sql = """
-        UPDATE user_tokens
-        SET balance = balance + 100,
-            updated_at = NOW()
-        WHERE user_id = :user_id
-        RETURNING balance
-    """
-    token_result = await db.execute(text(update_token_sql), {'user_id': str(current_user.id)})
-    new_balance_row = token_result.fetchone()
-    
-    # 6. 記錄代幣交易
-    insert_transaction_sql = """
-        INSERT INTO token_transactions (
-            id, user_id, amount, balance_after, transaction_type, 
-            reference_id, description, created_at
-        )
-        VALUES (
-            :id, :user_id, :amount, :balance_after, :transaction_type,
-            :reference_id, :description, NOW()
+    # 更新統計（已完成案件的提案被撤回時，完成案件數也會變動）
+    if bid.project_status == ProjectStatus.COMPLETED.value:
+        await user_stats.refresh(db, [current_user.id])
+    else:
+        await user_stats.increment(db, current_user.id, bids_count=-1)
+    await freelancer_directory.refresh(db, [current_user.id])
+    
+    # 5. 退還 100 代幣（同時記錄代幣交易）
+    refund = dict(
+        reference_id=bid_id,
+        description=f"撤回提案「{bid.project_title}」，退還代幣",
+        idempotency_key=f"refund:{bid_id}",
+    )
+    entry = await token_ledger.credit(db, current_user.id, 100, TransactionType.REFUND, **refund)
+    if entry is None:
+        # 帳戶不存在（提交提案時已扣款，正常不會發生）：開立空帳戶後入帳，不可略過退款
+        await token_ledger.open_account(db, current_user.id, initial_balance=0, description=None)
+        entry = await token_ledger.credit(db, current_user.id, 100, TransactionType.REFUND, **refund)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="退還代幣失敗，請稍後再試"
         )
-    """
-    await db.execute(text(insert_transaction_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(current_user.id),
-        'amount': 100,
-        'balance_after': new_balance_row.balance if new_balance_row else 100,
-        'transaction_type': TransactionType.REFUND.value,
-        'reference_id': str(bid_id),
-        'description': f"撤回提案「{bid.project_title}」，退還代幣"
-    })
+    new_balance = entry.balance_after
+
+    # 提案已撤回並退款：釋放扣款的冪等 key，之後重新投標同一個案件會再次扣款
+    await token_ledger.release(db, _submit_proposal_key(bid.project_id, current_user.id))
     
     return {
         "success": True,
@@ -615,7 +586,7 @@ async def withdraw_bid(
         "data": {
             "bid_id": str(bid_id),
             "refunded_amount": 100,
-            "new_balance": new_balance_row.balance if new_balance_row else 100
+            "new_balance": new_balance
         }
     }
 
@@ -627,7 +598,7 @@ async def create_bid(
     project_id: UUID,
     data: BidCreate,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     建立投標 - 使用 Raw SQL
@@ -681,19 +652,31 @@ async def create_bid(
             detail="您已經投標過此案件"
         )
     
-    # 檢查代幣餘額（需要 100 代幣提交提案）
-    balance_sql = "SELECT id, balance FROM user_tokens WHERE user_id = :user_id"
-    balance_result = await db.execute(text(balance_sql), {'user_id': str(current_user.id)})
-    user_token = balance_result.fetchone()
+    bid_id = uuid.uuid4()
+    conversation_id = uuid.uuid4()
     
-    if not user_token or user_token.balance < 100:
+    # 扣除代幣（100 代幣）
+    # 冪等 key 由案件與接案者組成，放在所有寫入之前：
+    # 同時送出的重複投標在寫入冪等 key 時等待前一個交易，commit 後得到 applied = False 並直接回應，
+    # 不會寫入第二筆投標 / 對話；餘額不足時不做任何寫入
+    entry = await token_ledger.debit(
+        db, current_user.id, 100, TransactionType.SUBMIT_PROPOSAL,
+        reference_id=conversation_id,
+        description=f"提交提案至「{project.title}」",
+        idempotency_key=_submit_proposal_key(project_id, current_user.id),
+    )
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="代幣餘額不足，提交提案需要 100 代幣"
         )
+    if not entry.applied:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="您已經投標過此案件"
+        )
     
     # 建立投標
-    bid_id = uuid.uuid4()
     insert_bid_sql = """
         INSERT INTO bids (id, project_id, freelancer_id, proposal, bid_amount, estimated_days, status, created_at, updated_at)
         VALUES (:id, :project_id, :freelancer_id, :proposal, :bid_amount, :estimated_days, :status, NOW(), NOW())
@@ -710,9 +693,10 @@ async def create_bid(
         'status': BidStatus.PENDING.value
     })
     new_bid = result.fetchone()
+    await user_stats.increment(db, current_user.id, bids_count=1)
+    await freelancer_directory.refresh(db, [current_user.id])
     
     # 建立提案對話（project_proposal 類型）
-    conversation_id = uuid.uuid4()
     insert_conv_sql = """
         INSERT INTO conversations (
             id, type, project_id, bid_id, initiator_id, recipient_id, 
@@ -766,10 +750,12 @@ async def create_bid(
     })
     
     # 建立初始提案訊息（接案者發送提案內容）
+    # 與 send_message 相同：先取得對話的 row lock，再以 clock_timestamp() 寫入
+    await conversation_reads.record_message(db, conversation_id, current_user.id)
     initial_message_id = uuid.uuid4()
     insert_message_sql = """
         INSERT INTO messages (id, conversation_id, sender_id, content, is_read, created_at)
-        VALUES (:id, :conversation_id, :sender_id, :content, FALSE, NOW())
+        VALUES (:id, :conversation_id, :sender_id, :content, FALSE, clock_timestamp())
     """
     await db.execute(text(insert_message_sql), {
         'id': str(initial_message_id),
@@ -778,39 +764,6 @@ async def create_bid(
         'content': data.proposal
     })
     
-    # 扣除代幣（100 代幣）
-    update_token_sql = """
-        UPDATE user_tokens
-        SET balance = balance - 100,
-            total_spent = total_spent + 100,
-            updated_at = NOW()
-        WHERE user_id = :user_id
-        RETURNING balance
-    """
-    token_result = await db.execute(text(update_token_sql), {'user_id': str(current_user.id)})
-    new_balance_row = token_result.fetchone()
-    
-    # 記錄代幣交易
-    insert_transaction_sql = """
-        INSERT INTO token_transactions (
-            id, user_id, amount, balance_after, transaction_type, 
-            reference_id, description, created_at
-        )
-        VALUES (
-            :id, :user_id, :amount, :balance_after, :transaction_type,
-            :reference_id, :description, NOW()
-        )
-    """
-    await db.execute(text(insert_transaction_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(current_user.id),
-        'amount': -100,
-        'balance_after': new_balance_row.balance,
-        'transaction_type': TransactionType.SUBMIT_PROPOSAL.value,
-        'reference_id': str(conversation_id),
-        'description': f"提交提案至「{project.title}」"
-    })
-    
     # 建立通知給發案者
     notification_sql = """
         INSERT INTO notifications (id, user_id, type, title, content, related_project_id, related_bid_id, is_read, created_at)
@@ -845,11 +798,32 @@ async def create_bid(
 
 # ==================== 原: src/app/api/v1/projects/[id]/bids/route.ts GET ====================
 
+def _project_bid_item(row) -> dict:
+    """將 get_project_bids 查詢的一列轉為回應用的 dict"""
+    return {
+        "id": str(row.id),
+        "proposal": row.proposal,
+        "bid_amount": float_or_none(row.bid_amount),
+        "estimated_days": row.estimated_days,
+        "status": row.status,
+        "created_at": row.created_at,
+        "freelancer": {
+            "id": str(row.freelancer_id),
+            "name": row.freelancer_name,
+            "avatar_url": row.freelancer_avatar_url,
+            "rating": float_or_none(row.freelancer_rating),
+            "skills": row.freelancer_skills,
+            "bio": row.freelancer_bio,
+            "portfolio_links": row.freelancer_portfolio_links
+        } if row.freelancer_id else None
+    }
+
+
 @router.get("/projects/{project_id}/bids", response_model=SuccessResponse[list])
 async def get_project_bids(
     project_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得專案的所有投標（發案者專用） - 使用 Raw SQL
@@ -882,53 +856,11 @@ async def get_project_bids(
             detail="您沒有權限查看此案件的投標"
         )
     
-    # 查詢投標（使用 raw SQL）
-    sql = """
-        SELECT 
-            b.id,
-            b.proposal,
-            b.bid_amount,
-            b.estimated_days,
-            b.status,
-            b.created_at,
-            u.id as freelancer_id,
-            u.name as freelancer_name,
-            u.avatar_url as freelancer_avatar_url,
-            u.rating as freelancer_rating,
-            u.skills as freelancer_skills,
-            u.bio as freelancer_bio,
-            u.portfolio_links as freelancer_portfolio_links
-        FROM bids b
-        LEFT JOIN users u ON u.id = b.freelancer_id
-        WHERE b.project_id = :project_id
-        ORDER BY b.created_at DESC
-    """
-    
-    bids_result = await db.execute(text(sql), {'project_id': str(project_id)})
+    # 查詢投標
+    bids_result = await queries.execute(db, queries.PROJECT_BIDS_LIST, {'project_id': str(project_id)})
     rows = bids_result.fetchall()
     
-    bids_data = []
-    for row in rows:
-        bids_data.append({
-            "id": str(row.id),
-            "proposal": row.proposal,
-            "bid_amount": float(row.bid_amount) if row.bid_amount else None,
-            "estimated_days": row.estimated_days,
-            "status": row.status,
-            "created_at": row.created_at,
-            "freelancer": {
-                "id": str(row.freelancer_id),
-                "name": row.freelancer_name,
-                "avatar_url": row.freelancer_avatar_url,
-                "rating": float(row.freelancer_rating) if row.freelancer_rating else None,
-                "skills": parse_pg_array(row.freelancer_skills),
-                "bio": row.freelancer_bio,
-                "portfolio_links": row.freelancer_portfolio_links
-            } if row.freelancer_id else None
-        })
+    bids_data = [_project_bid_item(row) for row in rows]
     
-    return {
-        "success": True,
-        "data": bids_data
-    }
+    return success_response(bids_data)
 
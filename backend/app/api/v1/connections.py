@@ -8,12 +8,12 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy import text
 
 from ...db import get_db
-from ...models.user import User
+from ...routing import TransientRetryRoute
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user
+from ...dependencies import CurrentUser, get_current_user
 
 
-router = APIRouter(prefix="/connections", tags=["connections"])
+router = APIRouter(prefix="/connections", tags=["connections"], route_class=TransientRetryRoute)
 
 
 # ==================== 原: src/app/api/v1/connections/route.ts ====================
@@ -21,7 +21,7 @@ router = APIRouter(prefix="/connections", tags=["connections"])
 @router.get("", response_model=SuccessResponse[list])
 async def get_my_connections(
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得我的連接關係 - 使用 Raw SQL
@@ -91,7 +91,7 @@ async def get_my_connections(
 async def check_connection(
     user_id: UUID = Query(..., alias="userId"),
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     檢查與某使用者的連接狀態 - 使用 Raw SQL
@@ -3,23 +3,31 @@ Conversations & Messages Endpoints
 對應原本的 src/app/api/v1/conversations/*/route.ts 和 messages
 使用 Raw SQL 優化
 """
+from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from pydantic import BaseModel
 from sqlalchemy import text
+import base64
+import binascii
+import orjson
 import uuid
 
+from ... import queries
 from ...db import get_db
-from ...models.user import User
+from ...routing import TransientRetryRoute, retry_transient
 from ...models.conversation import ConversationType
 from ...models.token import TransactionType
 from ...schemas.conversation import ConversationResponse, MessageResponse
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user
+from ...dependencies import CurrentUser, get_current_user
+from ...responses import success_response, NO_CACHE_HEADERS
+from ...serializers import str_or_none, int_or_zero, isoformat_or_none
+from ...services import token_ledger, conversation_reads
 
 
-router = APIRouter(prefix="/conversations", tags=["conversations"])
+router = APIRouter(prefix="/conversations", tags=["conversations"], route_class=TransientRetryRoute)
 
 
 # Request schemas
@@ -43,11 +51,51 @@ class UnlockProposalRequest(BaseModel):
 
 # ==================== 原: src/app/api/v1/conversations/route.ts GET ====================
 
+def _conversation_list_item(row) -> dict:
+    """將對話列表查詢的一列轉為回應用的 dict"""
+    initiator_paid = row.initiator_unlocked_at is not None
+    recipient_paid = row.recipient_unlocked_at is not None
+    # 判斷是否已解鎖：優先使用 conversations.is_unlocked，或者雙方都已付費
+    is_unlocked = bool(row.is_unlocked) or (initiator_paid and recipient_paid)
+    
+    return {
+        "id": str(row.id),
+        "type": row.type,
+        "project_id": str_or_none(row.project_id),
+        "is_unlocked": is_unlocked,
+        "initiator_id": str(row.initiator_id),
+        "recipient_id": str(row.recipient_id),
+        "initiator_paid": initiator_paid,
+        "recipient_paid": recipient_paid,
+        "expires_at": isoformat_or_none(row.expires_at),
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "initiator": {
+            "id": str(row.initiator_id_full),
+            "name": row.initiator_name,
+            "avatar_url": row.initiator_avatar_url
+        } if row.initiator_id_full else None,
+        "recipient": {
+            "id": str(row.recipient_id_full),
+            "name": row.recipient_name,
+            "avatar_url": row.recipient_avatar_url
+        } if row.recipient_id_full else None,
+        "project": {
+            "id": str(row.project_id_full),
+            "title": row.project_title
+        } if row.project_id_full else None,
+        "last_message": {
+            "content": row.last_message_content,
+            "created_at": row.last_message_created_at
+        } if row.last_message_content else None,
+        "unread_count": int_or_zero(row.unread_count)
+    }
+
+
 @router.get("", response_model=SuccessResponse[list])
 async def get_user_conversations(
-    response: Response,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得使用者的所有對話 - 使用 Raw SQL
@@ -57,106 +105,116 @@ async def get_user_conversations(
     
     RLS 邏輯: 只能查看自己參與的對話
     """
+    # 一次性取得所有資料（conversations + users + projects + last_message + unread_count + user_connections）
+    result = await queries.execute(db, queries.CONVERSATION_LIST, {'user_id': str(current_user.id)})
+    rows = result.fetchall()
+    
+    conversations_data = [_conversation_list_item(row) for row in rows]
+    
     # 禁用快取，確保對話狀態即時更新
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
+    return success_response(conversations_data, headers=NO_CACHE_HEADERS)
 
-    # 一次性取得所有資料（conversations + users + projects + last_message + unread_count + user_connections）
-    sql = """
-        SELECT 
-            c.id,
-            c.type,
-            c.project_id,
-            c.is_unlocked,
-            c.initiator_id,
-            c.recipient_id,
-            c.created_at,
-            c.updated_at,
-            i.id as initiator_id_full,
-            i.name as initiator_name,
-            i.avatar_url as initiator_avatar_url,
-            r.id as recipient_id_full,
-            r.name as recipient_name,
-            r.avatar_url as recipient_avatar_url,
-            p.id as project_id_full,
-            p.title as project_title,
-            last_msg.content as last_message_content,
-            last_msg.created_at as last_message_created_at,
-            unread.unread_count,
-            uc.initiator_unlocked_at,
-            uc.recipient_unlocked_at,
-            uc.expires_at
-        FROM conversations c
-        LEFT JOIN users i ON i.id = c.initiator_id
-        LEFT JOIN users r ON r.id = c.recipient_id
-        LEFT JOIN projects p ON p.id = c.project_id
-        LEFT JOIN user_connections uc ON uc.conversation_id = c.id
-        LEFT JOIN LATERAL (
-            SELECT content, created_at
-            FROM messages
-            WHERE conversation_id = c.id
-            ORDER BY created_at DESC
-            LIMIT 1
-        ) last_msg ON TRUE
-        LEFT JOIN LATERAL (
-            SELECT COUNT(*) as unread_count
-            FROM messages
-            WHERE conversation_id = c.id
-              AND sender_id != :user_id
-              AND is_read = FALSE
-        ) unread ON TRUE
-        WHERE c.initiator_id = :user_id OR c.recipient_id = :user_id
-        ORDER BY c.updated_at DESC
+
+# ==================== 對話列表分頁與增量同步 ====================
+
+# 發出 sync_token 時往前回推的秒數：
+# changed_at 為寫入交易開始的時間，較晚 commit 的交易可能寫入比 token 更早的時間，
+# 重疊的範圍可能重複回傳同一個對話（用戶端以 id 覆蓋即可），但不會漏掉
+SYNC_OVERLAP_SECONDS = 60
+
+MAX_SYNC_PAGE_SIZE = 200
+
+# sync_token 的有效期限：刪除紀錄（conversation_tombstones）只保留 30 天（alembic 0003），
+# 更舊的 sync_token 無法得知期間刪除的對話，必須重新完整同步
+SYNC_TOKEN_MAX_AGE = timedelta(days=30)
+
+
+def _encode_token(*values) -> str:
+    """將 cursor / sync_token 編碼為不透明字串"""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode("ascii")
+
+
+def _decode_token(token: str, size: int, detail: str) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError(token)
+        return [datetime.fromisoformat(values[0]), *values[1:]]
+    except (ValueError, TypeError, binascii.Error, orjson.JSONDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+@router.get("/sync", response_model=SuccessResponse[dict])
+async def sync_conversations(
+    sync_token: Optional[str] = Query(None, description="上次同步取得的 sync_token，只回傳之後有變動的對話"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor"),
+    limit: int = Query(50, ge=1, le=MAX_SYNC_PAGE_SIZE),
+    db = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     """
+    對話列表的分頁與增量同步
     
-    result = await db.execute(text(sql), {'user_id': str(current_user.id)})
-    rows = result.fetchall()
+    - 未帶 sync_token：完整列表，依最後活動時間由新到舊分頁
+    - 帶 sync_token：只回傳之後有變動的對話（依變動時間由舊到新），變動包含
+      新訊息、解鎖、已讀狀態，以及對方名稱 / 頭像、案件標題；
+      第一頁另以 removed_ids 回傳期間被刪除（撤回提案等）的對話 ID，用戶端自列表移除
+    - next_cursor 不為 null 時以相同參數加上 cursor 取得下一頁
+    - 每一輪同步保留第一頁回傳的 sync_token，全部頁面取完後作為下一輪的 sync_token
+    - sync_token 超過 30 天回應 400，用戶端需不帶 sync_token 重新完整同步
     
-    conversations_data = []
-    for row in rows:
-        initiator_paid = row.initiator_unlocked_at is not None
-        recipient_paid = row.recipient_unlocked_at is not None
-        # 判斷是否已解鎖：優先使用 conversations.is_unlocked，或者雙方都已付費
-        is_unlocked = bool(row.is_unlocked) or (initiator_paid and recipient_paid)
-        
-        conversations_data.append({
-            "id": str(row.id),
-            "type": row.type,
-            "project_id": str(row.project_id) if row.project_id else None,
-            "is_unlocked": is_unlocked,
-            "initiator_id": str(row.initiator_id),
-            "recipient_id": str(row.recipient_id),
-            "initiator_paid": initiator_paid,
-            "recipient_paid": recipient_paid,
-            "expires_at": row.expires_at.isoformat() if row.expires_at else None,
-            "created_at": row.created_at,
-            "updated_at": row.updated_at,
-            "initiator": {
-                "id": str(row.initiator_id_full),
-                "name": row.initiator_name,
-                "avatar_url": row.initiator_avatar_url
-            } if row.initiator_id_full else None,
-            "recipient": {
-                "id": str(row.recipient_id_full),
-                "name": row.recipient_name,
-                "avatar_url": row.recipient_avatar_url
-            } if row.recipient_id_full else None,
-            "project": {
-                "id": str(row.project_id_full),
-                "title": row.project_title
-            } if row.project_id_full else None,
-            "last_message": {
-                "content": row.last_message_content,
-                "created_at": row.last_message_created_at
-            } if row.last_message_content else None,
-            "unread_count": int(row.unread_count) if row.unread_count else 0
-        })
+    對話項目格式與 GET /conversations 相同；
+    不包含 user_connections 的到期時間（expires_at 為固定時間點，用戶端自行判斷）
     
-    return {
-        "success": True,
-        "data": conversations_data
+    RLS 邏輯: 只能查看自己參與的對話
+    """
+    clock_result = await queries.execute(db, queries.SYNC_CLOCK)
+    now = clock_result.scalar()
+    next_sync_token = _encode_token((now - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat())
+    
+    params = {
+        'user_id': str(current_user.id),
+        'cursor_at': None,
+        'cursor_id': None,
+        # 多取一筆判斷是否還有下一頁
+        'limit': limit + 1
     }
+    if cursor:
+        params['cursor_at'], params['cursor_id'] = _decode_token(cursor, 2, "分頁游標無效")
+    
+    if sync_token:
+        (params['since'],) = _decode_token(sync_token, 1, "同步憑證無效，請重新完整同步")
+        if now - params['since'] > SYNC_TOKEN_MAX_AGE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="同步憑證已過期，請重新完整同步"
+            )
+        query, sort_column = queries.CONVERSATION_CHANGES, "changed_at"
+    else:
+        query, sort_column = queries.CONVERSATION_PAGE, "updated_at"
+    
+    result = await queries.execute(db, query, params)
+    rows = result.fetchall()
+    
+    # 刪除的對話數量少，只在增量同步的第一頁一次回傳
+    removed_ids = []
+    if sync_token and not cursor:
+        removed_result = await queries.execute(db, queries.CONVERSATION_REMOVED, params)
+        removed_ids = [str(row.conversation_id) for row in removed_result.fetchall()]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_token(getattr(last, sort_column).isoformat(), str(last.id))
+    
+    return success_response({
+        "conversations": [_conversation_list_item(row) for row in rows],
+        "removed_ids": removed_ids,
+        "next_cursor": next_cursor,
+        "sync_token": next_sync_token,
+        "full": sync_token is None
+    }, headers=NO_CACHE_HEADERS)
 
 
 # ==================== 原: src/app/api/v1/conversations/direct/route.ts ====================
@@ -165,7 +223,7 @@ async def get_user_conversations(
 async def create_direct_conversation(
     data: CreateDirectConversationRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     建立直接聯絡對話（付費 200 代幣） - 使用 Raw SQL
@@ -175,17 +233,6 @@ async def create_direct_conversation(
     
     RLS 邏輯: 必須登入；扣除 200 代幣
     """
-    # 檢查餘額
-    balance_sql = "SELECT id, balance FROM user_tokens WHERE user_id = :user_id"
-    result = await db.execute(text(balance_sql), {'user_id': str(current_user.id)})
-    user_token = result.fetchone()
-    
-    if not user_token or user_token.balance < 200:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="代幣餘額不足，需要 200 代幣"
-        )
-    
     # 檢查是否已存在對話
     check_sql = """
         SELECT id FROM conversations
@@ -206,8 +253,31 @@ async def create_direct_conversation(
             detail="已存在與該使用者的對話"
         )
     
-    # 建立對話
     conversation_id = uuid.uuid4()
+    
+    # 扣除代幣並記錄交易
+    # 冪等 key 由雙方 ID 組成（排序後與發起方向無關），放在所有寫入之前：
+    # 同時送出的重複請求（或雙方同時發起）在寫入冪等 key 時等待前一個交易，
+    # commit 後得到 applied = False 並直接回應，不會建立第二個對話；餘額不足時不做任何寫入
+    pair = ":".join(sorted((str(current_user.id), str(data.recipient_id))))
+    entry = await token_ledger.debit(
+        db, current_user.id, 200, TransactionType.UNLOCK_DIRECT_CONTACT,
+        reference_id=conversation_id,
+        description="解鎖與使用者的直接聯絡",
+        idempotency_key=f"unlock_direct_contact:{pair}",
+    )
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="代幣餘額不足，需要 200 代幣"
+        )
+    if not entry.applied:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="已存在與該使用者的對話"
+        )
+    
+    # 建立對話
     insert_conv_sql = """
         INSERT INTO conversations (id, type, initiator_id, recipient_id, initiator_paid, recipient_paid, is_unlocked, created_at, updated_at)
         VALUES (:id, :type, :initiator_id, :recipient_id, TRUE, TRUE, TRUE, NOW(), NOW())
@@ -240,33 +310,6 @@ async def create_direct_conversation(
         'conversation_id': str(conversation_id)
     })
     
-    # 扣除代幣
-    update_token_sql = """
-        UPDATE user_tokens
-        SET balance = balance - 200,
-            total_spent = total_spent + 200,
-            updated_at = NOW()
-        WHERE user_id = :user_id
-        RETURNING balance
-    """
-    token_result = await db.execute(text(update_token_sql), {'user_id': str(current_user.id)})
-    new_balance_row = token_result.fetchone()
-    
-    # 記錄交易
-    insert_transaction_sql = """
-        INSERT INTO token_transactions (id, user_id, amount, balance_after, transaction_type, reference_id, description, created_at)
-        VALUES (:id, :user_id, :amount, :balance_after, :transaction_type, :reference_id, :description, NOW())
-    """
-    await db.execute(text(insert_transaction_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(current_user.id),
-        'amount': -200,
-        'balance_after': new_balance_row.balance,
-        'transaction_type': TransactionType.UNLOCK_DIRECT_CONTACT.value,
-        'reference_id': str(conversation_id),
-        'description': "解鎖與使用者的直接聯絡"
-    })
-    
     return {
         "success": True,
         "message": "對話已建立，扣除 200 代幣",
@@ -284,7 +327,7 @@ async def create_direct_conversation(
 async def unlock_proposal(
     data: UnlockProposalRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     解鎖提案對話（發案者付費 100 代幣） - 使用 Raw SQL
@@ -328,54 +371,36 @@ async def unlock_proposal(
             detail="您已經解鎖過此提案"
         )
     
-    # 檢查餘額
-    balance_sql = "SELECT id, balance FROM user_tokens WHERE user_id = :user_id"
-    token_result = await db.execute(text(balance_sql), {'user_id': str(current_user.id)})
-    user_token = token_result.fetchone()
-    
-    if not user_token or user_token.balance < 100:
+    # 扣除代幣並記錄交易
+    # 冪等 key 以對話為單位：同時送出的重複解鎖請求只會扣款一次
+    entry = await token_ledger.debit(
+        db, current_user.id, 100, TransactionType.VIEW_PROPOSAL,
+        reference_id=data.conversation_id,
+        description="解鎖提案",
+        idempotency_key=f"view_proposal:{data.conversation_id}",
+    )
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="代幣餘額不足，需要 100 代幣"
         )
+    if not entry.applied:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="您已經解鎖過此提案"
+        )
     
     # 更新對話狀態
     update_conv_sql = """
         UPDATE conversations
         SET recipient_paid = TRUE,
             is_unlocked = TRUE,
-            updated_at = NOW()
+            updated_at = NOW(),
+            changed_at = NOW()
         WHERE id = :conversation_id
     """
     await db.execute(text(update_conv_sql), {'conversation_id': str(data.conversation_id)})
     
-    # 扣除代幣
-    update_token_sql = """
-        UPDATE user_tokens
-        SET balance = balance - 100,
-            total_spent = total_spent + 100,
-            updated_at = NOW()
-        WHERE user_id = :user_id
-        RETURNING balance
-    """
-    token_result = await db.execute(text(update_token_sql), {'user_id': str(current_user.id)})
-    new_balance_row = token_result.fetchone()
-    
-    # 記錄交易
-    insert_transaction_sql = """
-        INSERT INTO token_transactions (id, user_id, amount, balance_after, transaction_type, reference_id, description, created_at)
-        VALUES (:id, :user_id, :amount, :balance_after, :transaction_type, :reference_id, :description, NOW())
-    """
-    await db.execute(text(insert_transaction_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(current_user.id),
-        'amount': -100,
-        'balance_after': new_balance_row.balance,
-        'transaction_type': TransactionType.VIEW_PROPOSAL.value,
-        'reference_id': str(data.conversation_id),
-        'description': "解鎖提案"
-    })
-    
     # 更新 user_connections 表的 recipient_unlocked_at
     update_connection_sql = """
         UPDATE user_connections
@@ -406,7 +431,7 @@ async def get_conversation(
     conversation_id: UUID,
     response: Response,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得對話詳情 - 使用 Raw SQL
@@ -417,9 +442,7 @@ async def get_conversation(
     RLS 邏輯: 必須是對話參與者
     """
     # 禁用快取，確保解鎖狀態即時更新
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
+    response.headers.update(NO_CACHE_HEADERS)
 
     # 查詢對話（包含 user_connections 的解鎖狀態和 bid 資訊）
     sql = """
@@ -530,14 +553,35 @@ async def get_conversation(
 
 # ==================== 原: src/app/api/v1/conversations/[id]/messages/route.ts ====================
 
+def _message_item(row) -> dict:
+    """將訊息查詢的一列轉為回應用的 dict"""
+    return {
+        "id": str(row.id),
+        "conversation_id": str(row.conversation_id),
+        "sender_id": str(row.sender_id),
+        "content": row.content,
+        "is_read": row.is_read,
+        "created_at": row.created_at,
+        "sender": {
+            "id": str(row.sender_user_id),
+            "name": row.sender_name,
+            "avatar_url": row.sender_avatar_url
+        } if row.sender_user_id else None
+    }
+
+MAX_MESSAGES_PAGE_SIZE = 200
+
+
 @router.get("/{conversation_id}/messages", response_model=SuccessResponse[list])
 async def get_messages(
     conversation_id: UUID,
-    response: Response,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=MAX_MESSAGES_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    before: Optional[UUID] = Query(None, description="取得比此訊息更早的訊息（往上捲動載入）"),
+    after: Optional[UUID] = Query(None, description="只取得此訊息之後的新訊息（增量更新）"),
+    latest: bool = Query(False, description="取得最新的一頁"),
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得對話的訊息列表 - 使用 Raw SQL
@@ -546,19 +590,30 @@ async def get_messages(
     對應 Service: ConversationService.getMessages()
     
     RLS 邏輯: 必須是對話參與者；未解鎖只能看自己的訊息
+    
+    分頁方式（回傳結果一律依時間由舊到新排序）:
+    - latest=true：最新的 limit 則
+    - before=<message_id>：該訊息之前的 limit 則（回傳筆數小於 limit 代表已到最舊）
+    - after=<message_id>：該訊息之後的新訊息（聊天畫面只需下載新訊息）
+    - 都未指定：由最舊的訊息開始以 offset 分頁（舊版行為）
+    
+    cursor 以 (created_at, id) 比較，使用 idx_messages_conversation_cursor 索引，
+    不需要先計算總數或掃過前面的訊息
+    同一對話的訊息在 conversations 的 row lock 下以 clock_timestamp() 寫入（見 send_message），
+    created_at 順序與 commit 順序一致，after= 不會漏掉較晚 commit 的訊息
     """
-    # 禁用快取，確保訊息即時更新
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-
-    # 檢查對話權限
-    conv_sql = """
-        SELECT id, initiator_id, recipient_id, is_unlocked
-        FROM conversations
-        WHERE id = :conversation_id
-    """
-    conv_result = await db.execute(text(conv_sql), {'conversation_id': str(conversation_id)})
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="before 與 after 不可同時指定"
+        )
+    anchor_id = before or after
+    
+    # 檢查對話權限（同時取得 cursor 訊息的時間）
+    conv_result = await queries.execute(db, queries.MESSAGES_CONVERSATION, {
+        'conversation_id': str(conversation_id),
+        'anchor_id': str(anchor_id) if anchor_id else None
+    })
     conversation = conv_result.fetchone()
     
     if not conversation:
@@ -574,63 +629,42 @@ async def get_messages(
             detail="您沒有權限查看此對話"
         )
     
-    # 查詢訊息
-    where_conditions = ["m.conversation_id = :conversation_id"]
-    params = {
-        'conversation_id': str(conversation_id),
-        'user_id': str(current_user.id),
-        'limit': limit,
-        'offset': offset
-    }
+    if anchor_id and conversation.anchor_created_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到指定的訊息"
+        )
     
     # 對於未解鎖的對話：
     # - initiator（提案者）可以看到自己發送的所有訊息
     # - recipient（發案者）可以看到所有訊息（包括提案內容），但不能回覆（在發送訊息 API 中控制）
     # 因此這裡不再限制訊息可見性
     
-    where_clause = " AND ".join(where_conditions)
-    
-    sql = f"""
-        SELECT 
-            m.id,
-            m.conversation_id,
-            m.sender_id,
-            m.content,
-            m.is_read,
-            m.created_at,
-            u.id as sender_user_id,
-            u.name as sender_name,
-            u.avatar_url as sender_avatar_url
-        FROM messages m
-        LEFT JOIN users u ON u.id = m.sender_id
-        WHERE {where_clause}
-        ORDER BY m.created_at ASC
-        LIMIT :limit OFFSET :offset
-    """
-    
-    result = await db.execute(text(sql), params)
+    params = {
+        'conversation_id': str(conversation_id),
+        'limit': limit
+    }
+    if before:
+        query, newest_first = queries.MESSAGES_BEFORE, True
+        params.update(anchor_id=str(before), anchor_created_at=conversation.anchor_created_at)
+    elif after:
+        query, newest_first = queries.MESSAGES_AFTER, False
+        params.update(anchor_id=str(after), anchor_created_at=conversation.anchor_created_at)
+    elif latest:
+        query, newest_first = queries.MESSAGES_LATEST, True
+    else:
+        query, newest_first = queries.MESSAGES_PAGE, False
+        params['offset'] = offset
+    
+    result = await queries.execute(db, query, params)
     rows = result.fetchall()
+    if newest_first:
+        rows.reverse()
     
-    messages_data = []
-    for row in rows:
-        messages_data.append({
-            "id": str(row.id),
-            "conversation_id": str(row.conversation_id),
-            "sender_id": str(row.sender_id),
-            "content": row.content,
-            "is_read": row.is_read,
-            "created_at": row.created_at,
-            "sender": {
-                "id": str(row.sender_user_id),
-                "name": row.sender_name,
-                "avatar_url": row.sender_avatar_url
-            } if row.sender_user_id else None
-        })
+    messages_data = [_message_item(row) for row in rows]
     
-    return {
-        "success": True,
-        "data": messages_data
-    }
+    # 禁用快取，確保訊息即時更新
+    return success_response(messages_data, headers=NO_CACHE_HEADERS)
 
 
 @router.post("/{conversation_id}/messages", response_model=SuccessResponse[dict], status_code=status.HTTP_201_CREATED)
@@ -638,7 +672,7 @@ async def send_message(
     conversation_id: UUID,
     data: SendMessageRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     發送訊息 - 使用 Raw SQL
@@ -688,11 +722,17 @@ async def send_message(
                 detail="請先解鎖提案才能回覆"
             )
     
+    # 更新對話時間與對方的未讀數
+    # 先取得對話的 row lock：同一對話的訊息依序寫入，created_at 順序與 commit 順序一致
+    await conversation_reads.record_message(db, conversation_id, current_user.id)
+    
     # 建立訊息
+    # created_at 使用 clock_timestamp()（取得 lock 後的時間），NOW() 是交易開始時間，
+    # 較早開始但較晚 commit 的訊息會排在其他用戶端已取得的 after= cursor 之前而被漏掉
     message_id = uuid.uuid4()
     insert_msg_sql = """
         INSERT INTO messages (id, conversation_id, sender_id, content, is_read, created_at)
-        VALUES (:id, :conversation_id, :sender_id, :content, FALSE, NOW())
+        VALUES (:id, :conversation_id, :sender_id, :content, FALSE, clock_timestamp())
         RETURNING id, conversation_id, content, created_at
     """
     
@@ -704,14 +744,6 @@ async def send_message(
     })
     new_message = result.fetchone()
     
-    # 更新對話時間
-    update_conv_sql = """
-        UPDATE conversations
-        SET updated_at = NOW()
-        WHERE id = :conversation_id
-    """
-    await db.execute(text(update_conv_sql), {'conversation_id': str(conversation_id)})
-    
     return {
         "success": True,
         "message": "訊息已發送",
@@ -730,7 +762,7 @@ async def send_message(
 async def get_unread_count(
     response: Response,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得未讀訊息數 - 使用 Raw SQL
@@ -741,22 +773,11 @@ async def get_unread_count(
     RLS 邏輯: 只能查看自己的未讀數
     """
     # 禁用快取，確保未讀訊息數量即時更新
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
+    response.headers.update(NO_CACHE_HEADERS)
 
-    # 一次性查詢未讀數（超快）
-    sql = """
-        SELECT COUNT(*)
-        FROM messages m
-        INNER JOIN conversations c ON c.id = m.conversation_id
-        WHERE (c.initiator_id = :user_id OR c.recipient_id = :user_id)
-          AND m.sender_id != :user_id
-          AND m.is_read = FALSE
-    """
-    
-    result = await db.execute(text(sql), {'user_id': str(current_user.id)})
-    unread_count = result.scalar() or 0
+    # 各對話的未讀數加總（conversations 上的計數，不掃描 messages）
+    result = await queries.execute(db, queries.UNREAD_COUNT, {'user_id': str(current_user.id)})
+    unread_count = int(result.scalar() or 0)
     
     return {
         "success": True,
@@ -767,21 +788,27 @@ async def get_unread_count(
 # ==================== 標記對話訊息為已讀 ====================
 
 @router.post("/{conversation_id}/mark-read", response_model=SuccessResponse[dict])
+@retry_transient
 async def mark_conversation_as_read(
     conversation_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     標記對話中的所有未讀訊息為已讀 - 使用 Raw SQL
     
     RLS 邏輯: 必須是對話參與者；只標記別人發送的未讀訊息
+    
+    只移動自己在對話上的已讀位置（watermark），不更新每一則訊息；
+    沒有未讀訊息時不寫入
     """
-    # 檢查對話權限
+    # 檢查對話權限；FOR UPDATE 與發送訊息取得同一個 row lock，
+    # 讀到的未讀數與 mark_read() 移動的 watermark 之間不會有新訊息寫入
     conv_sql = """
-        SELECT id, initiator_id, recipient_id
+        SELECT id, initiator_id, recipient_id, initiator_unread_count, recipient_unread_count
         FROM conversations
         WHERE id = :conversation_id
+        FOR UPDATE
     """
     conv_result = await db.execute(text(conv_sql), {'conversation_id': str(conversation_id)})
     conversation = conv_result.fetchone()
@@ -793,39 +820,19 @@ async def mark_conversation_as_read(
         )
     
     # ========== RLS 邏輯 ==========
-    if str(conversation.initiator_id) != str(current_user.id) and str(conversation.recipient_id) != str(current_user.id):
+    if str(conversation.initiator_id) == str(current_user.id):
+        participant, read_count = "initiator", conversation.initiator_unread_count
+    elif str(conversation.recipient_id) == str(current_user.id):
+        participant, read_count = "recipient", conversation.recipient_unread_count
+    else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="您沒有權限標記此對話的訊息為已讀"
         )
     
-    # 標記所有未讀訊息為已讀（只標記別人發送的訊息）
-    update_sql = """
-        UPDATE messages
-        SET is_read = TRUE
-        WHERE conversation_id = :conversation_id
-          AND sender_id != :user_id
-          AND is_read = FALSE
-    """
-    
-    result = await db.execute(text(update_sql), {
-        'conversation_id': str(conversation_id),
-        'user_id': str(current_user.id)
-    })
-    
-    # 取得更新的訊息數量
-    count_sql = """
-        SELECT COUNT(*)
-        FROM messages
-        WHERE conversation_id = :conversation_id
-          AND sender_id != :user_id
-          AND is_read = TRUE
-    """
-    count_result = await db.execute(text(count_sql), {
-        'conversation_id': str(conversation_id),
-        'user_id': str(current_user.id)
-    })
-    read_count = count_result.scalar() or 0
+    # 標記已讀（read_count 為本次標記的訊息數）
+    if read_count:
+        await conversation_reads.mark_read(db, conversation_id, participant)
     
     return {
         "success": True,
@@ -6,28 +6,106 @@ Projects Endpoints
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from ...db import get_db, parse_pg_array
-from ...models.user import User
+from ...db import get_db
+from ...routing import TransientRetryRoute
 from ...models.project import ProjectStatus
 from ...models.bid import BidStatus
 from ...schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ClientBasic
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user, get_current_user_optional, PaginationParams
+from ...dependencies import CurrentUser, get_current_user, get_current_user_optional, PaginationParams
+from ...responses import success_response, dumps
+from ...serializers import float_or_none
+from ... import queries
+from ...cache import project_list_cache, invalidate_project_listings
+from ...http_cache import make_etag, cache_headers, is_not_modified, not_modified_response
 from ...security import check_is_admin
 from ...services.gemini_service import gemini_service
+from ...services import user_stats, freelancer_directory
 
 
-router = APIRouter(prefix="/projects", tags=["projects"])
+router = APIRouter(prefix="/projects", tags=["projects"], route_class=TransientRetryRoute)
 
 
 # ==================== 原: src/app/api/v1/projects/route.ts GET ====================
 
+def _project_list_item(row) -> dict:
+    """將 list_projects 主查詢的一列轉為回應用的 dict"""
+    return {
+        "id": str(row.id),
+        "client_id": str(row.client_id),
+        "title": row.title,
+        "description": row.description,
+        "ai_summary": row.ai_summary,
+        "project_mode": row.project_mode,
+        "project_type": row.project_type,
+        "budget_min": float_or_none(row.budget_min),
+        "budget_max": float_or_none(row.budget_max),
+        "status": row.status,
+        "required_skills": row.required_skills,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "client": {
+            "id": str(row.client_user_id),
+            "name": row.client_name,
+            "avatar_url": row.client_avatar_url,
+            "rating": float_or_none(row.client_rating)
+        } if row.client_user_id else None,
+        "bids_count": int(row.bids_count),
+        "is_saved": bool(row.is_saved)
+    }
+
+
+# 未登入者可查看的狀態
+PUBLIC_PROJECT_STATUSES = ('open', 'in_progress')
+
+PROJECT_STATUS_VALUES = frozenset(project_status.value for project_status in ProjectStatus)
+
+
+def _split_csv(value: Optional[str]) -> Optional[tuple]:
+    """將逗號分隔的參數轉為排序後的 tuple（順序不影響查詢結果）"""
+    if value is None:
+        return None
+    return tuple(sorted({item.strip() for item in value.split(',')}))
+
+
+def _anonymous_list_cache_key(
+    status_filter: Optional[str],
+    project_mode: Optional[str],
+    skills: Optional[str],
+    budget_min: Optional[float],
+    budget_max: Optional[float],
+    project_type: Optional[str],
+    keyword: Optional[str],
+    sort_by: str,
+    sort_order: str,
+    pagination: PaginationParams,
+) -> tuple:
+    """未登入案件列表的快取 key（與 list_projects 的查詢邏輯一致地正規化）"""
+    statuses = _split_csv(status_filter)
+    if statuses is not None:
+        statuses = tuple(s for s in statuses if s in PUBLIC_PROJECT_STATUSES)
+    return (
+        statuses,
+        project_mode,
+        _split_csv(skills),
+        budget_min,
+        budget_max,
+        project_type,
+        keyword,
+        sort_by if sort_by in ('budget', 'deadline', 'created_at') else 'created_at',
+        'asc' if sort_order == 'asc' else 'desc',
+        pagination.page,
+        pagination.limit,
+    )
+
+
 @router.get("", response_model=SuccessResponse[dict])
 async def list_projects(
+    request: Request,
     status_filter: Optional[str] = Query(None, alias="status"),
     project_mode: Optional[str] = Query(None),
     skills: Optional[str] = Query(None),
@@ -39,7 +117,7 @@ async def list_projects(
     sort_order: str = Query("desc"),
     pagination: PaginationParams = Depends(),
     db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
 ):
     """
     取得案件列表（支援搜尋與篩選）- 使用 Raw SQL 優化
@@ -48,193 +126,83 @@ async def list_projects(
     - 任何人可以查看 open 和 in_progress 狀態的案件
     - 使用者可以查看自己的所有案件
     - 管理員可以查看所有案件
-    """
-    # 建立 WHERE 條件和參數
-    where_conditions = []
-    params = {
-        'limit': pagination.limit,
-        'offset': pagination.offset
-    }
     
+    未登入的請求會經過共用快取（見 app/cache.py），TTL 內直接回傳已序列化的結果
+    """
     # ========== RLS 邏輯實作 ==========
-    if not current_user:
-        # 未登入只能看 open 和 in_progress
-        # 如果有狀態篩選，需要取交集
-        if status_filter:
-            statuses = [s.strip() for s in status_filter.split(',')]
-            # 只保留在 RLS 允許範圍內的狀態
-            allowed_statuses = ['open', 'in_progress']
-            filtered_statuses = [s for s in statuses if s in allowed_statuses]
-            if filtered_statuses:
-                status_placeholders = ','.join([f"'{s}'" for s in filtered_statuses])
-                where_conditions.append(f"p.status IN ({status_placeholders})")
-            else:
-                # 如果篩選的狀態都不在允許範圍內，返回空結果
-                where_conditions.append("1=0")
-        else:
-            where_conditions.append("p.status IN ('open', 'in_progress')")
+    # 未登入 / 一般使用者：只能看 open 和 in_progress（有狀態篩選時取交集）
+    # 修改：即使是自己的案件，在探索頁面也只顯示 open/in_progress
+    # 管理員：只應用狀態篩選（如果有的話）
+    requested_statuses = [s.strip() for s in status_filter.split(',')] if status_filter else None
+    if current_user and check_is_admin(current_user.roles):
+        statuses = [s for s in requested_statuses if s in PROJECT_STATUS_VALUES] if requested_statuses else None
+    elif requested_statuses:
+        # 篩選的狀態都不在允許範圍內時為空 list，查詢結果為空
+        statuses = [s for s in requested_statuses if s in PUBLIC_PROJECT_STATUSES]
     else:
-        # 已登入使用者
-        params['user_id'] = str(current_user.id)
-        if check_is_admin(current_user.roles):
-            # 管理員：只應用狀態篩選（如果有的話）
-            if status_filter:
-                statuses = [s.strip() for s in status_filter.split(',')]
-                status_placeholders = ','.join([f"'{s}'" for s in statuses])
-                where_conditions.append(f"p.status IN ({status_placeholders})")
-        else:
-            # 一般使用者：可以看 open/in_progress 或自己的所有案件
-            # 如果有狀態篩選，需要結合 RLS 條件
-            if status_filter:
-                statuses = [s.strip() for s in status_filter.split(',')]
-                status_placeholders = ','.join([f"'{s}'" for s in statuses])
-                # 狀態篩選 AND (RLS 條件)
-                # 修改：即使是自己的案件，在探索頁面也只顯示 open/in_progress
-                where_conditions.append(
-                    f"(p.status IN ({status_placeholders}) AND p.status IN ('open', 'in_progress'))"
-                )
-            else:
-                # 修改：即使是自己的案件，在探索頁面也只顯示 open/in_progress
-                where_conditions.append("p.status IN ('open', 'in_progress')")
-    
-    # ========== 其他篩選條件 ==========
-    
-    # 專案模式
-    if project_mode:
-        where_conditions.append("p.project_mode = :project_mode")
-        params['project_mode'] = project_mode
-    
-    # 技能篩選（PostgreSQL array overlap）
-    if skills:
-        skill_list = [s.strip() for s in skills.split(',')]
-        where_conditions.append("p.required_skills && :skills")
-        params['skills'] = skill_list
-    
-    # 預算篩選
-    if budget_min is not None:
-        where_conditions.append("p.budget_max >= :budget_min")
-        params['budget_min'] = budget_min
-    if budget_max is not None:
-        where_conditions.append("p.budget_min <= :budget_max")
-        params['budget_max'] = budget_max
-    
-    # 專案類型
-    if project_type:
-        where_conditions.append("p.project_type = :project_type")
-        params['project_type'] = project_type
-    
-    # 關鍵字搜尋
-    if keyword:
-        where_conditions.append(
-            "(p.title ILIKE :keyword OR p.description ILIKE :keyword OR p.ai_summary ILIKE :keyword)"
-        )
-        params['keyword'] = f"%{keyword}%"
-    
-    # 組合 WHERE 子句
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-    
-    # 排序
-    order_column = {
-        'budget': 'p.budget_max',
-        'deadline': 'p.deadline',
-        'created_at': 'p.created_at'
-    }.get(sort_by, 'p.created_at')
-    
-    order_direction = 'ASC' if sort_order == 'asc' else 'DESC'
-    
-    # ========== 計算總數 ==========
-    count_sql = f"""
-        SELECT COUNT(*)
-        FROM projects p
-        WHERE {where_clause}
-    """
-    
-    count_result = await db.execute(text(count_sql), params)
-    total = count_result.scalar() or 0
-    
-    # ========== 主查詢 ==========
-    # 一次性取得所有資料：projects + client + bids_count + is_saved
-    saved_join = ""
-    saved_select = "FALSE as is_saved"
-    
-    if current_user:
-        saved_join = f"""
-        LEFT JOIN saved_projects sp ON sp.project_id = p.id AND sp.user_id = :user_id
-        """
-        saved_select = "(sp.project_id IS NOT NULL) as is_saved"
-    
-    main_sql = f"""
-        SELECT 
-            p.id,
-            p.client_id,
-            p.title,
-            p.description,
-            p.ai_summary,
-            p.project_mode,
-            p.project_type,
-            p.budget_min,
-            p.budget_max,
-            p.status,
-            p.required_skills,
-            p.created_at,
-            p.updated_at,
-            u.id as client_user_id,
-            u.name as client_name,
-            u.avatar_url as client_avatar_url,
-            u.rating as client_rating,
-            COALESCE(bc.bids_count, 0) as bids_count,
-            {saved_select}
-        FROM projects p
-        LEFT JOIN users u ON u.id = p.client_id
-        LEFT JOIN (
-            SELECT project_id, COUNT(*) as bids_count
-            FROM bids
-            GROUP BY project_id
-        ) bc ON bc.project_id = p.id
-        {saved_join}
-        WHERE {where_clause}
-        ORDER BY {order_column} {order_direction}
-        LIMIT :limit OFFSET :offset
-    """
-    
-    result = await db.execute(text(main_sql), params)
-    rows = result.fetchall()
-    
-    # 處理結果
-    projects_data = []
-    for row in rows:
-        project_dict = {
-            "id": str(row.id),
-            "client_id": str(row.client_id),
-            "title": row.title,
-            "description": row.description,
-            "ai_summary": row.ai_summary,
-            "project_mode": row.project_mode,
-            "project_type": row.project_type,
-            "budget_min": float(row.budget_min) if row.budget_min else None,
-            "budget_max": float(row.budget_max) if row.budget_max else None,
-            "status": row.status,
-            "required_skills": parse_pg_array(row.required_skills),
-            "created_at": row.created_at,
-            "updated_at": row.updated_at,
-            "client": ClientBasic(
-                id=str(row.client_user_id),
-                name=row.client_name,
-                avatar_url=row.client_avatar_url,
-                rating=float(row.client_rating) if row.client_rating else None
-            ) if row.client_user_id else None,
-            "bids_count": int(row.bids_count),
-            "is_saved": bool(row.is_saved)
-        }
-        projects_data.append(project_dict)
+        statuses = list(PUBLIC_PROJECT_STATUSES)
+    
+    # ========== 篩選條件（None 代表不篩選，見 app/queries.py） ==========
+    filter_params = {
+        'statuses': statuses,
+        'project_mode': project_mode or None,
+        # 技能篩選（PostgreSQL array overlap）
+        'skills': [s.strip() for s in skills.split(',')] if skills else None,
+        'budget_min': budget_min,
+        'budget_max': budget_max,
+        'project_type': project_type or None,
+        'keyword': f"%{keyword}%" if keyword else None,
+    }
     
-    return {
-        "success": True,
-        "data": {
+    # 排序（每種排序各自是一個具名查詢）
+    if sort_by not in queries.PROJECT_LIST_ORDER_COLUMNS:
+        sort_by = 'created_at'
+    main_query = queries.PROJECT_LIST[(sort_by, 'ASC' if sort_order == 'asc' else 'DESC')]
+    
+    async def fetch_page() -> dict:
+        # ========== 計算總數 ==========
+        count_result = await queries.execute(db, queries.PROJECT_LIST_COUNT, filter_params)
+        total = count_result.scalar() or 0
+        
+        # ========== 主查詢 ==========
+        # 一次性取得所有資料：projects + client + bids_count + is_saved
+        result = await queries.execute(db, main_query, {
+            **filter_params,
+            'user_id': str(current_user.id) if current_user else None,
+            'limit': pagination.limit,
+            'offset': pagination.offset
+        })
+        rows = result.fetchall()
+        
+        # 處理結果
+        projects_data = [_project_list_item(row) for row in rows]
+        
+        return {
             "projects": projects_data,
             "pagination": pagination.get_response_metadata(total)
         }
-    }
+        
+    # 已登入：結果與使用者相關（RLS、is_saved），不快取
+    # 直接回傳 Response，略過 response_model 的重複驗證
+    if current_user:
+        return success_response(await fetch_page())
+    
+    # ========== 未登入：共用快取 ==========
+    # 相同查詢條件的結果完全相同，以正規化後的參數作為 key
+    cache_key = _anonymous_list_cache_key(
+        status_filter, project_mode, skills, budget_min, budget_max,
+        project_type, keyword, sort_by, sort_order, pagination
+    )
+    
+    async def build() -> bytes:
+        return dumps({"success": True, "data": await fetch_page(), "message": None})
+    
+    entry = await project_list_cache.get_or_build(cache_key, build)
+    # 登入者的結果包含 is_saved，共用快取不可拿匿名版本回應帶 Authorization 的請求
+    headers = cache_headers(entry.etag, "project_list", vary="Authorization")
+    if is_not_modified(request, entry.etag):
+        return not_modified_response(headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 # ==================== 原: src/app/api/v1/projects/route.ts POST ====================
@@ -243,7 +211,7 @@ async def list_projects(
 async def create_project(
     data: ProjectCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     建立新案件 - 使用 Raw SQL
@@ -349,6 +317,8 @@ async def create_project(
     
     result = await db.execute(text(insert_sql), params)
     row = result.fetchone()
+    
+    await user_stats.increment(db, current_user.id, projects_created=1)
     project_id = row.id
     
     # 在 commit 之前取得完整資料（包含 client）
@@ -369,6 +339,7 @@ async def create_project(
     
     # 最後再 commit
     await db.commit()
+    invalidate_project_listings()  # 案件列表快取失效
     
     return {
         "success": True,
@@ -403,13 +374,17 @@ async def create_project(
 @router.get("/{project_id}", response_model=SuccessResponse[dict])
 async def get_project(
     project_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
 ):
     """
     取得案件詳情 - 使用 Raw SQL
+    
+    支援 If-None-Match：先以輕量的版本查詢算出 ETag，
+    權限檢查通過且 ETag 相符時直接回傳 304，不查詢完整資料
     """
-    # 建立查詢
+    # ========== 版本查詢（RLS 與 ETag 所需欄位） ==========
     saved_join = ""
     saved_select = "FALSE as is_saved"
     params = {'project_id': str(project_id)}
@@ -421,28 +396,22 @@ async def get_project(
         saved_select = "(sp.project_id IS NOT NULL) as is_saved"
         params['user_id'] = str(current_user.id)
     
-    sql = f"""
+    version_sql = f"""
         SELECT 
-            p.*,
-            u.id as client_user_id,
-            u.name as client_name,
-            u.avatar_url as client_avatar_url,
-            u.rating as client_rating,
-            COALESCE(bc.bids_count, 0) as bids_count,
+            p.id,
+            p.client_id,
+            p.status,
+            p.updated_at,
+            u.updated_at as client_updated_at,
+            (SELECT COUNT(*) FROM bids WHERE project_id = p.id) as bids_count,
             {saved_select}
         FROM projects p
         LEFT JOIN users u ON u.id = p.client_id
-        LEFT JOIN (
-            SELECT project_id, COUNT(*) as bids_count
-            FROM bids
-            WHERE project_id = :project_id
-            GROUP BY project_id
-        ) bc ON bc.project_id = p.id
         {saved_join}
         WHERE p.id = :project_id
     """
     
-    result = await db.execute(text(sql), params)
+    result = await db.execute(text(version_sql), params)
     row = result.fetchone()
     
     if not row:
@@ -508,6 +477,40 @@ async def get_project(
             detail="您沒有權限查看此案件"
         )
     
+    # ========== Conditional GET ==========
+    # 回應內容只會因 is_saved 而與登入者相關
+    bids_count = int(row.bids_count)
+    is_saved = bool(row.is_saved)
+    etag = make_etag("project", row.id, row.updated_at, row.client_updated_at, bids_count, is_saved)
+    headers = cache_headers(
+        etag,
+        "project_detail_private" if current_user else "project_detail",
+        vary="Authorization",
+    )
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    
+    # ========== 完整資料 ==========
+    detail_sql = """
+        SELECT 
+            p.*,
+            u.id as client_user_id,
+            u.name as client_name,
+            u.avatar_url as client_avatar_url,
+            u.rating as client_rating
+        FROM projects p
+        LEFT JOIN users u ON u.id = p.client_id
+        WHERE p.id = :project_id
+    """
+    result = await db.execute(text(detail_sql), {'project_id': str(project_id)})
+    row = result.fetchone()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="案件不存在"
+        )
+    
     # 建構完整的回傳資料（包含所有欄位）
     project_data = {
             "id": str(row.id),
@@ -524,20 +527,20 @@ async def get_project(
         "start_date": row.start_date,
         "deadline": row.deadline,
             "status": row.status,
-            "required_skills": parse_pg_array(row.required_skills),
-        "reference_links": parse_pg_array(row.reference_links),
+            "required_skills": row.required_skills,
+        "reference_links": row.reference_links,
             "created_at": row.created_at,
             "updated_at": row.updated_at,
-            "client": ClientBasic(
-                id=str(row.client_user_id),
-                name=row.client_name,
-                avatar_url=row.client_avatar_url,
-                rating=float(row.client_rating) if row.client_rating else None
-            ) if row.client_user_id else None,
-            "bids_count": int(row.bids_count),
-        "is_saved": bool(row.is_saved),
+            "client": {
+                "id": str(row.client_user_id),
+                "name": row.client_name,
+                "avatar_url": row.client_avatar_url,
+                "rating": float(row.client_rating) if row.client_rating else None
+            } if row.client_user_id else None,
+            "bids_count": bids_count,
+        "is_saved": is_saved,
         "_count": {
-            "bids": int(row.bids_count)
+            "bids": bids_count
         }
     }
     
@@ -546,13 +549,13 @@ async def get_project(
         project_data.update({
             "new_usage_scenario": row.new_usage_scenario,
             "new_goals": row.new_goals,
-            "new_features": parse_pg_array(row.new_features),
-            "new_outputs": parse_pg_array(row.new_outputs),
-            "new_deliverables": parse_pg_array(row.new_deliverables),
-            "new_design_style": parse_pg_array(row.new_design_style),
-            "new_integrations": parse_pg_array(row.new_integrations),
+            "new_features": row.new_features,
+            "new_outputs": row.new_outputs,
+            "new_deliverables": row.new_deliverables,
+            "new_design_style": row.new_design_style,
+            "new_integrations": row.new_integrations,
             "new_special_requirements": row.new_special_requirements,
-            "new_concerns": parse_pg_array(row.new_concerns),
+            "new_concerns": row.new_concerns,
         })
     elif row.project_mode == "maintenance":
         project_data.update({
@@ -565,15 +568,12 @@ async def get_project(
             "maint_has_source_code": row.maint_has_source_code,
             "maint_has_documentation": row.maint_has_documentation,
             "maint_can_provide_access": row.maint_can_provide_access,
-            "maint_known_tech_stack": parse_pg_array(row.maint_known_tech_stack),
+            "maint_known_tech_stack": row.maint_known_tech_stack,
             "maint_expected_outcomes": row.maint_expected_outcomes,
             "maint_success_criteria": row.maint_success_criteria,
         })
     
-    return {
-        "success": True,
-        "data": project_data
-    }
+    return success_response(project_data, headers=headers)
 
 
 # ==================== 原: src/app/api/v1/projects/[id]/route.ts DELETE ====================
@@ -582,7 +582,7 @@ async def get_project(
 async def delete_project(
     project_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     刪除案件 - 使用 Raw SQL
@@ -611,6 +611,9 @@ async def delete_project(
             detail="您沒有權限刪除此案件"
         )
     
+    # 提案會隨案件 cascade 刪除，先記下受影響的使用者
+    participants = await user_stats.project_participants(db, project_id)
+    
     # 刪除專案（直接刪除，不限制狀態）
     delete_sql = """
         DELETE FROM projects
@@ -618,7 +621,10 @@ async def delete_project(
     """
     
     await db.execute(text(delete_sql), {'project_id': str(project_id)})
+    await user_stats.refresh(db, participants)
+    await freelancer_directory.refresh(db, participants)
     await db.commit()
+    invalidate_project_listings()  # 案件列表快取失效
     
     return {
         "success": True,
@@ -633,7 +639,7 @@ async def delete_project(
 async def get_my_projects(
     pagination: PaginationParams = Depends(),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得我的案件 - 使用 Raw SQL
@@ -706,7 +712,7 @@ async def update_project(
     project_id: UUID,
     data: ProjectUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     更新專案 - 使用 Raw SQL
@@ -782,7 +788,14 @@ async def update_project(
         """
         await db.execute(text(accept_bids_sql), {'project_id': str(project_id)})
     
+    # 狀態進出 completed 時，發案者與投標者的完成案件數都會變動
+    if (project.status == 'completed') != (updated_project.status == 'completed'):
+        participants = await user_stats.project_participants(db, project_id)
+        await user_stats.refresh(db, participants)
+        await freelancer_directory.refresh(db, participants)
+    
     await db.commit()
+    invalidate_project_listings()  # 案件列表快取失效
     
     return {
         "success": True,
@@ -802,7 +815,7 @@ async def update_project(
 async def publish_project(
     project_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     發布案件（draft → open） - 使用 Raw SQL
@@ -837,6 +850,7 @@ async def publish_project(
     result = await db.execute(text(update_sql), {'project_id': str(project_id)})
     updated = result.fetchone()
     await db.commit()
+    invalidate_project_listings()  # 案件列表快取失效
     
     return {
         "success": True,
@@ -854,7 +868,7 @@ async def publish_project(
 async def cancel_project(
     project_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """取消案件 - 使用 Raw SQL"""
     # 查詢專案
@@ -887,6 +901,7 @@ async def cancel_project(
     result = await db.execute(text(update_sql), {'project_id': str(project_id)})
     updated = result.fetchone()
     await db.commit()
+    invalidate_project_listings()  # 案件列表快取失效
     
     return {
         "success": True,
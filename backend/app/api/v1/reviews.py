@@ -10,14 +10,15 @@ from sqlalchemy import text
 import uuid
 
 from ...db import get_db
-from ...models.user import User
+from ...routing import TransientRetryRoute
 from ...models.project import ProjectStatus
 from ...models.bid import BidStatus
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user
+from ...dependencies import CurrentUser, get_current_user
+from ...services import freelancer_directory
 
 
-router = APIRouter(prefix="/projects", tags=["reviews"])
+router = APIRouter(prefix="/projects", tags=["reviews"], route_class=TransientRetryRoute)
 
 
 class CreateReviewRequest(BaseModel):
@@ -33,7 +34,7 @@ async def create_review(
     project_id: UUID,
     data: CreateReviewRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     建立評價 - 使用 Raw SQL
@@ -163,12 +164,45 @@ async def create_review(
             detail="您已經評價過此案件"
         )
     
-    # 建立評價
+    # 建立評價，並在同一個語句內增量更新評分統計與平均評分
+    # （不再每次以 AVG 掃描該使用者的所有評價）
     review_id = uuid.uuid4()
     insert_sql = """
-        INSERT INTO reviews (id, reviewer_id, reviewee_id, project_id, rating, comment, tags, created_at)
-        VALUES (:id, :reviewer_id, :reviewee_id, :project_id, :rating, :comment, :tags, NOW())
-        RETURNING id, rating, comment, created_at
+        WITH new_review AS (
+            INSERT INTO reviews (id, reviewer_id, reviewee_id, project_id, rating, comment, tags, created_at)
+            VALUES (:id, :reviewer_id, :reviewee_id, :project_id, :rating, :comment, :tags, NOW())
+            RETURNING id, reviewee_id, rating, comment, created_at
+        ),
+        stats AS (
+            INSERT INTO user_stats (
+                user_id, reviews_count, rating_sum, rating_count,
+                rating_1_count, rating_2_count, rating_3_count, rating_4_count, rating_5_count,
+                updated_at
+            )
+            SELECT
+                reviewee_id, 1, rating, 1,
+                (rating = 1)::int, (rating = 2)::int, (rating = 3)::int, (rating = 4)::int, (rating = 5)::int,
+                NOW()
+            FROM new_review
+            ON CONFLICT (user_id) DO UPDATE SET
+                reviews_count = user_stats.reviews_count + 1,
+                rating_sum = user_stats.rating_sum + EXCLUDED.rating_sum,
+                rating_count = user_stats.rating_count + 1,
+                rating_1_count = user_stats.rating_1_count + EXCLUDED.rating_1_count,
+                rating_2_count = user_stats.rating_2_count + EXCLUDED.rating_2_count,
+                rating_3_count = user_stats.rating_3_count + EXCLUDED.rating_3_count,
+                rating_4_count = user_stats.rating_4_count + EXCLUDED.rating_4_count,
+                rating_5_count = user_stats.rating_5_count + EXCLUDED.rating_5_count,
+                updated_at = NOW()
+            RETURNING user_id, rating_sum, rating_count
+        ),
+        rated AS (
+            UPDATE users u
+            SET rating = ROUND(stats.rating_sum::numeric / stats.rating_count, 2)
+            FROM stats
+            WHERE u.id = stats.user_id
+        )
+        SELECT id, rating, comment, created_at FROM new_review
     """
     
     result = await db.execute(text(insert_sql), {
@@ -181,18 +215,7 @@ async def create_review(
         'tags': data.tags
     })
     new_review = result.fetchone()
-    
-    # 更新使用者的平均評分
-    update_rating_sql = """
-        UPDATE users
-        SET rating = (
-            SELECT AVG(rating)::numeric(3,2)
-            FROM reviews
-            WHERE reviewee_id = :reviewee_id
-        )
-        WHERE id = :reviewee_id
-    """
-    await db.execute(text(update_rating_sql), {'reviewee_id': str(reviewee_id)})
+    await freelancer_directory.refresh(db, [reviewee_id])
     
     return {
         "success": True,
@@ -212,7 +235,7 @@ async def create_review(
 async def can_review_project(
     project_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     檢查是否可以評價此案件 - 使用 Raw SQL
@@ -8,22 +8,26 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 import uuid
 
+from ... import queries
 from ...db import get_db
-from ...models.user import User
+from ...routing import TransientRetryRoute, retry_transient
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user, PaginationParams
+from ...dependencies import CurrentUser, get_current_user, PaginationParams
+from ...responses import success_response
+from ...serializers import float_or_none
 
 
-router = APIRouter(prefix="/projects", tags=["saved-projects"])
+router = APIRouter(prefix="/projects", tags=["saved-projects"], route_class=TransientRetryRoute)
 
 
 # ==================== 原: src/app/api/v1/projects/[id]/save/route.ts ====================
 
 @router.post("/{project_id}/save", response_model=SuccessResponse[dict], status_code=status.HTTP_201_CREATED)
+@retry_transient
 async def save_project(
     project_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     收藏案件 - 使用 Raw SQL
@@ -78,10 +82,11 @@ async def save_project(
 
 
 @router.delete("/{project_id}/save", response_model=SuccessResponse[dict])
+@retry_transient
 async def unsave_project(
     project_id: UUID,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取消收藏案件 - 使用 Raw SQL
@@ -115,11 +120,30 @@ async def unsave_project(
 
 # ==================== 原: src/app/api/v1/projects/saved/route.ts ====================
 
+def _saved_project_item(row) -> dict:
+    """將 get_saved_projects 查詢的一列轉為回應用的 dict"""
+    return {
+        "id": str(row.id),
+        "title": row.title,
+        "description": row.description,
+        "budget_min": float_or_none(row.budget_min),
+        "budget_max": float_or_none(row.budget_max),
+        "status": row.status,
+        "created_at": row.created_at,
+        "saved_at": row.saved_at,
+        "client": {
+            "id": str(row.client_id),
+            "name": row.client_name,
+            "avatar_url": row.client_avatar_url
+        } if row.client_id else None
+    }
+
+
 @router.get("/saved/list", response_model=SuccessResponse[dict])
 async def get_saved_projects(
     pagination: PaginationParams = Depends(),
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得我的收藏案件 - 使用 Raw SQL
@@ -128,68 +152,23 @@ async def get_saved_projects(
     
     RLS 邏輯: 只能查看自己的收藏
     """
-    # 計算總數
-    count_sql = """
-        SELECT COUNT(*)
-        FROM saved_projects
-        WHERE user_id = :user_id
-    """
-    count_result = await db.execute(text(count_sql), {'user_id': str(current_user.id)})
-    total = count_result.scalar() or 0
-    
-    # 查詢收藏（一次性取得所有資料）
-    sql = """
-        SELECT 
-            p.id,
-            p.title,
-            p.description,
-            p.budget_min,
-            p.budget_max,
-            p.status,
-            p.created_at,
-            sp.created_at as saved_at,
-            u.id as client_id,
-            u.name as client_name,
-            u.avatar_url as client_avatar_url
-        FROM saved_projects sp
-        INNER JOIN projects p ON p.id = sp.project_id
-        LEFT JOIN users u ON u.id = p.client_id
-        WHERE sp.user_id = :user_id
-        ORDER BY sp.created_at DESC
-        LIMIT :limit OFFSET :offset
-    """
-    
     params = {
         'user_id': str(current_user.id),
         'limit': pagination.limit,
         'offset': pagination.offset
     }
     
-    result = await db.execute(text(sql), params)
+    # 計算總數
+    count_result = await queries.execute(db, queries.SAVED_PROJECTS_COUNT, params)
+    total = count_result.scalar() or 0
+    
+    # 查詢收藏（一次性取得所有資料）
+    result = await queries.execute(db, queries.SAVED_PROJECTS_LIST, params)
     rows = result.fetchall()
     
-    projects_data = []
-    for row in rows:
-        projects_data.append({
-            "id": str(row.id),
-            "title": row.title,
-            "description": row.description,
-            "budget_min": float(row.budget_min) if row.budget_min else None,
-            "budget_max": float(row.budget_max) if row.budget_max else None,
-            "status": row.status,
-            "created_at": row.created_at,
-            "saved_at": row.saved_at,
-            "client": {
-                "id": str(row.client_id),
-                "name": row.client_name,
-                "avatar_url": row.client_avatar_url
-            } if row.client_id else None
-        })
+    projects_data = [_saved_project_item(row) for row in rows]
     
-    return {
-        "success": True,
-        "data": {
-            "projects": projects_data,
-            "pagination": pagination.get_response_metadata(total)
-        }
-    }
+    return success_response({
+        "projects": projects_data,
+        "pagination": pagination.get_response_metadata(total)
+    })
@@ -8,11 +8,11 @@ from pydantic import BaseModel, EmailStr
 from ...services.email_service import send_test_email
 from ...schemas.common import SuccessResponse
 from ...config import settings
-from ...dependencies import require_admin
-from ...models.user import User
+from ...dependencies import CurrentUser, require_admin
+from ...routing import TransientRetryRoute
 
 
-router = APIRouter(prefix="/test-email", tags=["test-email"])
+router = APIRouter(prefix="/test-email", tags=["test-email"], route_class=TransientRetryRoute)
 
 
 class TestEmailRequest(BaseModel):
@@ -30,7 +30,7 @@ class TestEmailRequest(BaseModel):
 @router.post("", response_model=SuccessResponse[dict])
 async def send_test_email_endpoint(
     data: TestEmailRequest,
-    current_user: User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
     """
     發送測試 email（管理員專用）
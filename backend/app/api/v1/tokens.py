@@ -10,16 +10,18 @@ from pydantic import BaseModel
 from sqlalchemy import text
 import uuid
 
+from ...config import settings
 from ...db import get_db
-from ...models.user import User
+from ...routing import TransientRetryRoute
 from ...models.token import TransactionType
 from ...schemas.token import TokenBalanceResponse, TokenTransactionResponse, TokenPurchaseRequest, DiscountCodeValidationResponse
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user, PaginationParams
+from ...dependencies import CurrentUser, get_current_user, PaginationParams
+from ...services import token_ledger
 import os
 
 
-router = APIRouter(prefix="/tokens", tags=["tokens"])
+router = APIRouter(prefix="/tokens", tags=["tokens"], route_class=TransientRetryRoute)
 
 
 # 從環境變數讀取折扣碼設定
@@ -43,7 +45,7 @@ def get_discount_codes():
 @router.get("/balance", response_model=SuccessResponse[dict])
 async def get_token_balance(
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得使用者代幣餘額 - 使用 Raw SQL
@@ -53,40 +55,17 @@ async def get_token_balance(
     
     RLS 邏輯: 只能查看自己的餘額
     """
-    # 查詢使用者代幣帳戶
+    # 查詢餘額；舊帳號尚未建立帳戶時補建（含新用戶贈送）
     balance_sql = """
-        SELECT id, balance, total_earned, total_spent
+        SELECT balance, total_earned, total_spent
         FROM user_tokens
         WHERE user_id = :user_id
     """
     result = await db.execute(text(balance_sql), {'user_id': str(current_user.id)})
     user_token = result.fetchone()
     
-    # 如果不存在，創建新帳戶
     if not user_token:
-        token_id = uuid.uuid4()
-        insert_token_sql = """
-            INSERT INTO user_tokens (id, user_id, balance, total_earned, total_spent, created_at, updated_at)
-            VALUES (:id, :user_id, 1000, 1000, 0, NOW(), NOW())
-            RETURNING id, balance, total_earned, total_spent
-        """
-        result = await db.execute(text(insert_token_sql), {
-            'id': str(token_id),
-            'user_id': str(current_user.id)
-        })
-        user_token = result.fetchone()
-        
-        # 記錄初始贈送
-        insert_transaction_sql = """
-            INSERT INTO token_transactions (id, user_id, amount, balance_after, transaction_type, description, created_at)
-            VALUES (:id, :user_id, 1000, 1000, :transaction_type, :description, NOW())
-        """
-        await db.execute(text(insert_transaction_sql), {
-            'id': str(uuid.uuid4()),
-            'user_id': str(current_user.id),
-            'transaction_type': TransactionType.PLATFORM_FEE.value,
-            'description': "新用戶註冊贈送"
-        })
+        user_token = await token_ledger.open_account(db, current_user.id)
     
     return {
         "success": True,
@@ -103,8 +82,12 @@ async def get_token_balance(
 @router.get("/transactions", response_model=SuccessResponse[dict])
 async def get_token_transactions(
     pagination: PaginationParams = Depends(),
+    months: int = Query(
+        settings.TOKEN_TRANSACTIONS_DEFAULT_MONTHS, ge=1, le=120,
+        description="只查詢最近幾個月的交易記錄"
+    ),
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得代幣交易記錄 - 使用 Raw SQL
@@ -112,10 +95,13 @@ async def get_token_transactions(
     原始檔案: src/app/api/v1/tokens/transactions/route.ts
     對應 Service: TokenService.getTransactions()
     
+    token_transactions 按月分區，以 months 限制時間範圍，只會掃描最近的分區
+    
     RLS 邏輯: 只能查看自己的交易記錄
     """
     params = {
         'user_id': str(current_user.id),
+        'months': months,
         'limit': pagination.limit,
         'offset': pagination.offset
     }
@@ -125,6 +111,7 @@ async def get_token_transactions(
         SELECT COUNT(*)
         FROM token_transactions
         WHERE user_id = :user_id
+          AND created_at >= LOCALTIMESTAMP - make_interval(months => CAST(:months AS integer))
     """
     count_result = await db.execute(text(count_sql), params)
     total = count_result.scalar() or 0
@@ -136,6 +123,7 @@ async def get_token_transactions(
             reference_id, description, created_at
         FROM token_transactions
         WHERE user_id = :user_id
+          AND created_at >= LOCALTIMESTAMP - make_interval(months => CAST(:months AS integer))
         ORDER BY created_at DESC
         LIMIT :limit OFFSET :offset
     """
@@ -171,7 +159,7 @@ async def get_token_transactions(
 async def validate_discount_code(
     discount_code: str = Query(..., description="折扣碼"),
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     驗證折扣碼是否有效
@@ -239,7 +227,7 @@ async def validate_discount_code(
 async def purchase_tokens(
     data: TokenPurchaseRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     購買代幣 - 使用 Raw SQL
@@ -319,47 +307,8 @@ async def purchase_tokens(
     bonus_amount = bonus_mapping.get(data.amount, 0)  # 自訂金額無贈送
     total_tokens = data.amount + bonus_amount
     
-    # 取得使用者代幣帳戶
-    balance_sql = """
-        SELECT id, balance, total_earned
-        FROM user_tokens
-        WHERE user_id = :user_id
-    """
-    result = await db.execute(text(balance_sql), {'user_id': str(current_user.id)})
-    user_token = result.fetchone()
-    
-    if not user_token:
-        # 創建新帳戶
-        token_id = uuid.uuid4()
-        insert_sql = """
-            INSERT INTO user_tokens (id, user_id, balance, total_earned, total_spent, created_at, updated_at)
-            VALUES (:id, :user_id, :balance, :total_earned, 0, NOW(), NOW())
-            RETURNING id, balance
-        """
-        result = await db.execute(text(insert_sql), {
-            'id': str(token_id),
-            'user_id': str(current_user.id),
-            'balance': total_tokens,
-            'total_earned': total_tokens
-        })
-        user_token = result.fetchone()
-        new_balance = total_tokens
-    else:
-        # 增加代幣（包含贈送）
-        update_sql = """
-            UPDATE user_tokens
-            SET balance = balance + :amount,
-                total_earned = total_earned + :amount,
-                updated_at = NOW()
-            WHERE user_id = :user_id
-            RETURNING balance
-        """
-        result = await db.execute(text(update_sql), {
-            'amount': total_tokens,
-            'user_id': str(current_user.id)
-        })
-        updated = result.fetchone()
-        new_balance = updated.balance
+    # 確保帳戶存在（直接儲值的帳戶不含新用戶贈送，與原本行為一致）
+    await token_ledger.open_account(db, current_user.id, initial_balance=0, description=None)
     
     # 記錄折扣碼使用
     if discount_code:
@@ -374,35 +323,20 @@ async def purchase_tokens(
             'discount_amount': discount_amount
         })
     
-    # 記錄購買交易（只記錄購買的部分）
+    # 入帳：購買與贈送分別記錄交易
     description = f"使用折扣碼 {discount_code} 兌換 {data.amount} 代幣" if discount_code else f"購買 {data.amount} 代幣（{data.payment_method}）"
-    insert_transaction_sql = """
-        INSERT INTO token_transactions (id, user_id, amount, balance_after, transaction_type, description, created_at)
-        VALUES (:id, :user_id, :amount, :balance_after, :transaction_type, :description, NOW())
-    """
-    await db.execute(text(insert_transaction_sql), {
-        'id': str(uuid.uuid4()),
-        'user_id': str(current_user.id),
-        'amount': data.amount,
-        'balance_after': new_balance,
-        'transaction_type': TransactionType.PLATFORM_FEE.value,
-        'description': description
-    })
+    entry = await token_ledger.credit(
+        db, current_user.id, data.amount, TransactionType.PLATFORM_FEE,
+        description=description,
+    )
     
-    # 如果有贈送，記錄贈送交易
     if bonus_amount > 0:
-        insert_bonus_transaction_sql = """
-            INSERT INTO token_transactions (id, user_id, amount, balance_after, transaction_type, description, created_at)
-            VALUES (:id, :user_id, :amount, :balance_after, :transaction_type, :description, NOW())
-        """
-        await db.execute(text(insert_bonus_transaction_sql), {
-            'id': str(uuid.uuid4()),
-            'user_id': str(current_user.id),
-            'amount': bonus_amount,
-            'balance_after': new_balance,
-            'transaction_type': TransactionType.PLATFORM_FEE.value,
-            'description': f"購買 {data.amount} 代幣贈送"
-    })
+        entry = await token_ledger.credit(
+            db, current_user.id, bonus_amount, TransactionType.PLATFORM_FEE,
+            description=f"購買 {data.amount} 代幣贈送",
+        )
+    
+    new_balance = entry.balance_after
     
     message = f"成功兌換 {data.amount} 代幣"
     if discount_amount > 0:
@@ -5,27 +5,55 @@ Users Endpoints
 """
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy import text
 
-from ...db import get_db, parse_pg_array
-from ...models.user import User
+from ...db import get_db
+from ...routing import TransientRetryRoute
 from ...schemas.user import UserPublic, UserProfile, UpdateUserRequest, UpdatePasswordRequest
 from ...schemas.common import SuccessResponse
-from ...dependencies import get_current_user, get_current_user_optional, PaginationParams
+from ...dependencies import CurrentUser, get_current_user, get_current_user_optional, PaginationParams
 from ...security import hash_password, verify_password
+from ...responses import success_response
+from ...http_cache import make_etag, cache_headers, is_not_modified, not_modified_response
+from ...services import freelancer_directory, user_stats
 
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TransientRetryRoute)
 
 
 # ==================== 原: src/app/api/v1/users/search/route.ts ====================
 # 注意：搜尋路由必須在 /{user_id} 之前定義，避免 FastAPI 將 'search' 解析為 UUID
 
+# 排序方式 → ORDER BY（user_id 讓相同分數時分頁順序穩定）
+DIRECTORY_ORDER_BY = {
+    'rank': "rank_score DESC, user_id",
+    'rating': "rating DESC NULLS LAST, user_id",
+}
+
+
+def _directory_filters(skills: Optional[list[str]], min_rating: Optional[float], params: dict) -> str:
+    """組出 freelancer_directory 的 WHERE 條件（目錄只收錄接案者，不需再過濾 roles）"""
+    where_conditions = ["TRUE"]
+    
+    # 技能篩選（PostgreSQL array overlap，走 GIN 索引）
+    if skills:
+        where_conditions.append("skills && :skills")
+        params['skills'] = skills
+    
+    # 評分篩選
+    if min_rating is not None:
+        where_conditions.append("rating >= :min_rating")
+        params['min_rating'] = min_rating
+    
+    return " AND ".join(where_conditions)
+
+
 @router.get("/search")
 async def search_users(
     skills: Optional[list[str]] = Query(None, alias="skills[]"),
     min_rating: Optional[float] = Query(None, alias="minRating"),
+    sort_by: str = Query("rank", alias="sortBy"),
     pagination: PaginationParams = Depends(),
     db = Depends(get_db)
 ):
@@ -36,32 +64,21 @@ async def search_users(
     對應 Service: UserService.searchFreelancers()
     
     RLS 邏輯: 任何人都可搜尋
-    """
-    from ...models.user import UserRole
     
-    # 建立 WHERE 條件
-    where_conditions = ["'freelancer' = ANY(roles)"]
+    查詢 freelancer_directory 投影表：投標數與完成案件數已預先計算，
+    sortBy=rank（預設）依綜合分數排序，sortBy=rating 依評分排序
+    """
     params = {
         'limit': pagination.limit,
         'offset': pagination.offset
     }
-    
-    # 技能篩選（PostgreSQL array overlap）
-    if skills:
-        where_conditions.append("skills && :skills")
-        params['skills'] = skills
-    
-    # 評分篩選
-    if min_rating is not None:
-        where_conditions.append("rating >= :min_rating")
-        params['min_rating'] = min_rating
-    
-    where_clause = " AND ".join(where_conditions)
+    where_clause = _directory_filters(skills, min_rating, params)
+    order_by = DIRECTORY_ORDER_BY.get(sort_by, DIRECTORY_ORDER_BY['rank'])
     
     # 計算總數
     count_sql = f"""
         SELECT COUNT(*)
-        FROM users
+        FROM freelancer_directory
         WHERE {where_clause}
     """
     count_result = await db.execute(text(count_sql), params)
@@ -70,24 +87,11 @@ async def search_users(
     # 主查詢 - 包含統計資訊
     sql = f"""
         SELECT 
-            u.id, 
-            u.name, 
-            u.bio, 
-            u.skills, 
-            u.avatar_url, 
-            u.rating, 
-            u.portfolio_links, 
-            u.created_at,
-            (SELECT COUNT(*) FROM bids WHERE freelancer_id = u.id) as bids_count,
-            (
-                SELECT COUNT(*)
-                FROM projects p
-                WHERE p.status = 'completed'
-                  AND p.id IN (SELECT project_id FROM bids WHERE freelancer_id = u.id)
-            ) as completed_projects_count
-        FROM users u
+            user_id, name, bio, skills, avatar_url, rating,
+            portfolio_links, created_at, bids_count, completed_projects_count
+        FROM freelancer_directory
         WHERE {where_clause}
-        ORDER BY u.rating DESC NULLS LAST
+        ORDER BY {order_by}
         LIMIT :limit OFFSET :offset
     """
     
@@ -96,16 +100,16 @@ async def search_users(
     
     users_data = [
         {
-            "id": str(row.id),
+            "id": str(row.user_id),
             "name": row.name,
             "bio": row.bio,
-            "skills": parse_pg_array(row.skills),
+            "skills": row.skills,
             "avatar_url": row.avatar_url,
             "rating": float(row.rating) if row.rating else None,
-            "portfolio_links": parse_pg_array(row.portfolio_links),
+            "portfolio_links": row.portfolio_links,
             "created_at": row.created_at,
-            "bids_count": int(row.bids_count) or 0,
-            "completed_projects_count": int(row.completed_projects_count) or 0
+            "bids_count": row.bids_count,
+            "completed_projects_count": row.completed_projects_count
         }
         for row in rows
     ]
@@ -121,6 +125,7 @@ async def search_users(
 async def search_freelancers(
     skills: Optional[list[str]] = Query(None, alias="skills[]"),
     min_rating: Optional[float] = Query(None, alias="minRating"),
+    sort_by: str = Query("rank", alias="sortBy"),
     pagination: PaginationParams = Depends(),
     db = Depends(get_db)
 ):
@@ -132,29 +137,17 @@ async def search_freelancers(
     
     RLS 邏輯: 任何人都可搜尋
     """
-    # 建立 WHERE 條件
-    where_conditions = ["'freelancer' = ANY(roles)"]
     params = {
         'limit': pagination.limit,
         'offset': pagination.offset
     }
-    
-    # 技能篩選（PostgreSQL array overlap）
-    if skills:
-        where_conditions.append("skills && :skills")
-        params['skills'] = skills
-    
-    # 評分篩選
-    if min_rating is not None:
-        where_conditions.append("rating >= :min_rating")
-        params['min_rating'] = min_rating
-    
-    where_clause = " AND ".join(where_conditions)
+    where_clause = _directory_filters(skills, min_rating, params)
+    order_by = DIRECTORY_ORDER_BY.get(sort_by, DIRECTORY_ORDER_BY['rank'])
     
     # 計算總數
     count_sql = f"""
         SELECT COUNT(*)
-        FROM users
+        FROM freelancer_directory
         WHERE {where_clause}
     """
     count_result = await db.execute(text(count_sql), params)
@@ -163,11 +156,11 @@ async def search_freelancers(
     # 主查詢
     sql = f"""
         SELECT 
-            id, name, bio, skills, avatar_url, 
+            user_id, name, bio, skills, avatar_url, 
             rating, portfolio_links, created_at
-        FROM users
+        FROM freelancer_directory
         WHERE {where_clause}
-        ORDER BY rating DESC NULLS LAST
+        ORDER BY {order_by}
         LIMIT :limit OFFSET :offset
     """
     
@@ -176,13 +169,13 @@ async def search_freelancers(
     
     users_data = [
         {
-            "id": str(row.id),
+            "id": str(row.user_id),
             "name": row.name,
             "bio": row.bio,
-            "skills": parse_pg_array(row.skills),
+            "skills": row.skills,
             "avatar_url": row.avatar_url,
             "rating": float(row.rating) if row.rating else None,
-            "portfolio_links": parse_pg_array(row.portfolio_links),
+            "portfolio_links": row.portfolio_links,
             "created_at": row.created_at
         }
         for row in rows
@@ -202,7 +195,7 @@ async def search_freelancers(
 @router.get("/me/profile", response_model=SuccessResponse[dict])
 async def get_my_profile(
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     取得自己的完整資料 - 使用 Raw SQL
@@ -212,14 +205,16 @@ async def get_my_profile(
     
     RLS 邏輯: 只能查看自己的完整資料（包含 email, phone）
     """
-    # 一次性查詢所有資料（user + 統計）
+    # user + 統計（user_stats 以主鍵查詢，尚無統計資料的新使用者為 0）
     sql = """
         SELECT 
             u.*,
-            (SELECT COUNT(*) FROM projects WHERE client_id = u.id) as projects_count,
-            (SELECT COUNT(*) FROM bids WHERE freelancer_id = u.id) as bids_count,
-            (SELECT COUNT(*) FROM reviews WHERE reviewee_id = u.id) as reviews_count
+            COALESCE(s.projects_created, 0) as projects_count,
+            COALESCE(s.bids_count, 0) as bids_count,
+            COALESCE(s.reviews_count, 0) as reviews_count,
+            s.rating_1_count, s.rating_2_count, s.rating_3_count, s.rating_4_count, s.rating_5_count
         FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
         WHERE u.id = :user_id
     """
     
@@ -239,19 +234,20 @@ async def get_my_profile(
             "name": row.name,
             "email": row.email,
             "phone": row.phone,
-            "roles": parse_pg_array(row.roles),
+            "roles": row.roles,
             "bio": row.bio,
-            "skills": parse_pg_array(row.skills),
+            "skills": row.skills,
             "avatar_url": row.avatar_url,
             "rating": float(row.rating) if row.rating else None,
-            "portfolio_links": parse_pg_array(row.portfolio_links),
+            "portfolio_links": row.portfolio_links,
             "email_verified": row.email_verified,
             "phone_verified": row.phone_verified,
             "created_at": row.created_at,
             "updated_at": row.updated_at,
             "projects_count": int(row.projects_count) or 0,
             "bids_count": int(row.bids_count) or 0,
-            "reviews_count": int(row.reviews_count) or 0
+            "reviews_count": int(row.reviews_count) or 0,
+            "rating_histogram": user_stats.rating_histogram(row)
         }
     }
 
@@ -260,7 +256,7 @@ async def get_my_profile(
 async def update_my_profile(
     data: UpdateUserRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     更新自己的資料 - 使用 Raw SQL
@@ -332,6 +328,8 @@ async def update_my_profile(
             detail=f"更新失敗：{str(e)}"
         )
     
+    await freelancer_directory.refresh(db, [current_user.id])
+    
     return {
         "success": True,
         "message": "個人資料更新成功",
@@ -341,10 +339,10 @@ async def update_my_profile(
             "email": row.email,
             "phone": row.phone,
             "bio": row.bio,
-            "skills": parse_pg_array(row.skills),
+            "skills": row.skills,
             "avatar_url": row.avatar_url,
-            "portfolio_links": parse_pg_array(row.portfolio_links),
-            "roles": parse_pg_array(row.roles),
+            "portfolio_links": row.portfolio_links,
+            "roles": row.roles,
             "updated_at": row.updated_at
         }
     }
@@ -356,7 +354,7 @@ async def update_my_profile(
 async def update_password(
     data: UpdatePasswordRequest,
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     更新密碼 - 使用 Raw SQL
@@ -415,7 +413,7 @@ async def update_password(
 async def update_skills(
     skills: list[str],
     db = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     更新技能標籤 - 使用 Raw SQL
@@ -437,6 +435,7 @@ async def update_skills(
         'user_id': str(current_user.id)
     })
     row = result.fetchone()
+    await freelancer_directory.refresh(db, [current_user.id])
     
     return {
         "success": True,
@@ -453,6 +452,7 @@ async def update_skills(
 @router.get("/{user_id}/reviews", response_model=SuccessResponse[dict])
 async def get_user_reviews(
     user_id: UUID,
+    request: Request,
     pagination: PaginationParams = Depends(),
     db = Depends(get_db)
 ):
@@ -470,14 +470,28 @@ async def get_user_reviews(
         'offset': pagination.offset
     }
     
-    # 計算總數
+    # 計算總數與版本（評價只會新增；評價者名稱、案件標題變更會反映在 updated_at）
     count_sql = """
-        SELECT COUNT(*)
-        FROM reviews
-        WHERE reviewee_id = :user_id
+        SELECT 
+            COUNT(*) as total,
+            MAX(r.created_at) as last_created_at,
+            MAX(GREATEST(reviewer.updated_at, p.updated_at)) as related_updated_at
+        FROM reviews r
+        LEFT JOIN users reviewer ON reviewer.id = r.reviewer_id
+        LEFT JOIN projects p ON p.id = r.project_id
+        WHERE r.reviewee_id = :user_id
     """
     count_result = await db.execute(text(count_sql), params)
-    total = count_result.scalar() or 0
+    version = count_result.fetchone()
+    total = version.total or 0
+    
+    etag = make_etag(
+        "user_reviews", user_id, pagination.page, pagination.limit,
+        total, version.last_created_at, version.related_updated_at
+    )
+    headers = cache_headers(etag, "user_reviews")
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
     
     # 查詢評價（一次性取得所有資料）
     sql = """
@@ -509,7 +523,7 @@ async def get_user_reviews(
             "id": str(row.id),
             "rating": row.rating,
             "comment": row.comment,
-            "tags": parse_pg_array(row.tags),
+            "tags": row.tags,
             "created_at": row.created_at,
             "reviewer": {
                 "id": str(row.reviewer_id),
@@ -522,13 +536,10 @@ async def get_user_reviews(
             } if row.project_id else None
         })
     
-    return {
-        "success": True,
-        "data": {
-            "reviews": reviews_data,
-            "pagination": pagination.get_response_metadata(total)
-        }
-    }
+    return success_response({
+        "reviews": reviews_data,
+        "pagination": pagination.get_response_metadata(total)
+    }, headers=headers)
 
 
 # ==================== 原: src/app/api/v1/users/[id]/stats/route.ts ====================
@@ -536,6 +547,7 @@ async def get_user_reviews(
 @router.get("/{user_id}/stats", response_model=SuccessResponse[dict])
 async def get_user_stats(
     user_id: UUID,
+    request: Request,
     db = Depends(get_db)
 ):
     """
@@ -548,23 +560,19 @@ async def get_user_stats(
     """
     from ...models.user import UserRole
     
-    # 一次性查詢所有統計（超高效）
+    # 統計由寫入端點增量維護（user_stats），這裡只需主鍵查詢
     sql = """
         SELECT 
             u.rating,
             u.roles,
-            (SELECT COUNT(*) FROM projects WHERE client_id = u.id) as projects_created,
-            (SELECT COUNT(*) FROM bids WHERE freelancer_id = u.id) as bids_count,
-            (
-                SELECT COUNT(*)
-                FROM projects p
-                WHERE p.status = 'completed'
-                  AND (
-                    p.client_id = u.id
-                    OR p.id IN (SELECT project_id FROM bids WHERE freelancer_id = u.id)
-                  )
-            ) as completed_projects
+            u.updated_at,
+            s.updated_at as stats_updated_at,
+            COALESCE(s.projects_created, 0) as projects_created,
+            COALESCE(s.bids_count, 0) as bids_count,
+            COALESCE(s.completed_count, 0) as completed_projects,
+            s.rating_1_count, s.rating_2_count, s.rating_3_count, s.rating_4_count, s.rating_5_count
         FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
         WHERE u.id = :user_id
     """
     
@@ -577,17 +585,23 @@ async def get_user_stats(
             detail="使用者不存在"
         )
     
-    return {
-        "success": True,
-        "data": {
-            "rating": float(row.rating) if row.rating else 0.0,
-            "projects_created": int(row.projects_created) or 0,
-            "bids_count": int(row.bids_count) or 0,
-            "completed_projects": int(row.completed_projects) or 0,
-            "is_freelancer": UserRole.FREELANCER.value in parse_pg_array(row.roles),
-            "is_client": UserRole.CLIENT.value in parse_pg_array(row.roles)
-        }
-    }
+    # users.updated_at 涵蓋 rating / roles，user_stats.updated_at 涵蓋統計值
+    etag = make_etag(
+        "user_stats", user_id, row.rating, row.updated_at, row.stats_updated_at
+    )
+    headers = cache_headers(etag, "user_stats")
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    
+    return success_response({
+        "rating": float(row.rating) if row.rating else 0.0,
+        "projects_created": int(row.projects_created) or 0,
+        "bids_count": int(row.bids_count) or 0,
+        "completed_projects": int(row.completed_projects) or 0,
+        "rating_histogram": user_stats.rating_histogram(row),
+        "is_freelancer": UserRole.FREELANCER.value in row.roles,
+        "is_client": UserRole.CLIENT.value in row.roles
+    }, headers=headers)
 
 
 # ==================== 原: src/app/api/v1/users/[id]/route.ts ====================
@@ -596,8 +610,9 @@ async def get_user_stats(
 @router.get("/{user_id}", response_model=SuccessResponse[dict])
 async def get_user_public_profile(
     user_id: UUID,
+    request: Request,
     db = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
 ):
     """
     取得使用者公開資料 - 使用 Raw SQL
@@ -619,10 +634,14 @@ async def get_user_public_profile(
             u.rating,
             u.portfolio_links,
             u.created_at,
-            (SELECT COUNT(*) FROM projects WHERE client_id = u.id) as projects_count,
-            (SELECT COUNT(*) FROM bids WHERE freelancer_id = u.id) as bids_count,
-            (SELECT COUNT(*) FROM reviews WHERE reviewee_id = u.id) as reviews_count
+            u.updated_at,
+            s.updated_at as stats_updated_at,
+            COALESCE(s.projects_created, 0) as projects_count,
+            COALESCE(s.bids_count, 0) as bids_count,
+            COALESCE(s.reviews_count, 0) as reviews_count,
+            s.rating_1_count, s.rating_2_count, s.rating_3_count, s.rating_4_count, s.rating_5_count
         FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
         WHERE u.id = :user_id
     """
     
@@ -635,21 +654,27 @@ async def get_user_public_profile(
             detail="使用者不存在"
         )
     
-    return {
-        "success": True,
-        "data": {
-            "id": str(row.id),
-            "name": row.name,
-            "email": None,  # 公開資料不顯示 email
-            "roles": parse_pg_array(row.roles),
-            "bio": row.bio,
-            "skills": parse_pg_array(row.skills),
-            "avatar_url": row.avatar_url,
-            "rating": float(row.rating) if row.rating else None,
-            "portfolio_links": parse_pg_array(row.portfolio_links),
-            "created_at": row.created_at,
-            "projects_count": int(row.projects_count) or 0,
-            "bids_count": int(row.bids_count) or 0,
-            "reviews_count": int(row.reviews_count) or 0
-        }
-    }
+    # 公開資料與登入者無關，可由 CDN 共用
+    etag = make_etag(
+        "user_profile", row.id, row.rating, row.updated_at, row.stats_updated_at
+    )
+    headers = cache_headers(etag, "user_profile")
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    
+    return success_response({
+        "id": str(row.id),
+        "name": row.name,
+        "email": None,  # 公開資料不顯示 email
+        "roles": row.roles,
+        "bio": row.bio,
+        "skills": row.skills,
+        "avatar_url": row.avatar_url,
+        "rating": float(row.rating) if row.rating else None,
+        "portfolio_links": row.portfolio_links,
+        "created_at": row.created_at,
+        "projects_count": int(row.projects_count) or 0,
+        "bids_count": int(row.bids_count) or 0,
+        "reviews_count": int(row.reviews_count) or 0,
+        "rating_histogram": user_stats.rating_histogram(row)
+    }, headers=headers)
@@ -0,0 +1,146 @@
+"""
+程序內（in-process）回應快取
+- TTL 到期自動失效，LRU 限制筆數
+- Single-flight：同一個 key 同時只會有一個請求查詢資料庫，其他請求等待結果
+- 以 generation 計數器整批失效（寫入端點呼叫 invalidate()）
+
+注意：快取只存在單一 instance 內，多個 Cloud Run instance 之間不會同步失效，
+因此 TTL 必須保持很短，作為跨 instance 資料不一致的上限
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, Optional
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """已序列化的回應"""
+    body: bytes
+    etag: str
+    expires_at: float
+    generation: int
+
+
+class ResponseCache:
+    """
+    序列化後回應的 TTL 快取
+
+    使用方式:
+    ```python
+    entry = await cache.get_or_build(key, build)  # build() 回傳 JSON bytes
+    return Response(entry.body, media_type="application/json", headers={"ETag": entry.etag})
+    ```
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """取得未過期的快取（不存在或已過期回傳 None）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic() or entry.generation != self.generation:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Hashable, entry: CachedResponse) -> None:
+        # 建立期間發生過 invalidate，結果可能已過期，不寫入
+        if entry.generation != self.generation:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Awaitable[bytes]],
+    ) -> CachedResponse:
+        """
+        取得快取，不存在時呼叫 build() 建立
+
+        同一個 key 同時只有一個 build() 在執行；
+        若該次 build 失敗或被取消，等待中的請求會各自重新 build（不寫入快取）
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                entry = await asyncio.shield(inflight)
+                self.hits += 1
+                return entry
+            except Exception:
+                return self._make_entry(await build(), self.generation)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self.generation
+        try:
+            entry = self._make_entry(await build(), generation)
+            self._store(key, entry)
+            future.set_result(entry)
+            return entry
+        except BaseException as exc:
+            # 包含 CancelledError（用戶端斷線），確保等待者不會永遠卡住
+            if not future.done():
+                future.set_exception(exc if isinstance(exc, Exception) else RuntimeError("cache build cancelled"))
+                # 沒有等待者時避免 "Future exception was never retrieved" 警告
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _make_entry(self, body: bytes, generation: int) -> CachedResponse:
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return CachedResponse(
+            body=body,
+            etag=f'"{digest}"',
+            expires_at=time.monotonic() + self.ttl,
+            generation=generation,
+        )
+
+    def invalidate(self) -> None:
+        """清除所有快取（進行中的 build 結果也不會被寫入）"""
+        self.generation += 1
+        self._entries.clear()
+        logger.debug(f"Cache '{self.name}' invalidated (generation {self.generation})")
+
+
+# ==================== 快取實例 ====================
+
+# 未登入使用者的案件列表（探索頁、SEO landing page）
+project_list_cache = ResponseCache(
+    "project_list",
+    ttl=settings.PROJECT_LIST_CACHE_TTL,
+    max_entries=settings.PROJECT_LIST_CACHE_MAX_ENTRIES,
+)
+
+
+def invalidate_project_listings() -> None:
+    """案件新增 / 修改 / 狀態變更後呼叫"""
+    project_list_cache.invalidate()
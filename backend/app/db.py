@@ -3,11 +3,16 @@
 使用 SQLAlchemy Core + psycopg (psycopg3) async driver
 不使用 ORM，速度快 10x，完美適配 PgBouncer 和 Cloud Run
 """
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection
 from sqlalchemy import text, TypeDecorator, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import DeclarativeBase
-from typing import AsyncGenerator, Any, Optional
+from typing import AsyncGenerator, Awaitable, Callable, Optional, TypeVar
 from contextlib import asynccontextmanager
 from uuid import uuid4
 from .config import settings
@@ -22,27 +27,72 @@ from .config import settings
 # 3. 速度是 ORM 10x
 # 4. 完美適配 Cloud Run（省 connection 數）
 #
+POOL_SIZE = 5  # Connection pool 大小
+MAX_OVERFLOW = 10  # 最多額外建立的連線數
+
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,  # 關閉 SQL 日誌以簡化輸出（如需除錯可改為 True）
-    pool_size=5,  # Connection pool 大小
-    max_overflow=10,  # 最多額外建立的連線數
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     pool_pre_ping=False,  # 關閉 pre-ping（避免 prepared statements）
     pool_recycle=300,  # 5 分鐘回收連線（PgBouncer transaction pooling 建議較短時間）
+    pool_timeout=settings.DB_POOL_TIMEOUT,  # 等待可用連線的上限（秒），逾時回應 503
     # 禁用 SQLAlchemy 的 prepared statement 功能（PgBouncer 相容）
     execution_options={
         "compiled_cache": None,  # 禁用 SQLAlchemy SQL 編譯快取
         "schema_translate_map": None,  # 禁用 schema 轉換
     },
-    # 直接在 psycopg 連接參數中設置 prepare_threshold=None
+    # 直接在 psycopg 連接參數中設置 prepare_threshold
+    # 預設 None 完全禁用 prepared statements（適配 Supabase pooler / PgBouncer）；
+    # 直連資料庫時可設定 DB_PREPARE_THRESHOLD，讓 app/queries.py 的固定語句重用執行計畫
     connect_args={
-        "prepare_threshold": None,  # 完全禁用 prepared statements（適配 Supabase pooler / PgBouncer）
+        "prepare_threshold": settings.DB_PREPARE_THRESHOLD,
     },
     # 使用原生 SQL 模式，不進行任何預處理
     future=True,
 )
 
 
+# ==================== 型別註冊 ====================
+#
+# psycopg 原生支援 text[] / uuid 等內建型別，但 enum 陣列（users.roles 為 user_role[]）
+# 的 OID 不是內建型別，會以字串 '{client,freelancer}' 回傳，
+# 原本每一列都要在 router 裡以 parse_pg_array() 切字串（遇到含逗號、引號的元素也會出錯）
+# 改為在每條新連線註冊 enum 型別資訊，陣列直接解析為 list[str]（enum 單值仍為 str）
+#
+# 型別資訊只在第一條連線查詢一次，之後的連線直接註冊（不需額外 round trip）
+
+# 會出現在陣列欄位或陣列運算結果中的 enum 型別
+PG_ENUM_TYPES = (
+    "user_role",
+    "project_status",
+    "project_mode",
+    "bid_status",
+    "conversation_type",
+    "transaction_type",
+)
+
+_pg_type_infos: Optional[list] = None
+
+
+async def _register_pg_types(conn) -> None:
+    """在 psycopg 連線上註冊 enum 型別（陣列解析為 list[str]）"""
+    global _pg_type_infos
+    if _pg_type_infos is None:
+        from psycopg.types import TypeInfo
+
+        infos = [await TypeInfo.fetch(conn, name) for name in PG_ENUM_TYPES]
+        _pg_type_infos = [info for info in infos if info is not None]
+    for info in _pg_type_infos:
+        info.register(conn)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    dbapi_connection.run_async(_register_pg_types)
+
+
 # ==================== Base 和 EnumTypeDecorator（供 models 參考用） ====================
 
 # Base class for models（保留供 models 參考，但實際不使用 ORM）
@@ -82,6 +132,208 @@ class EnumTypeDecorator(TypeDecorator):
         return value
 
 
+# ==================== 連線池監控 ====================
+
+class PoolMonitor:
+    """
+    連線池等待狀況（供 AdmissionControlMiddleware 判斷是否過載）
+
+    - waiting：目前正在等待取得連線的請求數
+    - recent_wait()：取得連線耗時的 EWMA，沒有新樣本時依 half_life 逐漸衰減
+      （全部請求都被拒絕時不會一直停留在高點）
+    """
+
+    def __init__(self, alpha: float = 0.2, half_life: float = 5.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self.waiting = 0
+        self._wait = 0.0
+        self._updated = time.monotonic()
+
+    def recent_wait(self) -> float:
+        """最近取得連線的平均等待秒數"""
+        elapsed = time.monotonic() - self._updated
+        return self._wait * 0.5 ** (elapsed / self.half_life)
+
+    def record_wait(self, seconds: float) -> None:
+        current = self.recent_wait()
+        self._wait = current + (seconds - current) * self.alpha
+        self._updated = time.monotonic()
+
+    def checked_out(self) -> int:
+        """目前借出的連線數"""
+        return engine.pool.checkedout()
+
+    def capacity(self) -> int:
+        """連線池最多可借出的連線數（pool_size + max_overflow）"""
+        return POOL_SIZE + MAX_OVERFLOW
+
+
+pool_monitor = PoolMonitor()
+
+
+@asynccontextmanager
+async def _begin() -> AsyncGenerator[AsyncConnection, None]:
+    """等同 engine.begin()，並記錄等待連線的時間與人數"""
+    pool_monitor.waiting += 1
+    started = time.perf_counter()
+    try:
+        conn = await engine.connect()
+    finally:
+        pool_monitor.waiting -= 1
+    pool_monitor.record_wait(time.perf_counter() - started)
+
+    try:
+        async with conn.begin():
+            yield conn
+    finally:
+        await conn.close()
+
+
+# ==================== 暫時性錯誤重試 ====================
+#
+# 重新執行整個交易即可成功的錯誤：
+# - "rollback"：資料庫已確定回滾交易（serialization failure、deadlock，
+#   以及 PgBouncer 換了後端連線造成的 prepared statement / 交易中止錯誤），任何交易都可以重試
+# - "connection"：連線中斷（PgBouncer / Supabase pooler 重啟、閒置連線被關閉）；
+#   若發生在 COMMIT 當下無法得知交易是否已生效，只有唯讀或冪等的交易可以重試
+#
+# get_db 提供的連線由 FastAPI 在端點結束後 commit，重試必須重新執行整個端點，
+# 由 app/routing.py 的 TransientRetryRoute 呼叫 run_with_retry()
+
+ROLLBACK_SQLSTATES = frozenset({
+    "40001",  # serialization_failure
+    "40P01",  # deadlock_detected
+    "42P05",  # duplicate_prepared_statement
+    "26000",  # invalid_sql_statement_name（prepared statement 不存在）
+    "25P02",  # in_failed_sql_transaction
+})
+
+# connection_exception (08xxx)、admin_shutdown / crash_shutdown / cannot_connect_now (57P0x)
+CONNECTION_SQLSTATE_PREFIXES = ("08", "57P")
+
+
+def _exception_chain(exc: BaseException):
+    """依序走訪 SQLAlchemy 包裝的原始錯誤與 __cause__ / __context__"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = getattr(exc, "orig", None) or exc.__cause__ or exc.__context__
+
+
+def transient_error_kind(exc: BaseException) -> Optional[str]:
+    """暫時性錯誤回傳 "rollback" / "connection"，其他錯誤回傳 None"""
+    from psycopg import OperationalError
+
+    for error in _exception_chain(exc):
+        if isinstance(error, DBAPIError) and error.connection_invalidated:
+            return "connection"
+        sqlstate = getattr(error, "sqlstate", None)
+        if sqlstate in ROLLBACK_SQLSTATES:
+            return "rollback"
+        if sqlstate and sqlstate.startswith(CONNECTION_SQLSTATE_PREFIXES):
+            return "connection"
+        if isinstance(error, OperationalError) and sqlstate is None:
+            # 連線在查詢途中被關閉（server closed the connection unexpectedly）
+            return "connection"
+    return None
+
+
+def _error_key(exc: BaseException) -> str:
+    """統計用的錯誤分類（SQLSTATE 或最內層的例外類型）"""
+    errors = list(_exception_chain(exc))
+    for error in errors:
+        sqlstate = getattr(error, "sqlstate", None)
+        if sqlstate:
+            return f"{sqlstate} {type(error).__name__}"
+    return type(errors[-1]).__name__
+
+
+@dataclass
+class RetryStats:
+    """暫時性錯誤重試的累計次數（GET /api/v1/admin/db-retry-stats）"""
+    retries: int = 0  # 重試次數
+    recovered: int = 0  # 重試後成功的交易數
+    exhausted: int = 0  # 重試用盡仍失敗的交易數
+    by_error: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+            "by_error": dict(sorted(self.by_error.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+
+retry_stats = RetryStats()
+
+T = TypeVar("T")
+
+
+def retry_delay(attempt: int) -> float:
+    """第 attempt 次（從 0 開始）重試前的等待秒數：指數退避 + 隨機抖動，上限 1 秒"""
+    delay = settings.DB_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+    return min(delay * random.uniform(0.5, 1.5), 1.0)
+
+
+async def run_with_retry(
+    work: Callable[[], Awaitable[T]],
+    idempotent: bool,
+    retries: Optional[int] = None,
+) -> T:
+    """
+    執行 await work()，遇到暫時性錯誤時以退避重新執行整個 work
+
+    work 每次都必須開啟新的交易（失敗的交易已回滾）；
+    idempotent=False 時只重試 "rollback" 類錯誤（連線中斷時交易可能已 commit）
+    """
+    if retries is None:
+        retries = settings.DB_TRANSIENT_RETRIES
+
+    attempt = 0
+    while True:
+        try:
+            result = await work()
+        except Exception as e:
+            kind = transient_error_kind(e)
+            if kind is None or (kind == "connection" and not idempotent):
+                raise
+            key = _error_key(e)
+            retry_stats.by_error[key] = retry_stats.by_error.get(key, 0) + 1
+            if attempt >= retries:
+                if retries:
+                    retry_stats.exhausted += 1
+                raise
+            retry_stats.retries += 1
+            await asyncio.sleep(retry_delay(attempt))
+            attempt += 1
+            continue
+        if attempt:
+            retry_stats.recovered += 1
+        return result
+
+
+async def run_in_transaction(
+    work: Callable[[AsyncConnection], Awaitable[T]],
+    idempotent: bool = True,
+) -> T:
+    """
+    在新的交易中執行 await work(conn)，暫時性錯誤時整個交易重試（背景工作、管理指令使用）
+
+    使用方式:
+    ```python
+    purged = await run_in_transaction(refresh_tokens.purge_expired)
+    ```
+    """
+    async def attempt() -> T:
+        async with _begin() as conn:
+            return await work(conn)
+
+    return await run_with_retry(attempt, idempotent=idempotent)
+
+
 # ==================== FastAPI Dependency ====================
 
 @asynccontextmanager
@@ -95,7 +347,7 @@ async def get_db_connection():
         result = await conn.execute(text("SELECT * FROM users"))
     ```
     """
-    async with engine.begin() as conn:
+    async with _begin() as conn:
         # 不需要 DEALLOCATE ALL，因為已設定 prepare_threshold=None
         # PgBouncer transaction pooling 會自動處理連線狀態
         yield conn
@@ -125,8 +377,9 @@ async def get_db() -> AsyncGenerator[AsyncConnection, None]:
     - 使用 result.fetchall() 取得所有筆
     - 使用 result.scalar() 取得單一值
     - psycopg 已設定 prepare_threshold=None，天然相容 PgBouncer
+    - 暫時性錯誤時整個端點（含此交易）由 TransientRetryRoute 重新執行（見 app/routing.py）
     """
-    async with engine.begin() as conn:
+    async with _begin() as conn:
         # 不需要 DEALLOCATE ALL，因為已設定 prepare_threshold=None
         # PgBouncer transaction pooling 會自動處理連線狀態
         yield conn
@@ -134,35 +387,6 @@ async def get_db() -> AsyncGenerator[AsyncConnection, None]:
 
 # ==================== 執行 Raw Query 的輔助函數 ====================
 
-def parse_pg_array(value: Any) -> Optional[list]:
-    """
-    將 psycopg 返回的 PostgreSQL array 字串轉換為 Python list
-    
-    psycopg 返回格式: '{item1,item2,item3}'
-    asyncpg 返回格式: ['item1', 'item2', 'item3']
-    
-    此函數確保與 asyncpg 的行為一致
-    
-    範例:
-    - '{client,freelancer}' -> ['client', 'freelancer']
-    - '{}' -> []
-    - None -> None
-    - ['already', 'list'] -> ['already', 'list']
-    """
-    if value is None:
-        return None
-    if isinstance(value, list):
-        return value  # 已經是 list
-    if isinstance(value, str):
-        # 移除外層的大括號並分割
-        if value.startswith('{') and value.endswith('}'):
-            value = value[1:-1]
-        if not value:  # 空 array
-            return []
-        return value.split(',')
-    return value
-
-
 async def execute_query(query: str, params: dict = None):
     """
     執行查詢並返回結果（獨立連線）
@@ -184,6 +408,40 @@ async def execute_many(query: str, params_list: list[dict]):
 
 # ==================== 生命週期管理 ====================
 
+async def prewarm_pool(connections: int, timeout: float = 10.0) -> int:
+    """
+    預先建立連線放入連線池（在 lifespan 啟動時呼叫）
+
+    連線池原本在第一個請求時才建立連線，第一次連線還要執行 dialect 初始化查詢，
+    scale-to-zero 的 instance 會讓第一位使用者承擔這段延遲；
+    同時持有 N 條連線才能確保建立的是不同連線，結束後全部放回連線池
+
+    Returns:
+        成功建立的連線數（逾時或失敗的連線只略過，不影響啟動）
+    """
+    connections = min(connections, POOL_SIZE)
+    if connections <= 0:
+        return 0
+
+    tasks = [asyncio.ensure_future(engine.connect()) for _ in range(connections)]
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+    opened = 0
+    error = None
+    for task in done:
+        if task.exception() is not None:
+            error = task.exception()
+            continue
+        await task.result().close()
+        opened += 1
+
+    if error is not None and opened == 0:
+        raise error
+    return opened
+
+
 async def close_db():
     """關閉資料庫連線池"""
     await engine.dispose()
@@ -2,6 +2,9 @@
 Common FastAPI Dependencies
 使用 Raw SQL 優化
 """
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 from fastapi import Depends, HTTPException, status, Query
@@ -9,7 +12,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import text
 
 from .db import get_db as _get_db
-from .models.user import User, UserRole
+from .models.user import UserRole
 from .security import decode_token
 
 
@@ -17,6 +20,56 @@ from .security import decode_token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
+# Current user
+@dataclass(slots=True)
+class CurrentUser:
+    """
+    目前登入的使用者
+
+    一般 dataclass，由 users 資料列直接建立；
+    原本使用 ORM 的 User()，第一個請求會觸發所有 model 的 mapper configuration，
+    每次建立也要經過 ORM instrumentation
+    """
+    id: UUID
+    name: str
+    email: str
+    password_hash: Optional[str]
+    roles: list
+    bio: Optional[str]
+    skills: list
+    avatar_url: Optional[str]
+    rating: Optional[Decimal]
+    portfolio_links: list
+    google_id: Optional[str]
+    phone: Optional[str]
+    phone_verified: Optional[bool]
+    email_verified: Optional[bool]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "CurrentUser":
+        # user_role[] 與 uuid 已由 db.py 註冊的型別轉換為 list / UUID
+        return cls(
+            id=row.id,
+            name=row.name,
+            email=row.email,
+            password_hash=row.password_hash,
+            roles=row.roles,
+            bio=row.bio,
+            skills=row.skills,
+            avatar_url=row.avatar_url,
+            rating=row.rating,
+            portfolio_links=row.portfolio_links,
+            google_id=row.google_id,
+            phone=row.phone,
+            phone_verified=row.phone_verified,
+            email_verified=row.email_verified,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+
+
 # Re-export get_db
 async def get_db():
     async for conn in _get_db():
@@ -27,7 +80,7 @@ async def get_db():
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db = Depends(get_db)
-) -> User:
+) -> CurrentUser:
     """
     獲取當前登入使用者（必須登入） - 使用 Raw SQL
     """
@@ -67,37 +120,14 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # 轉換 PostgreSQL array（psycopg 返回字串格式）
-    from .db import parse_pg_array
-    
-    # 建立 User 物件（僅用於型別提示和 Enum 存取）
-    # 注意：這裡不使用 ORM，只是包裝資料
-    user = User()
-    user.id = UUID(row.id) if isinstance(row.id, str) else row.id
-    user.name = row.name
-    user.email = row.email
-    user.password_hash = row.password_hash
-    user.roles = parse_pg_array(row.roles)  # 轉換 PostgreSQL array
-    user.bio = row.bio
-    user.skills = parse_pg_array(row.skills)  # 轉換 skills array
-    user.avatar_url = row.avatar_url
-    user.rating = row.rating
-    user.portfolio_links = parse_pg_array(row.portfolio_links)  # 轉換 links array
-    user.google_id = row.google_id
-    user.phone = row.phone
-    user.phone_verified = row.phone_verified
-    user.email_verified = row.email_verified
-    user.created_at = row.created_at
-    user.updated_at = row.updated_at
-    
-    return user
+    return CurrentUser.from_row(row)
 
 
 # Get current user (optional auth)
 async def get_current_user_optional(
     token: Optional[str] = Depends(oauth2_scheme),
     db = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[CurrentUser]:
     """
     獲取當前登入使用者（選用，未登入時回傳 None） - 使用 Raw SQL
     """
@@ -124,37 +154,15 @@ async def get_current_user_optional(
         if not row:
             return None
         
-        # 轉換 PostgreSQL array（psycopg 返回字串格式）
-        from .db import parse_pg_array
-        
-        # 建立 User 物件
-        user = User()
-        user.id = UUID(row.id) if isinstance(row.id, str) else row.id
-        user.name = row.name
-        user.email = row.email
-        user.password_hash = row.password_hash
-        user.roles = parse_pg_array(row.roles)  # 轉換 array
-        user.bio = row.bio
-        user.skills = parse_pg_array(row.skills)  # 轉換 array
-        user.avatar_url = row.avatar_url
-        user.rating = row.rating
-        user.portfolio_links = parse_pg_array(row.portfolio_links)  # 轉換 array
-        user.google_id = row.google_id
-        user.phone = row.phone
-        user.phone_verified = row.phone_verified
-        user.email_verified = row.email_verified
-        user.created_at = row.created_at
-        user.updated_at = row.updated_at
-        
-        return user
+        return CurrentUser.from_row(row)
     except:
         return None
 
 
 # Require admin role
 async def require_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """
     要求管理員權限
     """
@@ -0,0 +1,109 @@
+"""
+HTTP 條件式請求（Conditional GET）
+- 由 updated_at / 版本欄位產生 strong ETag，不需要先組出完整 body
+- 處理 If-None-Match，命中時回傳空的 304
+- 各路由的 Cache-Control 策略集中定義
+
+不使用 Last-Modified：回應中的 bids_count、is_saved 等欄位沒有對應的時間戳，
+以時間判斷會回傳過期的 304
+"""
+import hashlib
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+# ==================== Cache-Control 策略 ====================
+
+# 瀏覽器可快取但每次都要帶 ETag 回來驗證；CDN 可依 URL 共用
+CACHE_PUBLIC_REVALIDATE = "public, no-cache"
+
+# 與登入者相關的內容（例如 is_saved）只能存在瀏覽器
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+
+# 變動不頻繁的公開資料，允許短暫使用舊資料
+CACHE_PUBLIC_SHORT = "public, max-age=60, stale-while-revalidate=300"
+
+CACHE_POLICIES = {
+    "project_list": CACHE_PUBLIC_REVALIDATE,
+    "project_detail": CACHE_PUBLIC_REVALIDATE,
+    "project_detail_private": CACHE_PRIVATE_REVALIDATE,
+    "user_profile": CACHE_PUBLIC_SHORT,
+    "user_reviews": CACHE_PUBLIC_SHORT,
+    "user_stats": CACHE_PUBLIC_SHORT,
+}
+
+
+# ==================== ETag ====================
+
+def _normalize(part: Any) -> str:
+    """將 ETag 組成元素轉為穩定字串"""
+    if part is None:
+        return ""
+    if isinstance(part, datetime):
+        return part.isoformat()
+    return str(part)
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    由版本資訊產生 strong ETag
+
+    範例:
+    ```python
+    etag = make_etag("project", row.id, row.updated_at, row.bids_count)
+    # '"3f2a...c9"'
+    ```
+    """
+    digest = hashlib.blake2b(
+        "\x1f".join(_normalize(part) for part in parts).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    """去除 W/ 前綴（If-None-Match 使用 weak comparison）"""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    檢查 If-None-Match 是否包含目前的 ETag
+
+    支援 `*`、以逗號分隔的多個 ETag，以及 W/ 前綴
+    （壓縮 middleware 會將 strong ETag 轉為 weak）
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in if_none_match.split(","))
+
+
+# ==================== 回應 ====================
+
+def cache_headers(etag: str, policy: str, vary: Optional[str] = None) -> dict:
+    """組出 ETag / Cache-Control（/ Vary）headers"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_POLICIES.get(policy, policy),
+    }
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """判斷是否可回傳 304"""
+    return etag_matches(request.headers.get("if-none-match"), etag)
+
+
+def not_modified_response(headers: dict) -> Response:
+    """空 body 的 304 回應（保留 ETag / Cache-Control 讓瀏覽器更新快取）"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
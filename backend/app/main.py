@@ -6,11 +6,17 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 
 from .config import settings
-from .db import close_db
+from .db import close_db, prewarm_pool, run_in_transaction, transient_error_kind
+from .responses import ORJSONResponse
+from .middleware import CompressionMiddleware, AdmissionControlMiddleware, RateLimitMiddleware
+from .middleware.rate_limit import RATE_LIMIT_RULES, create_backend as create_rate_limit_backend
 from .api.v1 import (
     auth,
     projects,
@@ -41,6 +47,48 @@ logging.getLogger("sqlalchemy.dialects").setLevel(logging.WARNING)
 # logging.getLogger("psycopg").setLevel(logging.WARNING)
 
 
+async def run_periodically(name: str, interval: float, job, run_at_start: bool = False) -> None:
+    """
+    每 interval 秒執行一次 job()，失敗只記錄不中斷
+
+    run_at_start=True 時啟動後先執行一次（instance 存活時間可能短於 interval 的工作）
+    """
+    if not run_at_start:
+        await asyncio.sleep(interval)
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.warning(f"⚠️ Periodic job {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def purge_expired_tokens() -> None:
+    """清除過期的 refresh / email 驗證 token（多個 instance 時由 advisory lock 確保只有一個執行）"""
+    from .services import refresh_tokens
+    
+    purged = await run_in_transaction(refresh_tokens.purge_expired)
+    if any(purged.values()):
+        logger.info(f"🧹 Purged expired tokens: {purged}")
+
+
+async def maintain_partitions() -> None:
+    """建立未來的按月分區並封存過期的分區（多個 instance 時由 advisory lock 確保只有一個執行）"""
+    from .services import partitions
+    
+    summary = await run_in_transaction(lambda conn: partitions.maintain(
+        conn, settings.PARTITION_MONTHS_AHEAD, partitions.retention_settings()
+    ))
+    if summary and any(item["created"] or item["archived"] for item in summary.values()):
+        logger.info(f"🗂️ Maintained partitions: {summary}")
+
+
+async def purge_idle_rate_limit_buckets() -> None:
+    """清除閒置的 rate limit bucket（閒置超過最長補滿時間即與不存在等價）"""
+    idle_seconds = max(rule.limit.seconds for rule in RATE_LIMIT_RULES)
+    await rate_limit_backend.purge(idle_seconds)
+
+
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -49,8 +97,38 @@ async def lifespan(app: FastAPI):
     logger.info(f"📝 Debug mode: {settings.DEBUG}")
     logger.info(f"🔗 Database: {settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else 'configured'}")
     
+    # 預先建立資料庫連線，第一個請求不需等待連線建立
+    if settings.DB_POOL_PREWARM > 0:
+        started = time.perf_counter()
+        try:
+            opened = await prewarm_pool(settings.DB_POOL_PREWARM)
+            logger.info(f"🔥 Prewarmed {opened} database connections in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to prewarm database connections: {e!r}")
+    
+    background_tasks = []
+    if settings.TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            "purge_expired_tokens", settings.TOKEN_PURGE_INTERVAL_SECONDS, purge_expired_tokens
+        )))
+    if settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS > 0:
+        # Cloud Run 等 scale-to-zero 環境的 instance 很少存活一整天，啟動時先執行一次
+        # （已有分區時只是幾個 to_regclass 檢查；多個 instance 同時啟動由 advisory lock 排除）
+        background_tasks.append(asyncio.create_task(run_periodically(
+            "maintain_partitions", settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS, maintain_partitions,
+            run_at_start=True,
+        )))
+    if settings.RATE_LIMIT_ENABLED:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            "purge_idle_rate_limit_buckets", 600, purge_idle_rate_limit_buckets
+        )))
+    
     yield
     
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    
     # 關閉資料庫連線
     logger.info("🔌 Closing database connections...")
     await close_db()
@@ -63,12 +141,41 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="200ok 接案平台後端 API - 獨立 FastAPI 後端，直連 Supabase Postgres",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson 序列化
     docs_url="/docs" if settings.DEBUG else None,  # 生產環境關閉 docs
     redoc_url="/redoc" if settings.DEBUG else None,
 )
 
 
 # ==================== Middleware ====================
+# 注意：後加入的 middleware 在外層，CORS 必須最後加入
+
+# Response 壓縮（gzip / brotli）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache_max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES,
+    )
+
+# Rate limit（在過載保護內層：過載時先直接拒絕，不再查詢額度）
+rate_limit_backend = create_rate_limit_backend(settings.RATE_LIMIT_BACKEND)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        backend=rate_limit_backend,
+        trusted_proxy_hops=settings.RATE_LIMIT_TRUSTED_PROXY_HOPS,
+    )
+
+# 過載保護（在 CORS 內層，503 回應仍帶有 CORS headers）
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
 
 # CORS
 app.add_middleware(
@@ -104,31 +211,40 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_exception_handler(request: Request, exc: PoolTimeoutError):
+    """連線池等待逾時：回應 503 讓用戶端稍後重試（而不是 500）"""
+    logger.warning(f"Database pool timeout: {request.method} {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "success": False,
+            "message": "伺服器忙碌中，請稍後再試"
+        },
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """處理一般例外"""
-    # 過濾掉常見的資料庫錯誤（PgBouncer transaction pooling 相關）
-    # 這些錯誤是預期的，不需要記錄
-    error_str = str(exc)
-    error_type = type(exc).__name__
-    
-    # 需要靜默處理的錯誤類型
-    silent_errors = [
-        "DuplicatePreparedStatement",
-        "InFailedSqlTransaction",
-        "prepared statement",
-        "current transaction is aborted",
-    ]
-    
-    # 檢查是否為需要靜默的錯誤
-    should_silence = any(
-        silent_error.lower() in error_str.lower() or silent_error in error_type
-        for silent_error in silent_errors
-    )
+    # 暫時性資料庫錯誤（連線中斷、serialization failure、PgBouncer 重設）：
+    # 可重試的請求已由 TransientRetryRoute 重試過（app/routing.py），
+    # 仍失敗或不可重試時回應 503 讓用戶端稍後重試
+    if transient_error_kind(exc) is not None:
+        logger.warning(
+            f"Transient database error: {request.method} {request.url.path}: {type(exc).__name__}: {exc}"
+        )
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "success": False,
+                "message": "資料庫暫時無法使用，請稍後再試"
+            },
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
     
-    if not should_silence:
-        # 只記錄非預期的錯誤
-        logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    logger.error(f"Unhandled exception: {exc}", exc_info=True)
     
     # 開發環境顯示詳細錯誤
     if settings.DEBUG:
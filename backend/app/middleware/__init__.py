@@ -0,0 +1,8 @@
+"""
+ASGI Middlewares
+"""
+from .compression import CompressionMiddleware
+from .admission import AdmissionControlMiddleware
+from .rate_limit import RateLimitMiddleware
+
+__all__ = ["CompressionMiddleware", "AdmissionControlMiddleware", "RateLimitMiddleware"]
@@ -0,0 +1,140 @@
+"""
+Admission Control Middleware（過載時提早拒絕請求）
+- 追蹤進行中的請求數與資料庫連線池等待狀況（app.db.pool_monitor）
+- 依路由分成優先等級，過載時先拒絕低優先的請求（管理後台、AI、圖片處理），
+  訊息與瀏覽類請求保留到最後
+- 拒絕時立即回應 503 + Retry-After，不讓請求在連線池排隊到 pool_timeout 後才變成 500
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..db import pool_monitor
+
+
+@dataclass(frozen=True)
+class PriorityClass:
+    """
+    路由優先等級
+
+    - in_flight_ratio：可使用的並發上限比例（相對於 max_in_flight）
+    - max_pool_wait：連線池平均等待超過此秒數即拒絕
+    - max_pool_waiting_ratio：等待連線的請求數超過連線池容量的此比例即拒絕
+    """
+    name: str
+    in_flight_ratio: float
+    max_pool_wait: float
+    max_pool_waiting_ratio: float
+
+
+CRITICAL = PriorityClass("critical", in_flight_ratio=float("inf"), max_pool_wait=float("inf"), max_pool_waiting_ratio=float("inf"))
+HIGH = PriorityClass("high", in_flight_ratio=1.0, max_pool_wait=2.0, max_pool_waiting_ratio=2.0)
+NORMAL = PriorityClass("normal", in_flight_ratio=0.8, max_pool_wait=0.5, max_pool_waiting_ratio=1.0)
+LOW = PriorityClass("low", in_flight_ratio=0.5, max_pool_wait=0.1, max_pool_waiting_ratio=0.0)
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """路由規則（由上而下比對，第一個符合的生效）"""
+    path: str
+    priority: PriorityClass
+    methods: Optional[frozenset] = None  # None 代表所有 method
+    prefix: bool = True  # False 代表路徑必須完全相同
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        if not self.prefix:
+            return path == self.path
+        return path == self.path or path.startswith(self.path + "/")
+
+
+ROUTE_RULES = (
+    RouteRule("/health", CRITICAL),
+    RouteRule("/", CRITICAL, prefix=False),
+    RouteRule("/api/v1/auth/refresh", CRITICAL),
+    RouteRule("/api/v1/auth/logout", CRITICAL),
+    # 管理後台、AI（建立案件時呼叫 Gemini）、圖片處理最先被拒絕
+    RouteRule("/api/v1/admin", LOW),
+    RouteRule("/api/v1/test-email", LOW),
+    RouteRule("/api/v1/avatar/upload", LOW, methods=frozenset({"POST"})),
+    RouteRule("/api/v1/projects", LOW, methods=frozenset({"POST"}), prefix=False),
+    # 訊息與瀏覽保留到最後
+    RouteRule("/api/v1/conversations", HIGH),
+    RouteRule("/api/v1/projects", HIGH, methods=frozenset({"GET", "HEAD"})),
+    RouteRule("/api/v1/users", HIGH, methods=frozenset({"GET", "HEAD"})),
+)
+
+
+def classify(method: str, path: str, rules=ROUTE_RULES) -> PriorityClass:
+    """取得請求的優先等級（沒有符合的規則時為 NORMAL）"""
+    for rule in rules:
+        if rule.matches(method, path):
+            return rule.priority
+    return NORMAL
+
+
+class AdmissionControlMiddleware:
+    """
+    依負載決定是否接受請求（pure ASGI）
+
+    使用方式:
+    ```python
+    app.add_middleware(AdmissionControlMiddleware, max_in_flight=64, retry_after=2)
+    ```
+
+    CORS middleware 必須在外層，503 回應才會帶有 CORS headers（前端才能讀到 Retry-After）
+    """
+
+    def __init__(self, app: ASGIApp, max_in_flight: int = 64, retry_after: int = 2, rules=ROUTE_RULES):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.rules = rules
+        self.in_flight = 0
+        self.rejected: dict[str, int] = {}
+
+    def rejection_reason(self, priority: PriorityClass) -> Optional[str]:
+        """回傳拒絕原因（接受時回傳 None）"""
+        if self.in_flight >= self.max_in_flight * priority.in_flight_ratio:
+            return "in_flight"
+        if pool_monitor.waiting > pool_monitor.capacity() * priority.max_pool_waiting_ratio:
+            return "pool_queue"
+        if pool_monitor.recent_wait() > priority.max_pool_wait:
+            return "pool_wait"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope["method"], scope["path"], self.rules)
+        reason = self.rejection_reason(priority)
+        if reason is not None:
+            key = f"{priority.name}:{reason}"
+            self.rejected[key] = self.rejected.get(key, 0) + 1
+            await self._reject(send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _reject(self, send: Send) -> None:
+        body = orjson.dumps({"success": False, "message": "伺服器忙碌中，請稍後再試"})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+                (b"cache-control", b"no-store"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,269 @@
+"""
+Response 壓縮 Middleware
+- 依 Accept-Encoding 協商 br / gzip（brotli 未安裝時只用 gzip）
+- 小於門檻的回應不壓縮（壓縮後反而更大，且浪費 CPU）
+- 壓縮結果以 LRU 快取，相同內容重複送出時直接重用壓縮後的 bytes
+"""
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 為選用依賴
+    brotli = None
+
+
+# 可壓縮的 Content-Type（圖片等已壓縮格式不處理）
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+@lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """
+    從 Accept-Encoding 選出要使用的編碼
+
+    支援 q 值（q=0 代表拒絕）與 `*`，同分時優先 br
+    範例:
+    - "gzip, deflate, br" -> "br"
+    - "gzip;q=1.0, br;q=0.5" -> "gzip"
+    - "identity" -> None
+    """
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressedBodyCache:
+    """
+    壓縮結果的 LRU 快取（以總 bytes 數限制大小）
+
+    key 優先使用 (編碼, 路徑, ETag)，沒有 ETag 時使用 body 的 digest
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple, value: bytes) -> None:
+        if self.max_bytes <= 0 or len(value) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._entries[key] = value
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+
+class CompressionMiddleware:
+    """
+    gzip / brotli 壓縮 Middleware（pure ASGI，不會緩衝 streaming 以外的額外資料）
+
+    使用方式:
+    ```python
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=1024,
+        gzip_level=6,
+        brotli_quality=4,
+        cache_max_bytes=8 * 1024 * 1024,
+    )
+    ```
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        cache_max_bytes: int = 8 * 1024 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = CompressedBodyCache(cache_max_bytes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder)
+
+    # ==================== 壓縮 ====================
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """一次性壓縮完整 body"""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_cached(self, body: bytes, encoding: str, path: str, etag: Optional[str]) -> bytes:
+        """壓縮完整 body，相同內容直接重用快取結果"""
+        if etag and not etag.startswith("W/"):
+            key = (encoding, path, etag)
+        else:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            self.cache.put(key, compressed)
+        return compressed
+
+    def stream_compressor(self, encoding: str):
+        """建立 streaming 用的壓縮器（回傳 (compress, flush) 函數）"""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # 31 = gzip header
+        return compressor.compress, compressor.flush
+
+
+class _CompressionResponder:
+    """攔截單一請求的 send，決定是否壓縮"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.streaming = False
+        self.compress_chunk = None
+        self.flush = None
+
+    async def __call__(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # 延後送出 headers，等看到 body 再決定
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                message["status"] < 200
+                or message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.streaming:
+            chunk = self.compress_chunk(body)
+            if not more_body:
+                chunk += self.flush()
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        if not more_body:
+            # 完整 body 一次送出（一般 JSON 回應）
+            if len(body) < self.middleware.minimum_size:
+                await self._send_start()
+                await self.send(message)
+                return
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            compressed = self.middleware.compress_cached(
+                body, self.encoding, self.scope.get("path", ""), headers.get("etag")
+            )
+            self._set_encoding_headers(headers)
+            headers["content-length"] = str(len(compressed))
+            await self._send_start()
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        # Streaming response：逐塊壓縮，無法事先得知長度
+        self.streaming = True
+        self.compress_chunk, self.flush = self.middleware.stream_compressor(self.encoding)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        self._set_encoding_headers(headers)
+        del headers["content-length"]
+        await self._send_start()
+        await self.send({"type": "http.response.body", "body": self.compress_chunk(body), "more_body": True})
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # 壓縮後的 bytes 與原始內容不同，strong ETag 需轉為 weak（與 nginx 行為一致）
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+
+    async def _send_start(self) -> None:
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
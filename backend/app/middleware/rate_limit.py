@@ -0,0 +1,265 @@
+"""
+Rate Limit Middleware（Token Bucket）
+- 依路由設定不同額度（登入 bcrypt、建立案件 Gemini、頭像 Pillow 等昂貴端點較嚴格）
+- 已登入的請求以使用者為 key，未登入以 IP 為 key
+- 兩種 backend：
+  - memory：單一 instance 內計算（預設）
+  - postgres：多個 instance 共用額度（migrations/add_rate_limit_buckets.sql）
+- 超過額度回應 429 + Retry-After；backend 發生錯誤時放行（fail open）
+
+原本只有 Next.js 層（src/middleware/ratelimit.middleware.ts）有 rate limit，
+直接呼叫 FastAPI 的流量不受限制
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import orjson
+from sqlalchemy import text
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..db import get_db_connection
+from ..security import decode_token
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== 規則 ====================
+
+@dataclass(frozen=True)
+class RateLimit:
+    """每 seconds 秒 requests 次（可一次用完，之後以固定速率補充）"""
+    requests: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        """每秒補充的額度"""
+        return self.requests / self.seconds
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    路由額度（由上而下比對，第一個符合的生效）
+
+    key 為 "user"（已登入時以使用者計算，未登入以 IP）或 "ip"（一律以 IP 計算）
+    """
+    name: str
+    path: str
+    limit: RateLimit
+    methods: Optional[frozenset] = None  # None 代表所有 method
+    prefix: bool = True  # False 代表路徑必須完全相同
+    key: str = "user"
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        if not self.prefix:
+            return path == self.path
+        return path == self.path or path.startswith(self.path + "/")
+
+
+_POST = frozenset({"POST"})
+
+RATE_LIMIT_RULES = (
+    # 登入 / 註冊：bcrypt 雜湊，未登入，以 IP 計算
+    RateLimitRule("login", "/api/v1/auth/login", RateLimit(10, 60), methods=_POST, key="ip"),
+    RateLimitRule("register", "/api/v1/auth/register", RateLimit(5, 600), methods=_POST, key="ip"),
+    RateLimitRule("google", "/api/v1/auth/google", RateLimit(20, 60), methods=_POST, key="ip"),
+    RateLimitRule("refresh", "/api/v1/auth/refresh", RateLimit(30, 60), methods=_POST, key="ip"),
+    # 建立案件：呼叫 Gemini 產生標題與摘要
+    RateLimitRule("create_project", "/api/v1/projects", RateLimit(10, 600), methods=_POST, prefix=False),
+    # 頭像上傳：Pillow 解碼與縮圖
+    RateLimitRule("upload_avatar", "/api/v1/avatar/upload", RateLimit(10, 600), methods=_POST),
+    RateLimitRule("test_email", "/api/v1/test-email", RateLimit(5, 600)),
+    # 其他 API
+    RateLimitRule("api", "/api/v1", RateLimit(300, 60)),
+)
+
+
+def match_rule(method: str, path: str, rules=RATE_LIMIT_RULES) -> Optional[RateLimitRule]:
+    """取得請求適用的規則（不在任何規則內時回傳 None）"""
+    for rule in rules:
+        if rule.matches(method, path):
+            return rule
+    return None
+
+
+# ==================== Backend ====================
+
+class MemoryRateLimitBackend:
+    """
+    單一 instance 內的 token bucket
+
+    以 LRU 限制 bucket 數量；被淘汰的 bucket 下次會以滿額重新開始
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """取用一個額度，回傳 0（允許）或需等待的秒數"""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(limit.requests), now))
+        tokens = min(float(limit.requests), tokens + (now - updated_at) * limit.rate)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            wait = (1 - tokens) / limit.rate
+
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def purge(self, idle_seconds: float) -> int:
+        """清除閒置超過 idle_seconds 的 bucket（已補滿，與不存在等價）"""
+        cutoff = time.monotonic() - idle_seconds
+        stale = [key for key, (_, updated_at) in self._buckets.items() if updated_at < cutoff]
+        for key in stale:
+            del self._buckets[key]
+        return len(stale)
+
+
+class PostgresRateLimitBackend:
+    """多個 instance 共用的 token bucket（rate_limit_acquire() 一次 round trip）"""
+
+    _ACQUIRE_SQL = text("""
+        SELECT rate_limit_acquire(
+            :key,
+            CAST(:capacity AS double precision),
+            CAST(:rate AS double precision)
+        )
+    """)
+
+    _PURGE_SQL = text("""
+        DELETE FROM rate_limit_buckets
+        WHERE updated_at < NOW() - make_interval(secs => CAST(:idle AS double precision))
+    """)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """取用一個額度，回傳 0（允許）或需等待的秒數"""
+        async with get_db_connection() as conn:
+            result = await conn.execute(self._ACQUIRE_SQL, {
+                'key': key,
+                'capacity': limit.requests,
+                'rate': limit.rate,
+            })
+            return float(result.scalar())
+
+    async def purge(self, idle_seconds: float) -> int:
+        """清除閒置超過 idle_seconds 的 bucket"""
+        async with get_db_connection() as conn:
+            result = await conn.execute(self._PURGE_SQL, {'idle': idle_seconds})
+            return result.rowcount
+
+
+def create_backend(name: str):
+    """依名稱建立 backend（memory / postgres）"""
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    if name == "postgres":
+        return PostgresRateLimitBackend()
+    raise ValueError(f"不支援的 RATE_LIMIT_BACKEND: {name}（可用: memory, postgres）")
+
+
+# ==================== Middleware ====================
+
+def client_ip(scope: Scope, headers: Headers, trusted_proxy_hops: int) -> str:
+    """
+    取得用戶端 IP
+
+    trusted_proxy_hops > 0 時取 X-Forwarded-For 由右數第 N 個位址
+    （左側的值可由用戶端任意偽造，只有受信任的 proxy 附加的位址可信）
+    """
+    if trusted_proxy_hops > 0:
+        forwarded = [ip.strip() for ip in headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(trusted_proxy_hops, len(forwarded))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def user_id_from_headers(headers: Headers) -> Optional[str]:
+    """由 Bearer token 取得使用者 ID（驗證結果有快取，不查詢資料庫）"""
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token).get("userId")
+    except Exception:
+        return None
+
+
+class RateLimitMiddleware:
+    """
+    Token bucket rate limit（pure ASGI）
+
+    使用方式:
+    ```python
+    app.add_middleware(RateLimitMiddleware, backend=create_backend("memory"), trusted_proxy_hops=1)
+    ```
+    """
+
+    def __init__(self, app: ASGIApp, backend, trusted_proxy_hops: int = 1, rules=RATE_LIMIT_RULES):
+        self.app = app
+        self.backend = backend
+        self.trusted_proxy_hops = trusted_proxy_hops
+        self.rules = rules
+        self.rejected: dict[str, int] = {}
+
+    def bucket_key(self, rule: RateLimitRule, scope: Scope) -> str:
+        headers = Headers(scope=scope)
+        if rule.key == "user":
+            user_id = user_id_from_headers(headers)
+            if user_id:
+                return f"{rule.name}:user:{user_id}"
+        return f"{rule.name}:ip:{client_ip(scope, headers, self.trusted_proxy_hops)}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rule = match_rule(scope["method"], scope["path"], self.rules)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            wait = await self.backend.acquire(self.bucket_key(rule, scope), rule.limit)
+        except Exception as e:
+            logger.warning(f"⚠️ Rate limit backend error (allowing request): {e!r}")
+            wait = 0.0
+
+        if wait > 0:
+            self.rejected[rule.name] = self.rejected.get(rule.name, 0) + 1
+            await self._reject(send, math.ceil(wait))
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send: Send, retry_after: int) -> None:
+        body = orjson.dumps({"success": False, "message": f"請求過於頻繁，請在 {retry_after} 秒後再試"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+                (b"cache-control", b"no-store"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
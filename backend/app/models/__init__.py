@@ -1,15 +1,48 @@
 """
 SQLAlchemy Models
 對應 Supabase 資料庫 schema
+
+API 只使用 Raw SQL，這些 ORM model 僅供參考與取用 Enum；
+套件內容改為第一次存取時才匯入（`from app.models.user import UserRole` 只會載入 user.py），
+避免啟動時建立所有 declarative class
 """
-from .user import User, UserRole, RefreshToken, EmailVerificationToken
-from .project import Project, ProjectStatus, ProjectMode, SavedProject
-from .bid import Bid, BidStatus
-from .conversation import Conversation, ConversationType, Message, UserConnection, ConnectionStatus
-from .token import UserToken, TokenTransaction, TransactionType
-from .review import Review
-from .payment import Payment, PaymentStatus
-from .notification import Notification, NotificationType
+import importlib
+
+_EXPORTS = {
+    "User": "user",
+    "UserRole": "user",
+    "RefreshToken": "user",
+    "EmailVerificationToken": "user",
+    "Project": "project",
+    "ProjectStatus": "project",
+    "ProjectMode": "project",
+    "SavedProject": "project",
+    "Bid": "bid",
+    "BidStatus": "bid",
+    "Conversation": "conversation",
+    "ConversationType": "conversation",
+    "Message": "conversation",
+    "UserConnection": "conversation",
+    "ConnectionStatus": "conversation",
+    "UserToken": "token",
+    "TokenTransaction": "token",
+    "TransactionType": "token",
+    "Review": "review",
+    "Payment": "payment",
+    "PaymentStatus": "payment",
+    "Notification": "notification",
+    "NotificationType": "notification",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     # User models
@@ -1,7 +1,7 @@
 """
 Conversation and Message models
 """
-from sqlalchemy import Column, String, Boolean, ARRAY, TIMESTAMP, ForeignKey, Text, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, Integer, ARRAY, TIMESTAMP, ForeignKey, Text, CheckConstraint, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -42,8 +42,18 @@ class Conversation(Base):
     initiator_unlocked_at = Column(TIMESTAMP(timezone=True), nullable=True)
     recipient_unlocked_at = Column(TIMESTAMP(timezone=True), nullable=True)
     
+    # 已讀位置與未讀數（見 app/services/conversation_reads.py）
+    initiator_last_read_message_id = Column(UUID(as_uuid=True), nullable=True)
+    initiator_last_read_at = Column(TIMESTAMP, nullable=True)
+    initiator_unread_count = Column(Integer, nullable=False, default=0)
+    recipient_last_read_message_id = Column(UUID(as_uuid=True), nullable=True)
+    recipient_last_read_at = Column(TIMESTAMP, nullable=True)
+    recipient_unread_count = Column(Integer, nullable=False, default=0)
+    
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    # 對話列表項目最後變動時間（GET /conversations/sync 增量同步）
+    changed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     
     # Relationships
     initiator = relationship("User", foreign_keys=[initiator_id])
@@ -71,9 +81,10 @@ class Message(Base):
     
     content = Column(Text, nullable=False)
     attachment_urls = Column(ARRAY(Text), nullable=True)
-    is_read = Column(Boolean, default=False)
+    is_read = Column(Boolean, default=False)  # 已不再更新，已讀狀態由 conversations 的 watermark 推導
     
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
+    # 按月分區的分區欄位（資料庫主鍵為 (id, created_at)，見 migrations/partition_append_only_tables.sql）
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), index=True)
     
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
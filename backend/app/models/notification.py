@@ -36,7 +36,8 @@ class Notification(Base):
     related_bid_id = Column(UUID(as_uuid=True), ForeignKey("bids.id", ondelete="CASCADE"), nullable=True)
     
     is_read = Column(Boolean, default=False, index=True)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
+    # 按月分區的分區欄位（資料庫主鍵為 (id, created_at)，見 migrations/partition_append_only_tables.sql）
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), index=True)
     
     # Relationships
     user = relationship("User")
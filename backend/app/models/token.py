@@ -60,7 +60,8 @@ class TokenTransaction(Base):
     reference_id = Column(UUID(as_uuid=True), nullable=True)  # 關聯 ID（對話、提案等）
     description = Column(Text, nullable=True)
     
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
+    # 按月分區的分區欄位（資料庫主鍵為 (id, created_at)，見 migrations/partition_append_only_tables.sql）
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), index=True)
     
     # Relationships
     user = relationship("User")
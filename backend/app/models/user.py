@@ -1,7 +1,7 @@
 """
 User related models
 """
-from sqlalchemy import Column, String, Boolean, ARRAY, Numeric, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, ARRAY, Numeric, TIMESTAMP, ForeignKey, Text, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -63,8 +63,8 @@ class RefreshToken(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    token = Column(String(500), unique=True, nullable=False, index=True)
-    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    token_hash = Column(LargeBinary(32), unique=True, nullable=False)  # SHA-256(token)，不保存原文
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     
     # Relationships
@@ -0,0 +1,463 @@
+"""
+具名 SQL 查詢 registry
+
+原本 router 每個請求以 f-string 組 SQL（list_projects 還把狀態值直接寫進 SQL），
+語句文字隨條件變動：Postgres 無法重用 prepared statement，
+engine 也關閉了 SQLAlchemy 的 compiled_cache
+
+這裡集中定義完全參數化、文字固定的查詢：
+- 選填條件以 `CAST(:x AS ...) IS NULL OR ...` 表示，多值以 `= ANY(:values)` 表示
+- 無法參數化的部分（ORDER BY 欄位與方向）以各自具名的變體註冊
+- 每個查詢只編譯一次（registry 專用的 compiled cache）
+- 依查詢名稱累計次數、錯誤數與耗時（GET /api/v1/admin/query-stats）
+- 設定 DB_PREPARE_THRESHOLD 後（直連資料庫、不經 PgBouncer transaction pooling），
+  psycopg 會將同一連線上重複執行的語句 prepare 成 server-side prepared statement
+
+使用方式:
+```python
+from ... import queries
+
+result = await queries.execute(db, queries.SAVED_PROJECTS_COUNT, {'user_id': str(current_user.id)})
+total = result.scalar() or 0
+```
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+# ==================== Registry ====================
+
+@dataclass
+class QueryStats:
+    """單一具名查詢的執行統計"""
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "mean_ms": round(self.total_seconds * 1000 / self.calls, 3) if self.calls else None,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+@dataclass(frozen=True)
+class NamedQuery:
+    """已註冊的查詢（statement 在註冊時建立一次）"""
+    name: str
+    sql: str
+    statement: TextClause = field(repr=False, compare=False)
+    stats: QueryStats = field(default_factory=QueryStats, repr=False, compare=False)
+
+
+_registry: dict[str, NamedQuery] = {}
+
+# registry 專用的 SQLAlchemy compiled cache
+# engine 層級的 compiled_cache 維持關閉（仍有以 f-string 組成的臨時 SQL），
+# 這裡的語句數量固定，不會無限成長
+_compiled_cache: dict = {}
+_EXECUTION_OPTIONS = {"compiled_cache": _compiled_cache}
+
+
+def register(name: str, sql: str) -> NamedQuery:
+    """註冊具名查詢（名稱重複視為程式錯誤）"""
+    if name in _registry:
+        raise ValueError(f"查詢名稱重複: {name}")
+    query = NamedQuery(name=name, sql=sql, statement=text(sql))
+    _registry[name] = query
+    return query
+
+
+def get(name: str) -> NamedQuery:
+    """依名稱取得已註冊的查詢"""
+    try:
+        return _registry[name]
+    except KeyError:
+        raise KeyError(f"未註冊的查詢: {name}") from None
+
+
+def all_queries() -> list[NamedQuery]:
+    """所有已註冊的查詢（依名稱排序）"""
+    return sorted(_registry.values(), key=lambda query: query.name)
+
+
+async def execute(db, query: Union[NamedQuery, str], params: Optional[dict] = None):
+    """執行具名查詢並累計統計（回傳 SQLAlchemy Result）"""
+    if isinstance(query, str):
+        query = get(query)
+
+    started = time.perf_counter()
+    try:
+        return await db.execute(query.statement, params or {}, execution_options=_EXECUTION_OPTIONS)
+    except Exception:
+        query.stats.errors += 1
+        raise
+    finally:
+        query.stats.record(time.perf_counter() - started)
+
+
+def stats_snapshot() -> list[dict]:
+    """各查詢的統計（依累計耗時由高至低，未執行過的不列出）"""
+    queries = [query for query in _registry.values() if query.stats.calls]
+    queries.sort(key=lambda query: query.stats.total_seconds, reverse=True)
+    return [{"name": query.name, **query.stats.as_dict()} for query in queries]
+
+
+# ==================== Projects ====================
+#
+# :statuses 為 None 代表不限狀態（僅管理員），空 list 代表沒有可見的狀態
+# :user_id 為 None 時（未登入）saved_projects 不會有符合的列，is_saved 皆為 FALSE
+
+_PROJECT_LIST_WHERE = """
+    (CAST(:statuses AS project_status[]) IS NULL
+        OR p.status = ANY(CAST(:statuses AS project_status[])))
+    AND (CAST(:project_mode AS project_mode) IS NULL
+        OR p.project_mode = CAST(:project_mode AS project_mode))
+    AND (CAST(:skills AS text[]) IS NULL
+        OR p.required_skills && CAST(:skills AS text[]))
+    AND (CAST(:budget_min AS numeric) IS NULL
+        OR p.budget_max >= CAST(:budget_min AS numeric))
+    AND (CAST(:budget_max AS numeric) IS NULL
+        OR p.budget_min <= CAST(:budget_max AS numeric))
+    AND (CAST(:project_type AS text) IS NULL
+        OR p.project_type = CAST(:project_type AS text))
+    AND (CAST(:keyword AS text) IS NULL
+        OR p.title ILIKE CAST(:keyword AS text)
+        OR p.description ILIKE CAST(:keyword AS text)
+        OR p.ai_summary ILIKE CAST(:keyword AS text))
+"""
+
+PROJECT_LIST_COUNT = register("projects.list.count", f"""
+    SELECT COUNT(*)
+    FROM projects p
+    WHERE {_PROJECT_LIST_WHERE}
+""")
+
+# 排序鍵 → 欄位
+PROJECT_LIST_ORDER_COLUMNS = {
+    'budget': 'p.budget_max',
+    'deadline': 'p.deadline',
+    'created_at': 'p.created_at',
+}
+
+_PROJECT_LIST_SQL = """
+    SELECT
+        p.id,
+        p.client_id,
+        p.title,
+        p.description,
+        p.ai_summary,
+        p.project_mode,
+        p.project_type,
+        p.budget_min,
+        p.budget_max,
+        p.status,
+        p.required_skills,
+        p.created_at,
+        p.updated_at,
+        u.id as client_user_id,
+        u.name as client_name,
+        u.avatar_url as client_avatar_url,
+        u.rating as client_rating,
+        COALESCE(bc.bids_count, 0) as bids_count,
+        (sp.project_id IS NOT NULL) as is_saved
+    FROM projects p
+    LEFT JOIN users u ON u.id = p.client_id
+    LEFT JOIN (
+        SELECT project_id, COUNT(*) as bids_count
+        FROM bids
+        GROUP BY project_id
+    ) bc ON bc.project_id = p.id
+    LEFT JOIN saved_projects sp
+        ON sp.project_id = p.id AND sp.user_id = CAST(:user_id AS uuid)
+    WHERE {where}
+    ORDER BY {order_column} {order_direction}
+    LIMIT :limit OFFSET :offset
+"""
+
+# (排序鍵, 'ASC' / 'DESC') → 查詢
+PROJECT_LIST = {
+    (sort_by, direction): register(
+        f"projects.list.{sort_by}_{direction.lower()}",
+        _PROJECT_LIST_SQL.format(
+            where=_PROJECT_LIST_WHERE,
+            order_column=column,
+            order_direction=direction,
+        ),
+    )
+    for sort_by, column in PROJECT_LIST_ORDER_COLUMNS.items()
+    for direction in ('ASC', 'DESC')
+}
+
+
+# ==================== Saved Projects ====================
+
+SAVED_PROJECTS_COUNT = register("saved_projects.list.count", """
+    SELECT COUNT(*)
+    FROM saved_projects
+    WHERE user_id = CAST(:user_id AS uuid)
+""")
+
+SAVED_PROJECTS_LIST = register("saved_projects.list", """
+    SELECT
+        p.id,
+        p.title,
+        p.description,
+        p.budget_min,
+        p.budget_max,
+        p.status,
+        p.created_at,
+        sp.created_at as saved_at,
+        u.id as client_id,
+        u.name as client_name,
+        u.avatar_url as client_avatar_url
+    FROM saved_projects sp
+    INNER JOIN projects p ON p.id = sp.project_id
+    LEFT JOIN users u ON u.id = p.client_id
+    WHERE sp.user_id = CAST(:user_id AS uuid)
+    ORDER BY sp.created_at DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+
+# ==================== Bids ====================
+#
+# :status_filter 為 None 代表不限狀態
+
+MY_BIDS_COUNT = register("bids.mine.count", """
+    SELECT COUNT(*)
+    FROM bids b
+    WHERE b.freelancer_id = CAST(:user_id AS uuid)
+      AND (CAST(:status_filter AS bid_status) IS NULL
+          OR b.status = CAST(:status_filter AS bid_status))
+""")
+
+MY_BIDS_LIST = register("bids.mine", """
+    SELECT
+        b.id,
+        b.project_id,
+        b.proposal,
+        b.bid_amount,
+        b.estimated_days,
+        b.status,
+        b.created_at,
+        p.id as project_id_full,
+        p.title as project_title,
+        p.status as project_status,
+        p.budget_min,
+        p.budget_max,
+        u.id as client_id,
+        u.name as client_name,
+        u.avatar_url as client_avatar_url,
+        u.rating as client_rating
+    FROM bids b
+    INNER JOIN projects p ON p.id = b.project_id
+    LEFT JOIN users u ON u.id = p.client_id
+    WHERE b.freelancer_id = CAST(:user_id AS uuid)
+      AND (CAST(:status_filter AS bid_status) IS NULL
+          OR b.status = CAST(:status_filter AS bid_status))
+    ORDER BY b.created_at DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+PROJECT_BIDS_LIST = register("bids.by_project", """
+    SELECT
+        b.id,
+        b.proposal,
+        b.bid_amount,
+        b.estimated_days,
+        b.status,
+        b.created_at,
+        u.id as freelancer_id,
+        u.name as freelancer_name,
+        u.avatar_url as freelancer_avatar_url,
+        u.rating as freelancer_rating,
+        u.skills as freelancer_skills,
+        u.bio as freelancer_bio,
+        u.portfolio_links as freelancer_portfolio_links
+    FROM bids b
+    LEFT JOIN users u ON u.id = b.freelancer_id
+    WHERE b.project_id = CAST(:project_id AS uuid)
+    ORDER BY b.created_at DESC
+""")
+
+
+# ==================== Conversations ====================
+
+_CONVERSATION_SELECT = """
+    SELECT
+        c.id,
+        c.type,
+        c.project_id,
+        c.is_unlocked,
+        c.initiator_id,
+        c.recipient_id,
+        c.created_at,
+        c.updated_at,
+        c.changed_at,
+        i.id as initiator_id_full,
+        i.name as initiator_name,
+        i.avatar_url as initiator_avatar_url,
+        r.id as recipient_id_full,
+        r.name as recipient_name,
+        r.avatar_url as recipient_avatar_url,
+        p.id as project_id_full,
+        p.title as project_title,
+        last_msg.content as last_message_content,
+        last_msg.created_at as last_message_created_at,
+        CASE WHEN c.initiator_id = CAST(:user_id AS uuid)
+            THEN c.initiator_unread_count
+            ELSE c.recipient_unread_count
+        END as unread_count,
+        uc.initiator_unlocked_at,
+        uc.recipient_unlocked_at,
+        uc.expires_at
+    FROM conversations c
+    LEFT JOIN users i ON i.id = c.initiator_id
+    LEFT JOIN users r ON r.id = c.recipient_id
+    LEFT JOIN projects p ON p.id = c.project_id
+    LEFT JOIN user_connections uc ON uc.conversation_id = c.id
+    LEFT JOIN LATERAL (
+        SELECT content, created_at
+        FROM messages
+        WHERE conversation_id = c.id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    ) last_msg ON TRUE
+"""
+
+_CONVERSATION_PARTICIPANT = """
+    WHERE (c.initiator_id = CAST(:user_id AS uuid) OR c.recipient_id = CAST(:user_id AS uuid))
+"""
+
+CONVERSATION_LIST = register("conversations.list", _CONVERSATION_SELECT + _CONVERSATION_PARTICIPANT + """
+    ORDER BY c.updated_at DESC
+""")
+
+# 同步用（GET /conversations/sync）
+# 完整列表：依最後活動時間由新到舊，以 (updated_at, id) keyset 分頁
+CONVERSATION_PAGE = register("conversations.page", _CONVERSATION_SELECT + _CONVERSATION_PARTICIPANT + """
+      AND (CAST(:cursor_at AS timestamp) IS NULL
+          OR (c.updated_at, c.id) < (CAST(:cursor_at AS timestamp), CAST(:cursor_id AS uuid)))
+    ORDER BY c.updated_at DESC, c.id DESC
+    LIMIT :limit
+""")
+
+# 增量：:since 之後有變動的對話，依 changed_at 由舊到新，以 (changed_at, id) keyset 分頁
+CONVERSATION_CHANGES = register("conversations.changes", _CONVERSATION_SELECT + _CONVERSATION_PARTICIPANT + """
+      AND c.changed_at > CAST(:since AS timestamp)
+      AND (CAST(:cursor_at AS timestamp) IS NULL
+          OR (c.changed_at, c.id) > (CAST(:cursor_at AS timestamp), CAST(:cursor_id AS uuid)))
+    ORDER BY c.changed_at ASC, c.id ASC
+    LIMIT :limit
+""")
+
+# 增量：:since 之後被刪除的對話（alembic 0003 的 conversation_tombstones）
+CONVERSATION_REMOVED = register("conversations.removed", """
+    SELECT conversation_id
+    FROM conversation_tombstones
+    WHERE user_id = CAST(:user_id AS uuid)
+      AND deleted_at > CAST(:since AS timestamp)
+    ORDER BY deleted_at, conversation_id
+""")
+
+# 同步時間點（資料庫時鐘，與 changed_at 的 NOW() 一致）
+SYNC_CLOCK = register("conversations.sync_clock", """
+    SELECT LOCALTIMESTAMP
+""")
+
+
+# ==================== Messages ====================
+#
+# 以 (created_at, id) 作為 cursor（migrations/add_messages_cursor_index.sql）
+# 已讀狀態由 conversations 上的 watermark 推導（app/services/conversation_reads.py）
+# :anchor_id 為 None 時 anchor_created_at 也是 None，只做權限檢查
+
+MESSAGES_CONVERSATION = register("messages.conversation", """
+    SELECT
+        c.id,
+        c.initiator_id,
+        c.recipient_id,
+        c.is_unlocked,
+        a.created_at as anchor_created_at
+    FROM conversations c
+    LEFT JOIN messages a
+        ON a.id = CAST(:anchor_id AS uuid) AND a.conversation_id = c.id
+    WHERE c.id = CAST(:conversation_id AS uuid)
+""")
+
+_MESSAGES_SELECT = """
+    SELECT
+        m.id,
+        m.conversation_id,
+        m.sender_id,
+        m.content,
+        -- 已讀：訊息不晚於另一位參與者的 watermark
+        COALESCE(CASE WHEN m.sender_id = c.initiator_id
+            THEN (m.created_at, m.id) <= (c.recipient_last_read_at, c.recipient_last_read_message_id)
+            ELSE (m.created_at, m.id) <= (c.initiator_last_read_at, c.initiator_last_read_message_id)
+        END, FALSE) as is_read,
+        m.created_at,
+        u.id as sender_user_id,
+        u.name as sender_name,
+        u.avatar_url as sender_avatar_url
+    FROM messages m
+    JOIN conversations c ON c.id = m.conversation_id
+    LEFT JOIN users u ON u.id = m.sender_id
+    WHERE m.conversation_id = CAST(:conversation_id AS uuid)
+"""
+
+# 由最舊的訊息開始（offset 分頁，保留給舊版前端）
+MESSAGES_PAGE = register("messages.page", _MESSAGES_SELECT + """
+    ORDER BY m.created_at ASC, m.id ASC
+    LIMIT :limit OFFSET :offset
+""")
+
+# 最新的一頁（由新到舊取出，router 再反轉為時間順序）
+MESSAGES_LATEST = register("messages.latest", _MESSAGES_SELECT + """
+    ORDER BY m.created_at DESC, m.id DESC
+    LIMIT :limit
+""")
+
+# 比 anchor 舊的一頁（往上捲動載入，由新到舊取出）
+MESSAGES_BEFORE = register("messages.before", _MESSAGES_SELECT + """
+      AND (m.created_at, m.id) < (CAST(:anchor_created_at AS timestamp), CAST(:anchor_id AS uuid))
+    ORDER BY m.created_at DESC, m.id DESC
+    LIMIT :limit
+""")
+
+# 比 anchor 新的訊息（增量更新）
+# 訊息在對話的 row lock 下以 clock_timestamp() 寫入，不會有 created_at 落在 anchor 之前的較晚 commit
+MESSAGES_AFTER = register("messages.after", _MESSAGES_SELECT + """
+      AND (m.created_at, m.id) > (CAST(:anchor_created_at AS timestamp), CAST(:anchor_id AS uuid))
+    ORDER BY m.created_at ASC, m.id ASC
+    LIMIT :limit
+""")
+
+
+# ==================== Unread ====================
+
+UNREAD_COUNT = register("messages.unread_count", """
+    SELECT COALESCE(SUM(
+        CASE WHEN initiator_id = CAST(:user_id AS uuid)
+            THEN initiator_unread_count
+            ELSE recipient_unread_count
+        END
+    ), 0)
+    FROM conversations
+    WHERE initiator_id = CAST(:user_id AS uuid) OR recipient_id = CAST(:user_id AS uuid)
+""")
@@ -0,0 +1,75 @@
+"""
+JSON Response 相關
+- 以 orjson 序列化，取代 stdlib json
+- 列表類端點可直接回傳 success_response()，略過 response_model 的二次驗證
+"""
+from decimal import Decimal
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+# 禁用快取（對話、訊息等需要即時更新的端點）
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+
+def _default(obj: Any) -> Any:
+    """
+    orjson 不支援的型別
+
+    Decimal 與 FastAPI 的 jsonable_encoder 行為一致：
+    整數值輸出 int，其餘輸出 float
+    """
+    if isinstance(obj, Decimal):
+        if obj.as_tuple().exponent >= 0:
+            return int(obj)
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    序列化為 JSON bytes
+
+    datetime / UUID / dataclass 由 orjson 原生處理；
+    naive datetime 輸出格式與原本相同（不帶時區）
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """以 orjson 序列化的 JSONResponse（作為 app 的 default_response_class）"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def success_response(
+    data: Any,
+    message: Optional[str] = None,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> ORJSONResponse:
+    """
+    直接回傳成功回應（格式與 SuccessResponse 相同）
+
+    回傳 Response 物件時 FastAPI 不會再經過 response_model 驗證與 jsonable_encoder，
+    適合大量資料的列表端點；data 內的值必須已是可序列化的型別。
+
+    注意：直接回傳 Response 時，注入的 `response: Response` 上設定的 headers 不會生效，
+    必須透過 headers 參數傳入。
+    """
+    return ORJSONResponse(
+        content={"success": True, "data": data, "message": message},
+        status_code=status_code,
+        headers=headers,
+    )
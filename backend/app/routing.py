@@ -0,0 +1,60 @@
+"""
+路由層的暫時性資料庫錯誤重試
+
+get_db 的交易包住整個端點（FastAPI 在端點回傳後 commit），
+連線中斷、serialization failure、PgBouncer 重設等錯誤發生時交易已回滾，
+原本直接回應 500，用戶端只能自行重試整個請求
+
+TransientRetryRoute 在回應送出前攔截這些錯誤，重新執行整個端點（重新解析 dependencies，
+取得新的連線與交易），以 DB_TRANSIENT_RETRIES / DB_RETRY_BACKOFF_SECONDS 限制次數與退避：
+- GET / HEAD / OPTIONS：所有暫時性錯誤都重試
+- 其他方法：預設不重試；以 @retry_transient 標記的端點只在交易確定回滾時重試
+  （連線中斷可能發生在 COMMIT 之後，寫入可能已生效）
+
+錯誤分類與重試次數統計見 app/db.py（run_with_retry / retry_stats）
+
+使用方式:
+```python
+router = APIRouter(prefix="/conversations", tags=["conversations"], route_class=TransientRetryRoute)
+
+@router.post("/{conversation_id}/mark-read")
+@retry_transient
+async def mark_conversation_as_read(...):
+    ...
+```
+"""
+from typing import Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from .db import run_with_retry
+
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def retry_transient(endpoint: Callable) -> Callable:
+    """
+    標記寫入端點可在交易確定回滾時整個重新執行
+
+    只能用於所有副作用都在資料庫交易內的端點（不可寄信、呼叫外部 API、上傳檔案）
+    """
+    endpoint.__retry_transient__ = True
+    return endpoint
+
+
+class TransientRetryRoute(APIRoute):
+    """暫時性資料庫錯誤時重新執行整個端點的 APIRoute"""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+        idempotent = bool(self.methods) and self.methods <= SAFE_METHODS
+        if not idempotent and not getattr(self.endpoint, "__retry_transient__", False):
+            return handler
+
+        async def retrying_handler(request: Request) -> Response:
+            # request body 在第一次讀取後已快取，重新執行時不需要再次接收
+            return await run_with_retry(lambda: handler(request), idempotent=idempotent)
+
+        return retrying_handler
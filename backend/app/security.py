@@ -1,13 +1,17 @@
 """
 認證與安全相關功能
-- JWT 生成與驗證
+- JWT 生成與驗證（python-jose / pyjwt，已驗證的 token 快取到 exp 為止）
 - 密碼雜湊
 - 權限檢查
 """
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Optional, List
+from uuid import uuid4
 from passlib.context import CryptContext
-from jose import JWTError, jwt
 from fastapi import HTTPException, status
 from .config import settings
 from .models.user import UserRole
@@ -38,6 +42,124 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# ==================== JWT 實作 ====================
+#
+# JWT_BACKEND=jose（預設，python-jose）或 pyjwt（較快，簽章格式相同，可直接切換）
+
+class _JoseBackend:
+    name = "jose"
+
+    def __init__(self):
+        from jose import ExpiredSignatureError, JWTError, jwt
+        self._jwt = jwt
+        self.expired_error = ExpiredSignatureError
+        self.invalid_error = JWTError
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+    def decode(self, token: str) -> dict:
+        return self._jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=[settings.JWT_ALGORITHM],
+            issuer="200ok"
+        )
+
+
+class _PyJWTBackend:
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+        self._jwt = jwt
+        self.expired_error = jwt.ExpiredSignatureError
+        self.invalid_error = jwt.InvalidTokenError
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+    def decode(self, token: str) -> dict:
+        return self._jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=[settings.JWT_ALGORITHM],
+            issuer="200ok"
+        )
+
+
+_JWT_BACKENDS = {
+    "jose": _JoseBackend,
+    "pyjwt": _PyJWTBackend,
+}
+
+
+def get_jwt_backend(name: str):
+    """依名稱建立 JWT 實作（jose / pyjwt）"""
+    try:
+        return _JWT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"不支援的 JWT_BACKEND: {name}（可用: {', '.join(_JWT_BACKENDS)}）")
+
+
+@lru_cache(maxsize=None)
+def _jwt_backend():
+    """目前設定的 JWT 實作（第一次簽發 / 驗證時才匯入，縮短冷啟動時間）"""
+    return get_jwt_backend(settings.JWT_BACKEND)
+
+
+# ==================== 已驗證 Token 快取 ====================
+
+class VerifiedTokenCache:
+    """
+    已驗證 JWT 的 LRU 快取（token digest -> claims）
+
+    同一個 access token 會在有效期間內被重複使用，驗證結果只取決於 token 本身，
+    因此快取到 exp 為止，期間不再重做 HMAC 驗證與 claims 解析；
+    過期後移除並重新驗證（由 JWT 實作回報「Token 已過期」）。
+    只快取驗證成功的結果，key 使用 digest 避免在記憶體中保存 token 原文。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, key: bytes, claims: dict) -> None:
+        exp = claims.get("exp")
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            return
+        self._entries[key] = (float(exp), claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(settings.JWT_DECODE_CACHE_SIZE)
+
+
 # ==================== JWT 處理 ====================
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -54,11 +176,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         "iss": "200ok"
     })
 
-    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return _jwt_backend().encode(to_encode)
 
 
 def create_refresh_token(data: dict) -> str:
-    """生成 Refresh Token"""
+    """
+    生成 Refresh Token
+
+    資料庫以 token 雜湊作為 UNIQUE key，加入 jti 避免同一秒內簽發的 token 完全相同
+    """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
 
@@ -66,34 +192,48 @@ def create_refresh_token(data: dict) -> str:
         "exp": expire,
         "iat": datetime.utcnow(),
         "iss": "200ok",
-        "type": "refresh"
+        "type": "refresh",
+        "jti": uuid4().hex
     })
 
-    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return _jwt_backend().encode(to_encode)
+
 
+def decode_token(token: str, use_cache: bool = True) -> dict:
+    """
+    解碼並驗證 JWT
 
-def decode_token(token: str) -> dict:
-    """解碼並驗證 JWT"""
+    use_cache=True 時驗證結果快取到 exp 為止（refresh token 只使用一次，不需快取）；
+    回傳的 dict 為副本，呼叫端修改不會影響快取
+    """
+    key = None
+    if use_cache:
+        key = token_cache.key(token)
+        claims = token_cache.get(key)
+        if claims is not None:
+            return dict(claims)
+
+    backend = _jwt_backend()
     try:
-        return jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-            issuer="200ok"
-        )
-    except jwt.ExpiredSignatureError:
+        claims = backend.decode(token)
+    except backend.expired_error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token 已過期",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except JWTError:
+    except backend.invalid_error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="無效的 Token",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if key is not None:
+        token_cache.put(key, claims)
+        return dict(claims)
+    return claims
+
 
 # ==================== 權限檢查 ====================
 
@@ -0,0 +1,44 @@
+"""
+資料列 → 回應 dict 的共用轉換
+
+列表端點逐列手寫 dict（各 router 的 _xxx_item(row) 函數），
+這裡集中重複出現的欄位轉換，結果直接交給 orjson（success_response / dumps）輸出
+
+與原本的寫法一致：以真值判斷，0 / 空字串與 None 同樣視為無值
+
+使用方式:
+```python
+def _bid_item(row) -> dict:
+    return {
+        "id": str(row.id),
+        "bid_amount": float_or_none(row.bid_amount),
+        "freelancer": {
+            "id": str(row.freelancer_id),
+            "name": row.freelancer_name,
+        } if row.freelancer_id else None,
+    }
+
+bids_data = [_bid_item(row) for row in result.fetchall()]
+```
+"""
+from typing import Any, Optional
+
+
+def str_or_none(value: Any) -> Optional[str]:
+    """str(x) if x else None（UUID 等）"""
+    return str(value) if value else None
+
+
+def float_or_none(value: Any) -> Optional[float]:
+    """float(x) if x else None（Decimal 金額、評分）"""
+    return float(value) if value else None
+
+
+def int_or_zero(value: Any) -> int:
+    """int(x) if x else 0"""
+    return int(value) if value else 0
+
+
+def isoformat_or_none(value: Any) -> Optional[str]:
+    """x.isoformat() if x else None"""
+    return value.isoformat() if value else None
@@ -0,0 +1,114 @@
+"""
+Admin Rollups Service
+管理後台統計改讀彙總表（見 migrations/add_admin_rollups.sql）
+
+- get_overview()：總數快照 + 最近 30 天；快照超過 max_age 秒才重算（最近兩天 + 總數）
+- get_daily()：每日統計時間序列
+- refresh()：重算指定日期之後的資料（`python manage.py refresh-admin-rollups`）
+
+重算由資料庫函式 admin_rollups_refresh() 執行，並以 advisory lock 確保
+多個 instance 同時過期時只有一個會重算，其他直接讀取現有快照。
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+
+
+# 每日統計欄位（依序輸出）
+DAILY_COLUMNS = (
+    "signups",
+    "projects_created",
+    "bids_created",
+    "tokens_spent",
+    "tokens_credited",
+    "token_transactions",
+)
+
+_OVERVIEW_SQL = text("""
+    SELECT
+        s.total_users,
+        s.total_projects,
+        s.total_bids,
+        s.projects_by_status,
+        s.refreshed_at,
+        s.refreshed_at < NOW() - make_interval(secs => CAST(:max_age AS double precision)) AS is_stale,
+        (
+            SELECT COALESCE(SUM(signups), 0)
+            FROM admin_daily_stats
+            WHERE day > CURRENT_DATE - 30
+        ) AS new_users_30d,
+        (
+            SELECT COALESCE(SUM(projects_created), 0)
+            FROM admin_daily_stats
+            WHERE day > CURRENT_DATE - 30
+        ) AS new_projects_30d
+    FROM admin_stats_snapshot s
+    WHERE s.id = 1
+""")
+
+_REFRESH_SQL = text("SELECT admin_rollups_refresh(CAST(:since AS date))")
+
+# 過期時只重算昨天與今天（跨日時昨天的資料仍可能在變動）
+_REFRESH_RECENT_SQL = text("SELECT admin_rollups_refresh(CURRENT_DATE - 1)")
+
+_DAILY_SQL = text(f"""
+    SELECT
+        d.day::date AS day,
+        {", ".join(f"COALESCE(s.{c}, 0) AS {c}" for c in DAILY_COLUMNS)}
+    FROM generate_series(CAST(:start AS date), CAST(:end AS date), INTERVAL '1 day') AS d(day)
+    LEFT JOIN admin_daily_stats s ON s.day = d.day::date
+    ORDER BY d.day
+""")
+
+
+async def refresh(db, since: Optional[date] = None) -> bool:
+    """
+    重算 since（含）之後的每日統計與總數快照
+
+    since 為 None 時補算全部歷史；其他 instance 正在重算時回傳 False
+    """
+    result = await db.execute(_REFRESH_SQL, {'since': since})
+    return bool(result.scalar())
+
+
+async def get_overview(db, max_age: float) -> Optional[dict]:
+    """
+    取得總數快照與最近 30 天統計
+
+    快照不存在時補算全部歷史，超過 max_age 秒時只重算最近兩天；
+    回傳 None 代表快照尚未建立（另一個 instance 正在進行第一次重算）
+    """
+    row = (await db.execute(_OVERVIEW_SQL, {'max_age': max_age})).fetchone()
+
+    if row is None:
+        await refresh(db, None)
+        row = (await db.execute(_OVERVIEW_SQL, {'max_age': max_age})).fetchone()
+    elif row.is_stale:
+        refreshed = (await db.execute(_REFRESH_RECENT_SQL)).scalar()
+        if refreshed:
+            row = (await db.execute(_OVERVIEW_SQL, {'max_age': max_age})).fetchone()
+
+    if row is None:
+        return None
+
+    return {
+        "total_users": row.total_users,
+        "total_projects": row.total_projects,
+        "total_bids": row.total_bids,
+        "projects_by_status": row.projects_by_status or {},
+        "last_30_days": {
+            "new_users": int(row.new_users_30d),
+            "new_projects": int(row.new_projects_30d),
+        },
+        "refreshed_at": row.refreshed_at,
+    }
+
+
+async def get_daily(db, start: date, end: date) -> list[dict]:
+    """取得 start ~ end（含）每一天的統計，沒有資料的日期補 0"""
+    result = await db.execute(_DAILY_SQL, {'start': start, 'end': end})
+    return [
+        {"day": row.day, **{c: int(getattr(row, c)) for c in DAILY_COLUMNS}}
+        for row in result.fetchall()
+    ]
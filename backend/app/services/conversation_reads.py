@@ -0,0 +1,110 @@
+"""
+Conversation Reads Service
+維護對話的已讀位置與未讀數（見 migrations/add_conversation_read_watermarks.sql）
+
+對話固定只有 initiator / recipient 兩位參與者，各自在 conversations 上有：
+- {participant}_last_read_message_id / {participant}_last_read_at：已讀到哪一則（watermark）
+- {participant}_unread_count：對方在 watermark 之後發送的訊息數
+
+- record_message()：發送訊息時為對方的未讀數 +1（與原本更新 updated_at 的 UPDATE 合併）
+  必須在 INSERT messages 之前呼叫：取得對話的 row lock，讓同一對話的訊息依序寫入
+- mark_read()：將 watermark 移到最新一則訊息並將未讀數歸零，只更新對話這一列
+  （原本是 UPDATE messages SET is_read = TRUE 更新每一則未讀訊息，再 COUNT 一次）
+  呼叫前必須以 SELECT ... FOR UPDATE 取得對話的 row lock（與 record_message() 相同的 lock），
+  持有 lock 期間不會有新訊息寫入，watermark 與未讀數來自同一個狀態
+- rebuild()：由 watermark 重新計算所有未讀數（`python manage.py rebuild-unread-counts`）
+
+訊息的 is_read 改由 watermark 推導（訊息 <= 對方的 watermark），messages.is_read 不再更新
+conversations 的 updated_at trigger 忽略已讀位置與未讀數欄位，mark_read() / rebuild() 不會改變對話列表的順序
+record_message() 與 mark_read() 都會更新 changed_at（對話列表增量同步，見 GET /conversations/sync）
+"""
+from typing import Union
+from uuid import UUID
+
+from sqlalchemy import text
+
+
+PARTICIPANTS = ("initiator", "recipient")
+
+
+_RECORD_MESSAGE_SQL = text("""
+    UPDATE conversations
+    SET updated_at = NOW(),
+        changed_at = NOW(),
+        initiator_unread_count = initiator_unread_count
+            + CASE WHEN initiator_id = CAST(:sender_id AS uuid) THEN 0 ELSE 1 END,
+        recipient_unread_count = recipient_unread_count
+            + CASE WHEN recipient_id = CAST(:sender_id AS uuid) THEN 0 ELSE 1 END
+    WHERE id = CAST(:conversation_id AS uuid)
+""")
+
+
+def _mark_read_sql(participant: str):
+    # 呼叫端已持有對話的 row lock：最新一則訊息之後不會再有訊息寫入，watermark 以內全部已讀
+    return text(f"""
+        UPDATE conversations c
+        SET {participant}_last_read_message_id = last_msg.id,
+            {participant}_last_read_at = last_msg.created_at,
+            {participant}_unread_count = 0,
+            changed_at = NOW()
+        FROM (
+            SELECT id, created_at
+            FROM messages
+            WHERE conversation_id = CAST(:conversation_id AS uuid)
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        ) last_msg
+        WHERE c.id = CAST(:conversation_id AS uuid)
+    """)
+
+
+_MARK_READ_SQL = {participant: _mark_read_sql(participant) for participant in PARTICIPANTS}
+
+
+def _unread_count_sql(participant: str, other: str) -> str:
+    """對方在 participant 的 watermark 之後發送的訊息數"""
+    return f"""(
+        SELECT COUNT(*)
+        FROM messages m
+        WHERE m.conversation_id = c.id
+          AND m.sender_id = c.{other}_id
+          AND (c.{participant}_last_read_at IS NULL
+              OR (m.created_at, m.id) > (c.{participant}_last_read_at, c.{participant}_last_read_message_id))
+    )"""
+
+
+_REBUILD_SQL = text(f"""
+    UPDATE conversations c
+    SET initiator_unread_count = {_unread_count_sql("initiator", "recipient")},
+        recipient_unread_count = {_unread_count_sql("recipient", "initiator")}
+""")
+
+
+async def record_message(db, conversation_id: Union[UUID, str], sender_id: Union[UUID, str]) -> None:
+    """
+    新訊息：對方的未讀數 +1，並更新對話時間
+
+    在 INSERT messages 之前呼叫，交易持有對話的 row lock 直到 commit；
+    訊息的 created_at 以 clock_timestamp() 在取得 lock 之後產生，順序與 commit 順序一致
+    """
+    await db.execute(_RECORD_MESSAGE_SQL, {
+        'conversation_id': str(conversation_id),
+        'sender_id': str(sender_id),
+    })
+
+
+async def mark_read(db, conversation_id: Union[UUID, str], participant: str) -> None:
+    """
+    將 participant（"initiator" / "recipient"）的 watermark 移到最新一則訊息，未讀數歸零
+
+    呼叫端必須已在同一交易內以 SELECT ... FOR UPDATE 鎖定對話
+    """
+    await db.execute(_MARK_READ_SQL[participant], {
+        'conversation_id': str(conversation_id),
+    })
+
+
+async def rebuild(db) -> int:
+    """由 watermark 重新計算所有對話的未讀數，回傳更新的對話數"""
+    result = await db.execute(_REBUILD_SQL)
+    return result.rowcount
@@ -2,13 +2,17 @@
 Email Service using Resend
 處理所有郵件發送相關功能
 """
-import resend
+from functools import lru_cache
 from typing import Optional
 from ..config import settings
 
 
-# 設定 Resend API Key
-resend.api_key = settings.RESEND_API_KEY
+@lru_cache(maxsize=None)
+def _resend():
+    """第一次寄信時才匯入 Resend SDK 並設定 API Key（縮短冷啟動時間）"""
+    import resend
+    resend.api_key = settings.RESEND_API_KEY
+    return resend
 
 
 async def send_email(
@@ -40,7 +44,7 @@ async def send_email(
             "html": html,
         }
         
-        result = resend.Emails.send(params)
+        result = _resend().Emails.send(params)
         return result
     except Exception as e:
         raise Exception(f"發送郵件失敗: {str(e)}")
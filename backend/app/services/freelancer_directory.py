@@ -0,0 +1,124 @@
+"""
+Freelancer Directory Service
+維護 freelancer_directory 投影表（見 migrations/add_freelancer_directory.sql）
+
+接案者搜尋只讀這張表：技能以 GIN 索引過濾、以預先計算的 rank_score 排序，
+不再對每筆結果執行相關子查詢。
+
+影響目錄內容的寫入（個人資料、頭像、投標、評價、案件完成）在同一個交易內
+呼叫 refresh(db, user_ids)，只重新計算受影響的接案者；
+rebuild() 重新計算全部（`python manage.py rebuild-freelancer-directory`）。
+"""
+from typing import Iterable, Union
+from uuid import UUID
+
+from sqlalchemy import text
+
+
+# ==================== 排序分數 ====================
+#
+# rank_score = 評分 × RATING_WEIGHT
+#            + ln(1 + 完成案件數) × COMPLETED_WEIGHT
+#            + 最後活動時間（epoch 秒）/ RECENCY_SECONDS_PER_POINT
+#
+# 活躍度以絕對時間計分（最後活動時間每早 90 天少 1 分），而不是「距今幾天」，
+# 因此分數不會隨時間經過而失效，不需要定期全表重算
+# migrations/add_freelancer_directory.sql 的初始回填使用相同權重，調整時一併修改
+RATING_WEIGHT = 2.0
+COMPLETED_WEIGHT = 3.0
+RECENCY_SECONDS_PER_POINT = 90 * 86400
+
+
+def _refresh_sql(scoped: bool) -> str:
+    """
+    由 users / user_stats / bids / projects 重新計算目錄
+
+    scoped=True 時只處理 :user_ids 內的使用者
+    """
+    def only(column: str) -> str:
+        return f"AND {column} = ANY(CAST(:user_ids AS uuid[]))" if scoped else ""
+
+    return f"""
+        WITH
+        last_bids AS (
+            SELECT freelancer_id AS user_id, MAX(created_at) AS last_bid_at
+            FROM bids
+            WHERE TRUE {only("freelancer_id")}
+            GROUP BY freelancer_id
+        ),
+        completed_counts AS (
+            SELECT b.freelancer_id AS user_id, COUNT(DISTINCT p.id) AS n
+            FROM bids b
+            JOIN projects p ON p.id = b.project_id
+            WHERE p.status = 'completed' {only("b.freelancer_id")}
+            GROUP BY b.freelancer_id
+        ),
+        source AS (
+            SELECT
+                u.id AS user_id,
+                u.name,
+                u.bio,
+                COALESCE(u.skills, '{{}}') AS skills,
+                u.avatar_url,
+                u.rating,
+                u.portfolio_links,
+                u.created_at,
+                COALESCE(s.bids_count, 0) AS bids_count,
+                COALESCE(cc.n, 0) AS completed_projects_count,
+                GREATEST(u.updated_at, lb.last_bid_at) AS last_active_at
+            FROM users u
+            LEFT JOIN user_stats s ON s.user_id = u.id
+            LEFT JOIN last_bids lb ON lb.user_id = u.id
+            LEFT JOIN completed_counts cc ON cc.user_id = u.id
+            WHERE 'freelancer' = ANY(u.roles) {only("u.id")}
+        ),
+        removed AS (
+            -- 已不再是接案者（或已刪除）的使用者移出目錄
+            DELETE FROM freelancer_directory d
+            WHERE TRUE {only("d.user_id")}
+              AND NOT EXISTS (SELECT 1 FROM source WHERE source.user_id = d.user_id)
+        )
+        INSERT INTO freelancer_directory (
+            user_id, name, bio, skills, avatar_url, rating, portfolio_links, created_at,
+            bids_count, completed_projects_count, last_active_at, rank_score, updated_at
+        )
+        SELECT
+            user_id, name, bio, skills, avatar_url, rating, portfolio_links, created_at,
+            bids_count, completed_projects_count, last_active_at,
+            COALESCE(rating, 0) * {RATING_WEIGHT}
+                + LN(1 + completed_projects_count) * {COMPLETED_WEIGHT}
+                + COALESCE(EXTRACT(EPOCH FROM last_active_at), 0) / {RECENCY_SECONDS_PER_POINT},
+            NOW()
+        FROM source
+        ON CONFLICT (user_id) DO UPDATE SET
+            name = EXCLUDED.name,
+            bio = EXCLUDED.bio,
+            skills = EXCLUDED.skills,
+            avatar_url = EXCLUDED.avatar_url,
+            rating = EXCLUDED.rating,
+            portfolio_links = EXCLUDED.portfolio_links,
+            created_at = EXCLUDED.created_at,
+            bids_count = EXCLUDED.bids_count,
+            completed_projects_count = EXCLUDED.completed_projects_count,
+            last_active_at = EXCLUDED.last_active_at,
+            rank_score = EXCLUDED.rank_score,
+            updated_at = NOW()
+    """
+
+
+_REFRESH_SQL = text(_refresh_sql(scoped=True))
+_REBUILD_SQL = text(_refresh_sql(scoped=False))
+
+
+async def refresh(db, user_ids: Iterable[Union[UUID, str]]) -> None:
+    """重新計算指定使用者在目錄中的資料（非接案者會被移出目錄）"""
+    ids = sorted({str(user_id) for user_id in user_ids if user_id is not None})
+    if not ids:
+        return
+    await db.execute(_REFRESH_SQL, {'user_ids': ids})
+
+
+async def rebuild(db) -> int:
+    """重新計算整個目錄，回傳寫入筆數"""
+    result = await db.execute(_REBUILD_SQL)
+    return result.rowcount
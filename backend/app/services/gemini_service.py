@@ -2,11 +2,57 @@
 Google Gemini AI 服務
 用於生成專案摘要、技能標籤提取等功能
 """
+import re
 from typing import Optional, List
-import httpx
 from app.config import settings
 
 
+def clean_generated_title(result: str) -> str:
+    """
+    清理 AI 生成的專案標題
+
+    Args:
+        result: Gemini 回傳的原始文字
+
+    Returns:
+        清理後的標題（最多 15 個有效字，總長不超過 50 字元）
+    """
+    # 清理結果，移除可能的引號、換行和多餘空白
+    title = result.strip().strip('"').strip("'").strip()
+    # 移除換行符號
+    title = title.replace('\n', '').replace('\r', '')
+    
+    # 計算實際字數（排除標點符號和空格）
+    clean_title = re.sub(r'[，。、；：！？\s\.,;:!?]', '', title)
+    char_count = len(clean_title)
+    
+    # 如果超過 15 字，智能截斷
+    if char_count > 15:
+        # 嘗試保留完整的詞彙
+        truncated = ''
+        current_count = 0
+        for char in title:
+            # 跳過標點符號和空格
+            if char not in '，。、；：！？\s\.,;:!? ':
+                current_count += 1
+                if current_count > 15:
+                    break
+            truncated += char
+        
+        # 移除末尾的標點符號
+        title = truncated.rstrip('，。、；：！？\.,;:!? ')
+        
+        # 如果截斷後太短，使用簡單截斷
+        if len(title) < 5:
+            title = result[:15].strip()
+    
+    # 最終確保長度不超過 50 字元（包含標點）
+    if len(title) > 50:
+        title = title[:47] + "..."
+    
+    return title
+
+
 class GeminiService:
     """Google Gemini API 服務"""
     
@@ -42,6 +88,9 @@ class GeminiService:
             # 如果沒有設定 API key，返回 None（不影響主要功能）
             return None
         
+        # httpx 只有呼叫 Gemini 時才需要（縮短冷啟動時間）
+        import httpx
+        
         url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
         
         payload = {
@@ -160,41 +209,7 @@ class GeminiService:
         result = await self.generate_text(prompt, max_tokens=50, temperature=0.5)
         
         if result:
-            # 清理結果，移除可能的引號、換行和多餘空白
-            title = result.strip().strip('"').strip("'").strip()
-            # 移除換行符號
-            title = title.replace('\n', '').replace('\r', '')
-            
-            # 計算實際字數（排除標點符號和空格）
-            import re
-            clean_title = re.sub(r'[，。、；：！？\s\.,;:!?]', '', title)
-            char_count = len(clean_title)
-            
-            # 如果超過 15 字，智能截斷
-            if char_count > 15:
-                # 嘗試保留完整的詞彙
-                truncated = ''
-                current_count = 0
-                for char in title:
-                    # 跳過標點符號和空格
-                    if char not in '，。、；：！？\s\.,;:!? ':
-                        current_count += 1
-                        if current_count > 15:
-                            break
-                    truncated += char
-                
-                # 移除末尾的標點符號
-                title = truncated.rstrip('，。、；：！？\.,;:!? ')
-                
-                # 如果截斷後太短，使用簡單截斷
-                if len(title) < 5:
-                    title = result[:15].strip()
-            
-            # 最終確保長度不超過 50 字元（包含標點）
-            if len(title) > 50:
-                title = title[:47] + "..."
-            
-            return title
+            return clean_generated_title(result)
         
         return None
     
@@ -0,0 +1,80 @@
+"""
+Partitions Service
+維護按月分區的資料表（見 migrations/partition_append_only_tables.sql）
+
+messages / token_transactions / notifications 以 created_at 按月分區：
+- maintain()：預先建立未來 months_ahead 個月的分區，並封存超過保留月數的分區
+  （detach 後移到 archive schema，不刪除資料）
+  由 app.main 的背景工作每天執行，亦可執行 `python manage.py maintain-partitions`
+
+多個 instance 同時執行時以 advisory lock 確保只有一個會實際建立 / 封存分區
+"""
+from typing import Mapping, Optional
+
+from sqlalchemy import text
+
+from ..config import settings
+
+
+PARTITIONED_TABLES = ("messages", "token_transactions", "notifications")
+
+_LOCK_SQL = text("SELECT pg_try_advisory_xact_lock(hashtext('maintain_partitions'))")
+
+_CREATE_SQL = text("""
+    SELECT create_monthly_partitions(
+        :table,
+        CURRENT_DATE,
+        CAST(CURRENT_DATE + make_interval(months => CAST(:months_ahead AS integer)) AS date)
+    )
+""")
+
+# 保留本月與之前 retention_months - 1 個月的分區
+_ARCHIVE_SQL = text("""
+    SELECT archive_monthly_partitions(
+        :table,
+        CAST(date_trunc('month', CURRENT_DATE) - make_interval(months => CAST(:retention_months AS integer) - 1) AS date)
+    )
+""")
+
+
+def retention_settings() -> dict[str, Optional[int]]:
+    """各資料表的保留月數（None = 不封存）"""
+    return {
+        "messages": settings.MESSAGES_RETENTION_MONTHS,
+        "token_transactions": settings.TOKEN_TRANSACTIONS_RETENTION_MONTHS,
+        "notifications": settings.NOTIFICATIONS_RETENTION_MONTHS,
+    }
+
+
+async def maintain(
+    db,
+    months_ahead: int,
+    retention_months: Mapping[str, Optional[int]],
+) -> Optional[dict]:
+    """
+    建立未來的分區並封存過期的分區
+
+    回傳 {資料表: {"created": 新建立的分區數, "archived": [封存的分區名稱]}}；
+    其他 instance 正在執行時回傳 None
+    """
+    if not (await db.execute(_LOCK_SQL)).scalar():
+        return None
+
+    summary = {}
+    for table in PARTITIONED_TABLES:
+        created = (await db.execute(_CREATE_SQL, {
+            'table': table,
+            'months_ahead': months_ahead,
+        })).scalar()
+
+        archived = []
+        retention = retention_months.get(table)
+        if retention:
+            result = await db.execute(_ARCHIVE_SQL, {
+                'table': table,
+                'retention_months': retention,
+            })
+            archived = [row[0] for row in result.fetchall()]
+
+        summary[table] = {"created": int(created or 0), "archived": archived}
+    return summary
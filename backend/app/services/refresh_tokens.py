@@ -0,0 +1,120 @@
+"""
+Refresh Token Service
+Refresh Token 的儲存、輪替與清除（見 migrations/hash_refresh_tokens.sql）
+
+- 資料庫只保存 SHA-256(token)，以固定 32 bytes 的 UNIQUE 索引查詢
+- rotate()：刪除舊 token 與寫入新 token 在同一個 SQL 語句完成，
+  同一個 refresh token 被並發使用時只有一個請求會成功
+- purge_expired()：定期清除過期的 refresh / email 驗證 token
+  （由 app.main 的背景工作執行，亦可執行 `python manage.py purge-expired-tokens`）
+
+expires_at 為 UTC 的 TIMESTAMP（不含時區），比較時使用 NOW() AT TIME ZONE 'utc'
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+
+from ..config import settings
+
+
+_INSERT_SQL = text("""
+    INSERT INTO refresh_tokens (id, user_id, token_hash, expires_at, created_at)
+    VALUES (gen_random_uuid(), CAST(:user_id AS uuid), :token_hash, :expires_at, NOW())
+""")
+
+_ROTATE_SQL = text("""
+    WITH revoked AS (
+        DELETE FROM refresh_tokens
+        WHERE token_hash = :old_hash
+          AND expires_at > (NOW() AT TIME ZONE 'utc')
+        RETURNING user_id
+    ),
+    issued AS (
+        INSERT INTO refresh_tokens (id, user_id, token_hash, expires_at, created_at)
+        SELECT gen_random_uuid(), user_id, :new_hash, :expires_at, NOW()
+        FROM revoked
+        RETURNING user_id
+    )
+    SELECT
+        u.id as user_id,
+        u.name,
+        u.email,
+        u.roles,
+        u.avatar_url
+    FROM issued
+    INNER JOIN users u ON u.id = issued.user_id
+""")
+
+_REVOKE_SQL = text("DELETE FROM refresh_tokens WHERE token_hash = :token_hash")
+
+# 多個 instance 同時執行時只有一個會清除
+_PURGE_SQL = text("""
+    WITH lock AS (
+        SELECT pg_try_advisory_xact_lock(hashtext('purge_expired_tokens')) AS acquired
+    ),
+    refresh AS (
+        DELETE FROM refresh_tokens
+        WHERE expires_at < (NOW() AT TIME ZONE 'utc')
+          AND (SELECT acquired FROM lock)
+        RETURNING 1
+    ),
+    verification AS (
+        DELETE FROM email_verification_tokens
+        WHERE expires_at < (NOW() AT TIME ZONE 'utc')
+          AND (SELECT acquired FROM lock)
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM refresh) AS refresh_tokens,
+        (SELECT COUNT(*) FROM verification) AS email_verification_tokens
+""")
+
+
+def hash_token(token: str) -> bytes:
+    """Refresh Token 的雜湊（與 migration 的 sha256(convert_to(token, 'UTF8')) 相同）"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _expires_at() -> datetime:
+    return datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+async def store(db, user_id, token: str) -> None:
+    """儲存新簽發的 refresh token"""
+    await db.execute(_INSERT_SQL, {
+        'user_id': str(user_id),
+        'token_hash': hash_token(token),
+        'expires_at': _expires_at(),
+    })
+
+
+async def rotate(db, old_token: str, new_token: str) -> Optional[dict]:
+    """
+    以 new_token 取代 old_token
+
+    回傳 token 擁有者（user_id / name / email / roles / avatar_url）；
+    old_token 不存在、已過期或已被使用時回傳 None
+    """
+    result = await db.execute(_ROTATE_SQL, {
+        'old_hash': hash_token(old_token),
+        'new_hash': hash_token(new_token),
+        'expires_at': _expires_at(),
+    })
+    row = result.fetchone()
+    return dict(row._mapping) if row else None
+
+
+async def revoke(db, token: str) -> None:
+    """撤銷 refresh token（登出）"""
+    await db.execute(_REVOKE_SQL, {'token_hash': hash_token(token)})
+
+
+async def purge_expired(db) -> dict:
+    """清除過期的 refresh / email 驗證 token，回傳各表刪除筆數"""
+    row = (await db.execute(_PURGE_SQL)).fetchone()
+    return {
+        "refresh_tokens": int(row.refresh_tokens),
+        "email_verification_tokens": int(row.email_verification_tokens),
+    }
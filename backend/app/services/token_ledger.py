@@ -0,0 +1,175 @@
+"""
+Token Ledger Service
+代幣餘額異動的唯一入口
+
+餘額檢查、扣款與交易紀錄由資料庫函式 token_ledger_apply() 一次完成
+（見 migrations/add_token_ledger.sql）：
+- 以 UPDATE ... WHERE balance + amount >= 0 條件式扣款，不需要先 SELECT 餘額，
+  並發投標時不會發生 check-then-act 的超扣
+- 每次異動只需一個 round trip，縮短 user_tokens 的 row lock 持有時間
+- 冪等 key 確保同一筆操作重試時不會重複扣款 / 退款
+  key 必須由請求的固定識別組成（例如 submit_proposal:<project_id>:<user_id>），
+  不可使用請求內才產生的 uuid4()，否則每次重試都是新的 key
+"""
+from dataclasses import dataclass
+from typing import Optional, Union
+from uuid import UUID
+
+from sqlalchemy import text
+
+from ..config import settings
+from ..models.token import TransactionType
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """一次餘額異動的結果"""
+    transaction_id: Optional[UUID]
+    balance_after: int
+    applied: bool  # False 代表此冪等 key 先前已生效，本次沒有異動
+
+
+@dataclass(frozen=True)
+class TokenAccount:
+    """代幣帳戶餘額"""
+    balance: int
+    total_earned: int
+    total_spent: int
+    created: bool
+
+
+_APPLY_SQL = text("""
+    SELECT transaction_id, balance_after, applied
+    FROM token_ledger_apply(
+        CAST(:user_id AS uuid),
+        CAST(:amount AS integer),
+        CAST(:transaction_type AS transaction_type),
+        CAST(:reference_id AS uuid),
+        CAST(:description AS text),
+        CAST(:idempotency_key AS varchar)
+    )
+""")
+
+_RELEASE_SQL = text("""
+    DELETE FROM token_idempotency_keys WHERE idempotency_key = :idempotency_key
+""")
+
+_OPEN_ACCOUNT_SQL = text("""
+    SELECT balance, total_earned, total_spent, created
+    FROM token_ledger_open_account(
+        CAST(:user_id AS uuid),
+        CAST(:initial_balance AS integer),
+        CAST(:description AS text)
+    )
+""")
+
+
+def _str_or_none(value: Optional[Union[UUID, str]]) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+async def apply(
+    db,
+    user_id: Union[UUID, str],
+    amount: int,
+    transaction_type: TransactionType,
+    reference_id: Optional[Union[UUID, str]] = None,
+    description: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[LedgerEntry]:
+    """
+    異動代幣餘額並寫入交易紀錄
+
+    Args:
+        amount: 負數為扣款，正數為入帳
+        idempotency_key: 冪等 key，同一個 key 只會生效一次
+
+    Returns:
+        LedgerEntry；餘額不足或帳戶不存在時回傳 None
+    """
+    result = await db.execute(_APPLY_SQL, {
+        'user_id': str(user_id),
+        'amount': amount,
+        'transaction_type': transaction_type.value,
+        'reference_id': _str_or_none(reference_id),
+        'description': description,
+        'idempotency_key': idempotency_key,
+    })
+    row = result.fetchone()
+    if row is None:
+        return None
+    return LedgerEntry(
+        transaction_id=row.transaction_id,
+        balance_after=row.balance_after,
+        applied=row.applied,
+    )
+
+
+async def debit(
+    db,
+    user_id: Union[UUID, str],
+    cost: int,
+    transaction_type: TransactionType,
+    reference_id: Optional[Union[UUID, str]] = None,
+    description: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[LedgerEntry]:
+    """扣款（餘額不足時回傳 None，不做任何異動）"""
+    return await apply(
+        db, user_id, -cost, transaction_type,
+        reference_id=reference_id,
+        description=description,
+        idempotency_key=idempotency_key,
+    )
+
+
+async def credit(
+    db,
+    user_id: Union[UUID, str],
+    amount: int,
+    transaction_type: TransactionType,
+    reference_id: Optional[Union[UUID, str]] = None,
+    description: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[LedgerEntry]:
+    """入帳（儲值、退款；帳戶不存在時回傳 None）"""
+    return await apply(
+        db, user_id, amount, transaction_type,
+        reference_id=reference_id,
+        description=description,
+        idempotency_key=idempotency_key,
+    )
+
+
+async def release(db, idempotency_key: str) -> None:
+    """
+    釋放冪等 key，之後以同一個 key 異動會再次生效
+
+    用於操作已被撤銷並退款的情況（例如撤回提案後重新投標同一個案件）
+    """
+    await db.execute(_RELEASE_SQL, {'idempotency_key': idempotency_key})
+
+
+async def open_account(
+    db,
+    user_id: Union[UUID, str],
+    initial_balance: int = settings.TOKEN_NEW_USER_GIFT,
+    description: Optional[str] = "新用戶註冊贈送",
+) -> TokenAccount:
+    """
+    建立代幣帳戶並記錄初始贈送
+
+    帳戶已存在時不做任何異動，直接回傳目前餘額（可重複呼叫）
+    """
+    result = await db.execute(_OPEN_ACCOUNT_SQL, {
+        'user_id': str(user_id),
+        'initial_balance': initial_balance,
+        'description': description,
+    })
+    row = result.fetchone()
+    return TokenAccount(
+        balance=row.balance,
+        total_earned=row.total_earned,
+        total_spent=row.total_spent,
+        created=row.created,
+    )
@@ -0,0 +1,239 @@
+"""
+User Stats Service
+維護 user_stats 表（見 migrations/add_user_stats.sql）
+
+- 常見寫入（建立案件、投標、評價）以 increment() 在同一個交易內增量更新
+- 影響範圍較大的寫入（刪除案件連帶刪除提案、案件狀態進出 completed）
+  以 refresh() 針對受影響的使用者重新計算
+- rebuild() 重新計算所有使用者（`python manage.py rebuild-user-stats`）
+- backfill_ratings() 只重新計算評分相關欄位並同步 users.rating（`python manage.py backfill-ratings`）
+
+建立評價時的增量更新與 INSERT 在同一個 SQL 語句內完成，見 reviews.create_review
+"""
+from typing import Iterable, Union
+from uuid import UUID
+
+from sqlalchemy import text
+
+
+# 可增量更新的欄位（increment() 只接受這些欄位，避免組出任意 SQL）
+STATS_COLUMNS = (
+    "projects_created",
+    "bids_count",
+    "completed_count",
+    "reviews_count",
+    "rating_sum",
+    "rating_count",
+    "rating_1_count",
+    "rating_2_count",
+    "rating_3_count",
+    "rating_4_count",
+    "rating_5_count",
+)
+
+# 1-5 星評價數欄位（依星數排列）
+RATING_HISTOGRAM_COLUMNS = tuple(f"rating_{stars}_count" for stars in range(1, 6))
+
+
+def rating_histogram(row) -> dict:
+    """由查詢結果組出 {"1": n, ..., "5": n}（欄位不存在或為 NULL 時為 0）"""
+    return {
+        str(stars): int(getattr(row, column, None) or 0)
+        for stars, column in enumerate(RATING_HISTOGRAM_COLUMNS, start=1)
+    }
+
+
+# 各星數的 COUNT 運算式（reviews 表）
+_HISTOGRAM_COUNTS = ",\n".join(
+    f"COUNT(*) FILTER (WHERE rating = {stars}) AS {column}"
+    for stars, column in enumerate(RATING_HISTOGRAM_COLUMNS, start=1)
+)
+
+
+def _recompute_sql(scoped: bool) -> str:
+    """
+    由來源資料表重新計算統計
+
+    scoped=True 時只計算 :user_ids 內的使用者（每個 CTE 都先過濾，走索引）
+    """
+    def only(column: str) -> str:
+        return f"AND {column} = ANY(CAST(:user_ids AS uuid[]))" if scoped else ""
+
+    return f"""
+        WITH
+        project_counts AS (
+            SELECT client_id AS user_id, COUNT(*) AS n
+            FROM projects
+            WHERE TRUE {only("client_id")}
+            GROUP BY client_id
+        ),
+        bid_counts AS (
+            SELECT freelancer_id AS user_id, COUNT(*) AS n
+            FROM bids
+            WHERE TRUE {only("freelancer_id")}
+            GROUP BY freelancer_id
+        ),
+        completed_counts AS (
+            SELECT user_id, COUNT(*) AS n
+            FROM (
+                SELECT client_id AS user_id, id AS project_id
+                FROM projects
+                WHERE status = 'completed' {only("client_id")}
+                UNION
+                SELECT b.freelancer_id, p.id
+                FROM projects p
+                JOIN bids b ON b.project_id = p.id
+                WHERE p.status = 'completed' {only("b.freelancer_id")}
+            ) completed
+            GROUP BY user_id
+        ),
+        review_counts AS (
+            SELECT
+                reviewee_id AS user_id,
+                COUNT(*) AS n,
+                COALESCE(SUM(rating), 0) AS rating_sum,
+                {_HISTOGRAM_COUNTS}
+            FROM reviews
+            WHERE TRUE {only("reviewee_id")}
+            GROUP BY reviewee_id
+        )
+        INSERT INTO user_stats (
+            user_id, projects_created, bids_count, completed_count,
+            reviews_count, rating_sum, rating_count,
+            {", ".join(RATING_HISTOGRAM_COLUMNS)}, updated_at
+        )
+        SELECT
+            u.id,
+            COALESCE(pc.n, 0),
+            COALESCE(bc.n, 0),
+            COALESCE(cc.n, 0),
+            COALESCE(rc.n, 0),
+            COALESCE(rc.rating_sum, 0),
+            COALESCE(rc.n, 0),
+            {", ".join(f"COALESCE(rc.{c}, 0)" for c in RATING_HISTOGRAM_COLUMNS)},
+            NOW()
+        FROM users u
+        LEFT JOIN project_counts pc ON pc.user_id = u.id
+        LEFT JOIN bid_counts bc ON bc.user_id = u.id
+        LEFT JOIN completed_counts cc ON cc.user_id = u.id
+        LEFT JOIN review_counts rc ON rc.user_id = u.id
+        WHERE TRUE {only("u.id")}
+        ON CONFLICT (user_id) DO UPDATE SET
+            projects_created = EXCLUDED.projects_created,
+            bids_count = EXCLUDED.bids_count,
+            completed_count = EXCLUDED.completed_count,
+            reviews_count = EXCLUDED.reviews_count,
+            rating_sum = EXCLUDED.rating_sum,
+            rating_count = EXCLUDED.rating_count,
+            {", ".join(f"{c} = EXCLUDED.{c}" for c in RATING_HISTOGRAM_COLUMNS)},
+            updated_at = NOW()
+    """
+
+
+_REFRESH_SQL = text(_recompute_sql(scoped=True))
+_REBUILD_SQL = text(_recompute_sql(scoped=False))
+
+
+async def increment(db, user_id: Union[UUID, str], **deltas: int) -> None:
+    """
+    增量更新統計（帳戶尚無統計資料時自動建立）
+
+    範例:
+    ```python
+    await user_stats.increment(db, current_user.id, bids_count=1)
+    ```
+    """
+    unknown = set(deltas) - set(STATS_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown user_stats columns: {', '.join(sorted(unknown))}")
+    if not deltas:
+        return
+
+    columns = list(deltas)
+    sql = f"""
+        INSERT INTO user_stats (user_id, {", ".join(columns)}, updated_at)
+        VALUES (:user_id, {", ".join(f"GREATEST(:{c}, 0)" for c in columns)}, NOW())
+        ON CONFLICT (user_id) DO UPDATE SET
+            {", ".join(f"{c} = GREATEST(user_stats.{c} + :{c}, 0)" for c in columns)},
+            updated_at = NOW()
+    """
+    await db.execute(text(sql), {'user_id': str(user_id), **deltas})
+
+
+async def refresh(db, user_ids: Iterable[Union[UUID, str]]) -> None:
+    """由來源資料表重新計算指定使用者的統計"""
+    ids = sorted({str(user_id) for user_id in user_ids if user_id is not None})
+    if not ids:
+        return
+    await db.execute(_REFRESH_SQL, {'user_ids': ids})
+
+
+async def project_participants(db, project_id: Union[UUID, str]) -> list:
+    """
+    案件的發案者與所有投標者
+
+    刪除案件前呼叫（提案會被 cascade 刪除），刪除後再以 refresh() 重新計算
+    """
+    result = await db.execute(text("""
+        SELECT client_id AS user_id FROM projects WHERE id = :project_id
+        UNION
+        SELECT freelancer_id FROM bids WHERE project_id = :project_id
+    """), {'project_id': str(project_id)})
+    return [row.user_id for row in result.fetchall()]
+
+
+_BACKFILL_RATINGS_SQL = text(f"""
+    WITH
+    review_counts AS (
+        SELECT
+            reviewee_id AS user_id,
+            COUNT(*) AS n,
+            COALESCE(SUM(rating), 0) AS rating_sum,
+            {_HISTOGRAM_COUNTS}
+        FROM reviews
+        GROUP BY reviewee_id
+    ),
+    upserted AS (
+        INSERT INTO user_stats (
+            user_id, reviews_count, rating_sum, rating_count,
+            {", ".join(RATING_HISTOGRAM_COLUMNS)}, updated_at
+        )
+        SELECT
+            u.id,
+            COALESCE(rc.n, 0),
+            COALESCE(rc.rating_sum, 0),
+            COALESCE(rc.n, 0),
+            {", ".join(f"COALESCE(rc.{c}, 0)" for c in RATING_HISTOGRAM_COLUMNS)},
+            NOW()
+        FROM users u
+        LEFT JOIN review_counts rc ON rc.user_id = u.id
+        ON CONFLICT (user_id) DO UPDATE SET
+            reviews_count = EXCLUDED.reviews_count,
+            rating_sum = EXCLUDED.rating_sum,
+            rating_count = EXCLUDED.rating_count,
+            {", ".join(f"{c} = EXCLUDED.{c}" for c in RATING_HISTOGRAM_COLUMNS)},
+            updated_at = NOW()
+        RETURNING user_id, rating_sum, rating_count
+    )
+    UPDATE users u
+    SET rating = ROUND(up.rating_sum::numeric / up.rating_count, 2)
+    FROM upserted up
+    WHERE u.id = up.user_id
+      AND up.rating_count > 0
+""")
+
+
+async def backfill_ratings(db) -> int:
+    """
+    由 reviews 重新計算評分統計（評價數、總和、各星數）並同步 users.rating
+
+    回傳更新 users.rating 的筆數
+    """
+    result = await db.execute(_BACKFILL_RATINGS_SQL)
+    return result.rowcount
+
+
+async def rebuild(db) -> int:
+    """重新計算所有使用者的統計，回傳更新筆數"""
+    result = await db.execute(_REBUILD_SQL)
+    return result.rowcount
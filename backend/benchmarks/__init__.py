@@ -0,0 +1,10 @@
+"""
+後端熱點函數的 Microbenchmark
+不需要資料庫連線，只量測純 CPU 的程式碼路徑
+
+使用方式（在 backend/ 目錄下執行）:
+    python -m benchmarks                     # 執行全部並與 baseline 比較
+    python -m benchmarks -k security         # 只執行名稱包含 security 的項目
+    python -m benchmarks --save-baseline     # 將本次結果存為 baseline
+    python -m benchmarks --threshold 0.3     # 退步超過 30% 即失敗
+"""
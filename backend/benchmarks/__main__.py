@@ -0,0 +1,64 @@
+"""
+Benchmark 入口
+
+    python -m benchmarks [-k PATTERN] [--threshold 0.25] [--save-baseline]
+
+任何項目比 baseline 慢超過門檻或執行失敗時，以 exit code 1 結束（可用於 CI）
+"""
+import argparse
+import importlib
+import pkgutil
+import sys
+from pathlib import Path
+
+from .harness import BASELINE_PATH, DEFAULT_THRESHOLD, ensure_env, run, save_baseline
+
+
+def _load_benchmarks() -> None:
+    """匯入 benchmarks/bench_*.py 以註冊所有 benchmark"""
+    package_dir = Path(__file__).parent
+    for module in pkgutil.iter_modules([str(package_dir)]):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"{__package__}.{module.name}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="後端熱點函數 Microbenchmark")
+    parser.add_argument("-k", dest="pattern", help="只執行名稱包含此字串的 benchmark")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"退步門檻（比例，預設 {DEFAULT_THRESHOLD}）",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="將本次結果存為 baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline 檔案路徑")
+    args = parser.parse_args()
+
+    ensure_env()
+    _load_benchmarks()
+
+    results = run(pattern=args.pattern, threshold=args.threshold, baseline_path=args.baseline)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\n已儲存 baseline: {args.baseline}")
+        return 0
+
+    failed = [r for r in results if r.error]
+    if failed:
+        print(f"\n❌ {len(failed)} 項 benchmark 執行失敗:")
+        for r in failed:
+            print(f"  - {r.name}: {r.error}")
+
+    regressed = [r for r in results if r.regressed]
+    if regressed:
+        print(f"\n❌ {len(regressed)} 項 benchmark 退步:")
+        for r in regressed:
+            print(f"  - {r.name}: {r.ratio:.2f}x")
+
+    return 1 if failed or regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
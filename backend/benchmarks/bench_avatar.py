@@ -0,0 +1,20 @@
+"""
+頭像壓縮 benchmark
+"""
+from .fixtures import avatar_data_uri
+from .harness import setup_benchmark
+
+from app.api.v1.avatar import compress_and_resize_image
+
+
+# 圖片處理本身波動較大，門檻放寬
+@setup_benchmark("avatar.compress_and_resize_image.png", threshold=0.4)
+def bench_compress_png():
+    data = avatar_data_uri(fmt="PNG")
+    return lambda: compress_and_resize_image(data)
+
+
+@setup_benchmark("avatar.compress_and_resize_image.jpeg", threshold=0.4)
+def bench_compress_jpeg():
+    data = avatar_data_uri(fmt="JPEG")
+    return lambda: compress_and_resize_image(data)
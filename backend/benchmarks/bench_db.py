@@ -0,0 +1,102 @@
+"""
+資料列解碼 benchmark（每次量測一整頁 users 資料列的 id / roles / skills）
+
+- db.decode_rows.legacy：原本的方式，enum 陣列以字串回傳，
+  router 逐列以 parse_pg_array() 切字串、UUID() 轉換 id
+- db.decode_rows.psycopg：app.db 註冊型別後，由 psycopg loader 直接解析為 list / UUID
+"""
+import uuid
+from typing import Any, Optional
+
+from psycopg import adapters, postgres
+from psycopg.adapt import AdaptersMap, Transformer
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+from .fixtures import PAGE_SIZE
+from .harness import setup_benchmark
+
+
+# 模擬資料庫中 user_role 的 OID（實際值由 TypeInfo.fetch 取得）
+_USER_ROLE_OID = 90001
+_USER_ROLE_ARRAY_OID = 90002
+
+
+def _legacy_parse_pg_array(value: Any) -> Optional[list]:
+    """原本 app.db.parse_pg_array 的實作（保留作為比較基準）"""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}'):
+            value = value[1:-1]
+        if not value:
+            return []
+        return value.split(',')
+    return value
+
+
+def _wire_rows(count: int = PAGE_SIZE) -> list[tuple[bytes, bytes, bytes]]:
+    """資料庫以 text 格式送出的 (id, roles, skills)"""
+    return [
+        (
+            str(uuid.uuid4()).encode(),
+            b"{client,freelancer}" if i % 2 else b"{client}",
+            b'{React,Next.js,PostgreSQL,TypeScript,"C, C++"}',
+        )
+        for i in range(count)
+    ]
+
+
+class _Context:
+    """Transformer 需要的 adapt context（等同一條已註冊型別的連線）"""
+
+    def __init__(self, register_enum: bool):
+        self.adapters = AdaptersMap(adapters)
+        self.connection = None
+        if register_enum:
+            TypeInfo("user_role", _USER_ROLE_OID, _USER_ROLE_ARRAY_OID).register(self)
+
+
+def _loaders(register_enum: bool):
+    tx = Transformer(_Context(register_enum))
+    roles_oid = _USER_ROLE_ARRAY_OID if register_enum else 0  # 未註冊時 OID 未知，以字串載入
+    return (
+        tx.get_loader(postgres.types["uuid"].oid, Format.TEXT).load,
+        tx.get_loader(roles_oid, Format.TEXT).load,
+        tx.get_loader(postgres.types["text"].array_oid, Format.TEXT).load,
+    )
+
+
+@setup_benchmark(f"db.decode_rows.legacy.page{PAGE_SIZE}")
+def bench_decode_legacy():
+    rows = _wire_rows()
+    load_id, load_roles, load_skills = _loaders(register_enum=False)
+
+    def run():
+        out = []
+        for raw_id, raw_roles, raw_skills in rows:
+            row_id, roles, skills = load_id(raw_id), load_roles(raw_roles), load_skills(raw_skills)
+            out.append((
+                uuid.UUID(row_id) if isinstance(row_id, str) else row_id,
+                _legacy_parse_pg_array(roles),
+                _legacy_parse_pg_array(skills),
+            ))
+        return out
+
+    return run
+
+
+@setup_benchmark(f"db.decode_rows.psycopg.page{PAGE_SIZE}")
+def bench_decode_psycopg():
+    rows = _wire_rows()
+    load_id, load_roles, load_skills = _loaders(register_enum=True)
+
+    def run():
+        return [
+            (load_id(raw_id), load_roles(raw_roles), load_skills(raw_skills))
+            for raw_id, raw_roles, raw_skills in rows
+        ]
+
+    return run
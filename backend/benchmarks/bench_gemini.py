@@ -0,0 +1,20 @@
+"""
+Gemini 標題後處理 benchmark（不呼叫外部 API）
+"""
+from .harness import benchmark
+
+from app.services.gemini_service import clean_generated_title
+
+
+_SHORT = '"電商網站開發"\n'
+_LONG = "「智慧型多通路電商平台會員系統與金流整合暨後台管理系統開發」，包含完整的訂單流程。\r\n"
+
+
+@benchmark("gemini.clean_generated_title.short")
+def bench_clean_short():
+    clean_generated_title(_SHORT)
+
+
+@benchmark("gemini.clean_generated_title.truncate")
+def bench_clean_truncate():
+    clean_generated_title(_LONG)
@@ -0,0 +1,26 @@
+"""
+具名查詢（app/queries.py）編譯 benchmark
+
+engine 設定 compiled_cache=None，原本每次執行 text() 都要重新編譯；
+registry 的查詢只在第一次執行時編譯（之後命中 registry 專用的 compiled cache）
+
+- queries.compile.<名稱>：單一查詢編譯一次的成本（即每個請求省下的時間）
+"""
+from sqlalchemy.dialects.postgresql.psycopg import PGDialectAsync_psycopg
+
+from .harness import setup_benchmark
+
+from app import queries
+
+
+_DIALECT = PGDialectAsync_psycopg()
+
+
+def _register_compile_benchmark(query: queries.NamedQuery) -> None:
+    @setup_benchmark(f"queries.compile.{query.name}")
+    def bench():
+        return lambda: query.statement.compile(dialect=_DIALECT)
+
+
+for _query in queries.all_queries():
+    _register_compile_benchmark(_query)
@@ -0,0 +1,36 @@
+"""
+列表端點 row → dict 轉換 benchmark（每次量測一整頁）
+
+- 單獨轉換：各 router 的 _xxx_item(row)
+- dumps：轉換 + orjson 輸出（端點實際的完整路徑）
+"""
+from .fixtures import PAGE_SIZE, conversation_rows, project_rows
+from .harness import setup_benchmark
+
+from app.api.v1.conversations import _conversation_list_item
+from app.api.v1.projects import _project_list_item
+from app.responses import dumps
+
+
+@setup_benchmark(f"rows.list_projects.page{PAGE_SIZE}")
+def bench_project_rows():
+    rows = project_rows()
+    return lambda: [_project_list_item(row) for row in rows]
+
+
+@setup_benchmark(f"rows.list_projects.page{PAGE_SIZE}.dumps")
+def bench_project_rows_dumps():
+    rows = project_rows()
+    return lambda: dumps([_project_list_item(row) for row in rows])
+
+
+@setup_benchmark(f"rows.get_user_conversations.page{PAGE_SIZE}")
+def bench_conversation_rows():
+    rows = conversation_rows()
+    return lambda: [_conversation_list_item(row) for row in rows]
+
+
+@setup_benchmark(f"rows.get_user_conversations.page{PAGE_SIZE}.dumps")
+def bench_conversation_rows_dumps():
+    rows = conversation_rows()
+    return lambda: dumps([_conversation_list_item(row) for row in rows])
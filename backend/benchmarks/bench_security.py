@@ -0,0 +1,66 @@
+"""
+app.security JWT 相關 benchmark
+
+- security.decode_token：實際請求路徑（同一個 token 重複使用，命中快取）
+- security.decode_token.uncached：每次都完整驗證（目前 JWT_BACKEND）
+- security.jwt.<backend>.*：比較 python-jose 與 pyjwt 的簽發 / 驗證
+"""
+from .harness import benchmark, setup_benchmark
+
+from app.security import create_access_token, decode_token, get_jwt_backend, token_cache
+
+
+_PAYLOAD = {
+    "sub": "5f0c6a4e-3b7d-4c1e-9a2f-8d6b1e4c7a90",
+    "email": "user@example.com",
+    "roles": ["client", "freelancer"],
+}
+
+
+@benchmark("security.create_access_token")
+def bench_create_access_token():
+    create_access_token(_PAYLOAD)
+
+
+@setup_benchmark("security.decode_token")
+def bench_decode_token():
+    token = create_access_token(_PAYLOAD)
+    return lambda: decode_token(token)
+
+
+@setup_benchmark("security.decode_token.uncached")
+def bench_decode_token_uncached():
+    token = create_access_token(_PAYLOAD)
+    return lambda: decode_token(token, use_cache=False)
+
+
+@setup_benchmark("security.token_cache.miss_and_evict")
+def bench_token_cache_churn():
+    # 快取已滿時，每次都是新 token（最差情況：驗證 + 寫入 + 淘汰）
+    tokens = [create_access_token({**_PAYLOAD, "n": i}) for i in range(max(token_cache.max_entries, 1) * 2)]
+    state = {"i": 0}
+
+    def run():
+        i = state["i"]
+        state["i"] = (i + 1) % len(tokens)
+        decode_token(tokens[i])
+
+    return run
+
+
+def _register_backend(name: str) -> None:
+    @setup_benchmark(f"security.jwt.{name}.encode")
+    def bench_encode():
+        backend = get_jwt_backend(name)
+        claims = {**_PAYLOAD, "exp": 4102444800, "iat": 1700000000, "iss": "200ok"}
+        return lambda: backend.encode(claims)
+
+    @setup_benchmark(f"security.jwt.{name}.decode")
+    def bench_decode():
+        backend = get_jwt_backend(name)
+        token = create_access_token(_PAYLOAD)  # 兩種實作簽發的 token 互通
+        return lambda: backend.decode(token)
+
+
+for _name in ("jose", "pyjwt"):
+    _register_backend(_name)
@@ -0,0 +1,73 @@
+"""
+回應序列化 benchmark（每次量測一整頁 list_projects / get_user_conversations）
+
+- pydantic: 原本的路徑 —— response_model 驗證 + jsonable_encoder + stdlib json
+- orjson:   success_response() 直接回傳的路徑
+"""
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from .fixtures import PAGE_SIZE, conversation_rows, project_rows
+from .harness import setup_benchmark
+
+from app.api.v1.conversations import _conversation_list_item
+from app.api.v1.projects import _project_list_item
+from app.responses import dumps
+from app.schemas.common import SuccessResponse
+
+
+def _pydantic_render(model, content: dict) -> bytes:
+    """模擬 FastAPI serialize_response + starlette JSONResponse.render"""
+    validated = model.model_validate(content)
+    encoded = jsonable_encoder(validated.model_dump(mode="json"))
+    return json.dumps(
+        encoded,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _projects_page() -> dict:
+    return {
+        "success": True,
+        "data": {
+            "projects": [_project_list_item(row) for row in project_rows()],
+            "pagination": {"page": 1, "limit": PAGE_SIZE, "total": 1000, "total_pages": 10},
+        },
+        "message": None,
+    }
+
+
+def _conversations_page() -> dict:
+    return {
+        "success": True,
+        "data": [_conversation_list_item(row) for row in conversation_rows()],
+        "message": None,
+    }
+
+
+@setup_benchmark(f"serialize.list_projects.page{PAGE_SIZE}.pydantic")
+def bench_projects_pydantic():
+    content = _projects_page()
+    return lambda: _pydantic_render(SuccessResponse[dict], content)
+
+
+@setup_benchmark(f"serialize.list_projects.page{PAGE_SIZE}.orjson")
+def bench_projects_orjson():
+    content = _projects_page()
+    return lambda: dumps(content)
+
+
+@setup_benchmark(f"serialize.get_user_conversations.page{PAGE_SIZE}.pydantic")
+def bench_conversations_pydantic():
+    content = _conversations_page()
+    return lambda: _pydantic_render(SuccessResponse[list], content)
+
+
+@setup_benchmark(f"serialize.get_user_conversations.page{PAGE_SIZE}.orjson")
+def bench_conversations_orjson():
+    content = _conversations_page()
+    return lambda: dumps(content)
@@ -0,0 +1,14 @@
+"""
+冷啟動 benchmark
+
+在子程序中匯入 app.main（含 Python 直譯器啟動時間），
+詳細的各模組耗時請執行 `python -m benchmarks.import_time`
+"""
+from .harness import benchmark
+from .import_time import profile_import
+
+
+# 子程序啟動受檔案快取影響，門檻放寬
+@benchmark("startup.import_app_main", threshold=0.5)
+def bench_import_app_main():
+    profile_import("app.main")
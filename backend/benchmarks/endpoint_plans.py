@@ -0,0 +1,331 @@
+"""
+端點內嵌 SQL 的查詢計畫
+
+projects / bids / conversations / users 的端點大多直接以 text() 撰寫 SQL（不在 app/queries.py 註冊），
+這裡以代表性資料實際呼叫每個端點（in-process ASGI，不經網路），記錄端點執行的每一條 SQL，
+再於同一個交易內以相同參數執行 `EXPLAIN (FORMAT JSON)`，結果交由 query_plans 檢查 Seq Scan 與成本
+
+- 每個端點在一個交易內執行，結束後 rollback（端點內的 db.commit() 不會提交），不會留下任何資料
+- 已註冊的具名查詢由 query_plans 以 QUERY_PARAMS 檢查，這裡略過
+- 同一條 SQL 只檢查一次，名稱為「第一個執行它的端點 [SQL 的 sha1 前 8 碼]」
+- 路由沒有代表性呼叫（ENDPOINT_CALLS）也沒有列在 UNCHECKED_ENDPOINTS、
+  或呼叫回應 4xx / 5xx（沒有執行到端點的 SQL）都視為失敗
+
+匯入 app 前必須先以 configure_env() 將 DATABASE_URL 指向檢查用的資料庫
+"""
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from .query_plans import Sample
+
+
+API_PREFIX = "/api/v1"
+
+# 代表性呼叫使用的密碼（PUT /users/me/password 先在同一交易內把密碼設為此值）
+_PASSWORD = "plan-check-password"
+
+# 代幣相關端點先在同一交易內補足餘額
+_TOKEN_BALANCE = 100_000
+
+
+# ==================== 代表性呼叫 ====================
+
+@dataclass
+class EndpointCall:
+    """以代表性資料呼叫端點的參數"""
+    user_id: Optional[str]
+    path: str
+    params: dict = field(default_factory=dict)
+    json: Any = None
+    # 呼叫前在同一交易內執行的 SQL（補足端點的前置條件，不列入檢查）
+    setup: list[tuple[str, dict]] = field(default_factory=list)
+
+
+def _token_balance(user_id: str) -> tuple[str, dict]:
+    return (
+        """
+        INSERT INTO user_tokens (user_id, balance)
+        VALUES (CAST(:user_id AS uuid), :balance)
+        ON CONFLICT (user_id) DO UPDATE SET balance = EXCLUDED.balance
+        """,
+        {'user_id': user_id, 'balance': _TOKEN_BALANCE},
+    )
+
+
+def _known_password(user_id: str) -> tuple[str, dict]:
+    from app.security import hash_password
+
+    return (
+        "UPDATE users SET password_hash = :password_hash WHERE id = CAST(:user_id AS uuid)",
+        {'user_id': user_id, 'password_hash': hash_password(_PASSWORD)},
+    )
+
+
+def _new_project(s: Sample) -> EndpointCall:
+    return EndpointCall(s.client_id, "/projects", json={
+        "title": "Plan check project",
+        "description": "查詢計畫檢查用的案件描述",
+        "budget_min": 10000,
+        "budget_max": 30000,
+        "required_skills": ["Python", "PostgreSQL"],
+    })
+
+
+def _new_bid(s: Sample) -> EndpointCall:
+    return EndpointCall(
+        s.new_bidder_id,
+        f"/bids/projects/{s.open_project_id}/bids",
+        json={
+            "project_id": s.open_project_id,
+            "proposal": "查詢計畫檢查用的提案內容，至少二十個字元。",
+            "bid_amount": 20000,
+            "estimated_days": 30,
+        },
+        setup=[_token_balance(s.new_bidder_id)],
+    )
+
+
+# "METHOD 路由路徑"（含 router prefix，不含 /api/v1）→ 代表性呼叫
+ENDPOINT_CALLS: dict[str, Callable[[Sample], EndpointCall]] = {
+    # projects
+    "GET /projects": lambda s: EndpointCall(s.saver_id, "/projects"),
+    "POST /projects": _new_project,
+    "GET /projects/{project_id}": lambda s: EndpointCall(s.saver_id, f"/projects/{s.open_project_id}"),
+    "GET /projects/me/list": lambda s: EndpointCall(s.client_id, "/projects/me/list"),
+    "PUT /projects/{project_id}": lambda s: EndpointCall(
+        s.client_id, f"/projects/{s.open_project_id}", json={"status": "completed"}
+    ),
+    "POST /projects/{project_id}/publish": lambda s: EndpointCall(
+        s.draft_client_id, f"/projects/{s.draft_project_id}/publish"
+    ),
+    "POST /projects/{project_id}/cancel": lambda s: EndpointCall(
+        s.client_id, f"/projects/{s.open_project_id}/cancel"
+    ),
+    "DELETE /projects/{project_id}": lambda s: EndpointCall(s.client_id, f"/projects/{s.open_project_id}"),
+    # bids
+    "GET /bids/me": lambda s: EndpointCall(s.freelancer_id, "/bids/me"),
+    "GET /bids/{bid_id}": lambda s: EndpointCall(s.client_id, f"/bids/{s.pending_bid_id}"),
+    "POST /bids/{bid_id}/accept": lambda s: EndpointCall(s.client_id, f"/bids/{s.pending_bid_id}/accept"),
+    "POST /bids/{bid_id}/reject": lambda s: EndpointCall(s.client_id, f"/bids/{s.pending_bid_id}/reject"),
+    "POST /bids/{bid_id}/withdraw": lambda s: EndpointCall(
+        s.pending_bidder_id, f"/bids/{s.pending_bid_id}/withdraw"
+    ),
+    "POST /bids/projects/{project_id}/bids": _new_bid,
+    "GET /bids/projects/{project_id}/bids": lambda s: EndpointCall(
+        s.client_id, f"/bids/projects/{s.open_project_id}/bids"
+    ),
+    # conversations
+    "GET /conversations": lambda s: EndpointCall(s.participant_id, "/conversations"),
+    "GET /conversations/sync": lambda s: EndpointCall(s.participant_id, "/conversations/sync"),
+    "POST /conversations/direct": lambda s: EndpointCall(
+        s.participant_id,
+        "/conversations/direct",
+        json={"recipient_id": s.direct_recipient_id},
+        setup=[_token_balance(s.participant_id)],
+    ),
+    "POST /conversations/unlock-proposal": lambda s: EndpointCall(
+        s.proposal_recipient_id,
+        "/conversations/unlock-proposal",
+        json={"conversation_id": s.proposal_conversation_id},
+        setup=[_token_balance(s.proposal_recipient_id)],
+    ),
+    "GET /conversations/{conversation_id}": lambda s: EndpointCall(
+        s.unlocked_participant_id, f"/conversations/{s.unlocked_conversation_id}"
+    ),
+    "GET /conversations/{conversation_id}/messages": lambda s: EndpointCall(
+        s.unlocked_participant_id, f"/conversations/{s.unlocked_conversation_id}/messages"
+    ),
+    "POST /conversations/{conversation_id}/messages": lambda s: EndpointCall(
+        s.unlocked_participant_id,
+        f"/conversations/{s.unlocked_conversation_id}/messages",
+        json={"content": "查詢計畫檢查"},
+    ),
+    "GET /conversations/me/unread-count": lambda s: EndpointCall(s.participant_id, "/conversations/me/unread-count"),
+    "POST /conversations/{conversation_id}/mark-read": lambda s: EndpointCall(
+        s.unlocked_participant_id, f"/conversations/{s.unlocked_conversation_id}/mark-read"
+    ),
+    # users
+    "GET /users/search": lambda s: EndpointCall(None, "/users/search", params={"skills[]": "Python"}),
+    "GET /users/search/freelancers": lambda s: EndpointCall(
+        None, "/users/search/freelancers", params={"skills[]": "Python"}
+    ),
+    "GET /users/me/profile": lambda s: EndpointCall(s.freelancer_id, "/users/me/profile"),
+    "PUT /users/me/profile": lambda s: EndpointCall(
+        s.freelancer_id, "/users/me/profile", json={"bio": "查詢計畫檢查", "skills": ["Python", "Go"]}
+    ),
+    "PUT /users/me/password": lambda s: EndpointCall(
+        s.freelancer_id,
+        "/users/me/password",
+        json={"current_password": _PASSWORD, "new_password": _PASSWORD + "-new"},
+        setup=[_known_password(s.freelancer_id)],
+    ),
+    "PUT /users/me/skills": lambda s: EndpointCall(s.freelancer_id, "/users/me/skills", json=["Python", "Go"]),
+    "GET /users/{user_id}/reviews": lambda s: EndpointCall(None, f"/users/{s.freelancer_id}/reviews"),
+    "GET /users/{user_id}/stats": lambda s: EndpointCall(None, f"/users/{s.freelancer_id}/stats"),
+    "GET /users/{user_id}": lambda s: EndpointCall(None, f"/users/{s.freelancer_id}"),
+}
+
+# 刻意不檢查的路由 {"METHOD 路由路徑": 原因}
+UNCHECKED_ENDPOINTS: dict[str, str] = {}
+
+
+# ==================== 執行 ====================
+
+@dataclass
+class EndpointPlan:
+    """端點 SQL 的查詢計畫（或無法取得的原因）"""
+    name: str
+    plan: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def configure_env(database_url: str) -> None:
+    """
+    匯入 app 前設定環境變數
+
+    DATABASE_URL 一律覆蓋為檢查用的資料庫（不沿用 .env / 環境中的正式環境設定），
+    並關閉 Gemini 與 rate limit，避免呼叫外部服務或被限流
+    """
+    scheme, sep, rest = database_url.partition("://")
+    os.environ["DATABASE_URL"] = "postgresql+psycopg" + sep + rest
+    os.environ["GEMINI_API_KEY"] = ""
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+
+def _routes() -> list[str]:
+    """projects / bids / conversations / users 的全部路由（"METHOD 路由路徑"）"""
+    from app.api.v1 import bids, conversations, projects, users
+
+    keys = []
+    for module in (projects, bids, conversations, users):
+        for route in module.router.routes:
+            for method in sorted(route.methods):
+                keys.append(f"{method} {route.path}")
+    return keys
+
+
+def _coverage_errors() -> list[EndpointPlan]:
+    routes = _routes()
+    errors = [
+        EndpointPlan(name=key, error="沒有代表性呼叫，請在 benchmarks/endpoint_plans.py 的 ENDPOINT_CALLS 加入此端點")
+        for key in routes
+        if key not in ENDPOINT_CALLS and key not in UNCHECKED_ENDPOINTS
+    ]
+    errors += [
+        EndpointPlan(name=key, error="路由不存在，請更新 ENDPOINT_CALLS / UNCHECKED_ENDPOINTS")
+        for key in [*ENDPOINT_CALLS, *UNCHECKED_ENDPOINTS]
+        if key not in routes
+    ]
+    return errors
+
+
+def _is_plannable(statement: str) -> bool:
+    words = statement.split(None, 1)
+    return bool(words) and words[0].upper() in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+class _NoCommitConnection:
+    """端點看到的 db：commit() 不提交，整個呼叫由外層交易 rollback"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    async def commit(self) -> None:
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+async def explain_endpoints(sample: Sample) -> list[EndpointPlan]:
+    """呼叫每個端點並取得其內嵌 SQL 的查詢計畫"""
+    import httpx
+    from sqlalchemy import event, text
+
+    from app import queries
+    from app.db import engine, get_db
+    from app.main import app
+    from app.security import create_access_token
+
+    results = _coverage_errors()
+    registered = {id(q.statement) for q in queries.all_queries()}
+    captured: Optional[list[tuple[str, Any]]] = None
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if captured is None or executemany:
+            return
+        compiled = getattr(context, "compiled", None)
+        if compiled is not None and id(compiled.statement) in registered:
+            return
+        if _is_plannable(statement):
+            captured.append((statement, parameters))
+
+    seen: set[str] = set()
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://plan-check") as client:
+            for key, make_call in ENDPOINT_CALLS.items():
+                call = make_call(sample)
+                method = key.split(" ", 1)[0]
+                headers = {}
+                if call.user_id:
+                    token = create_access_token({"userId": call.user_id})
+                    headers["Authorization"] = f"Bearer {token}"
+
+                async with engine.connect() as conn:
+                    trans = await conn.begin()
+                    try:
+                        for sql, params in call.setup:
+                            await conn.execute(text(sql), params)
+
+                        async def override_db():
+                            return _NoCommitConnection(conn)
+
+                        app.dependency_overrides[get_db] = override_db
+                        captured = []
+                        try:
+                            response = await client.request(
+                                method, API_PREFIX + call.path,
+                                params=call.params, json=call.json, headers=headers,
+                            )
+                        except Exception as e:
+                            results.append(EndpointPlan(name=key, error=f"呼叫失敗: {e!r}"))
+                            continue
+                        finally:
+                            statements, captured = captured, None
+
+                        if response.status_code >= 400:
+                            results.append(EndpointPlan(
+                                name=key,
+                                error=f"回應 {response.status_code}（未執行到端點的 SQL）: {response.text[:200]}",
+                            ))
+                            continue
+
+                        for statement, parameters in statements:
+                            if statement in seen:
+                                continue
+                            seen.add(statement)
+                            digest = hashlib.sha1(statement.encode()).hexdigest()[:8]
+                            plan = EndpointPlan(name=f"{key} [{digest}]")
+                            # 同一交易內執行：看得到 setup 與端點稍早寫入的資料，參數綁定方式與端點相同；
+                            # 以 savepoint 隔開，單一 EXPLAIN 失敗不影響其他語句
+                            try:
+                                async with conn.begin_nested():
+                                    explain = await conn.exec_driver_sql(
+                                        "EXPLAIN (FORMAT JSON) " + statement, parameters
+                                    )
+                                    plan.plan = explain.scalar()[0]["Plan"]
+                            except Exception as e:
+                                plan.error = f"EXPLAIN 失敗: {e}"
+                            results.append(plan)
+                    finally:
+                        app.dependency_overrides.pop(get_db, None)
+                        await trans.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+        await engine.dispose()
+
+    return results
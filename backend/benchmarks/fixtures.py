@@ -0,0 +1,120 @@
+"""
+Benchmark 共用的假資料
+以 namedtuple 模擬 SQLAlchemy Row（同樣支援屬性存取）
+"""
+import base64
+import io
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+
+# 一頁列表的筆數（與前端預設分頁一致）
+PAGE_SIZE = 100
+
+_NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+ProjectListRow = namedtuple("ProjectListRow", [
+    "id", "client_id", "title", "description", "ai_summary", "project_mode",
+    "project_type", "budget_min", "budget_max", "status", "required_skills",
+    "created_at", "updated_at", "client_user_id", "client_name",
+    "client_avatar_url", "client_rating", "bids_count", "is_saved",
+])
+
+
+ConversationListRow = namedtuple("ConversationListRow", [
+    "id", "type", "project_id", "is_unlocked", "initiator_id", "recipient_id",
+    "created_at", "updated_at", "initiator_id_full", "initiator_name",
+    "initiator_avatar_url", "recipient_id_full", "recipient_name",
+    "recipient_avatar_url", "project_id_full", "project_title",
+    "last_message_content", "last_message_created_at", "unread_count",
+    "initiator_unlocked_at", "recipient_unlocked_at", "expires_at",
+])
+
+
+def project_rows(count: int = PAGE_SIZE) -> list:
+    """產生 list_projects 主查詢的假資料"""
+    rows = []
+    for i in range(count):
+        project_id = uuid.uuid4()
+        client_id = uuid.uuid4()
+        rows.append(ProjectListRow(
+            id=project_id,
+            client_id=client_id,
+            title=f"電商網站開發專案 #{i}",
+            description="需要一個具備會員系統、購物車、金流串接的電商網站。" * 5,
+            ai_summary="本專案為中型電商網站開發，包含會員、購物車與金流功能。",
+            project_mode="new_development",
+            project_type="website",
+            budget_min=Decimal("30000.00"),
+            budget_max=Decimal("80000.00") if i % 5 else None,
+            status="open",
+            required_skills=["React", "Next.js", "PostgreSQL", "TypeScript"],  # psycopg 已解析為 list
+            created_at=_NOW - timedelta(hours=i),
+            updated_at=_NOW - timedelta(hours=i),
+            client_user_id=client_id,
+            client_name=f"發案者 {i}",
+            client_avatar_url=None,
+            client_rating=Decimal("4.50") if i % 3 else None,
+            bids_count=i % 7,
+            is_saved=bool(i % 2),
+        ))
+    return rows
+
+
+def conversation_rows(count: int = PAGE_SIZE) -> list:
+    """產生 get_user_conversations 查詢的假資料"""
+    rows = []
+    for i in range(count):
+        conversation_id = uuid.uuid4()
+        initiator_id = uuid.uuid4()
+        recipient_id = uuid.uuid4()
+        project_id = uuid.uuid4() if i % 2 else None
+        rows.append(ConversationListRow(
+            id=conversation_id,
+            type="project_proposal" if project_id else "direct",
+            project_id=project_id,
+            is_unlocked=bool(i % 3),
+            initiator_id=initiator_id,
+            recipient_id=recipient_id,
+            created_at=_NOW - timedelta(days=i),
+            updated_at=_NOW - timedelta(minutes=i),
+            initiator_id_full=initiator_id,
+            initiator_name=f"接案者 {i}",
+            initiator_avatar_url=None,
+            recipient_id_full=recipient_id,
+            recipient_name=f"發案者 {i}",
+            recipient_avatar_url=None,
+            project_id_full=project_id,
+            project_title=f"電商網站開發專案 #{i}" if project_id else None,
+            last_message_content="您好，我對這個案件很有興趣，想進一步了解需求細節。",
+            last_message_created_at=_NOW - timedelta(minutes=i),
+            unread_count=i % 4,
+            initiator_unlocked_at=_NOW if i % 2 else None,
+            recipient_unlocked_at=_NOW if i % 4 == 0 else None,
+            expires_at=_NOW + timedelta(days=30) if i % 2 else None,
+        ))
+    return rows
+
+
+def avatar_data_uri(size: tuple = (1024, 768), fmt: str = "PNG") -> str:
+    """產生頭像上傳用的 Base64 data URI"""
+    from PIL import Image
+
+    image = Image.new("RGBA", size)
+    # 填入漸層避免壓縮器遇到全單色圖片而過度樂觀
+    pixels = image.load()
+    for x in range(0, size[0], 4):
+        for y in range(0, size[1], 4):
+            pixels[x, y] = (x % 256, y % 256, (x + y) % 256, 255)
+
+    # JPEG 不支援 alpha channel
+    if fmt == "JPEG":
+        image = image.convert("RGB")
+
+    output = io.BytesIO()
+    image.save(output, format=fmt)
+    encoded = base64.b64encode(output.getvalue()).decode("utf-8")
+    return f"data:image/{fmt.lower()};base64,{encoded}"
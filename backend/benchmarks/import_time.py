@@ -0,0 +1,130 @@
+"""
+啟動時間（import time）量測
+
+以 `python -X importtime` 在子程序中匯入 app.main，列出耗時最多的模組，
+用於檢查冷啟動（Cloud Run scale-to-zero）時不需要的重量級套件是否又被提前匯入
+
+使用方式（在 backend/ 目錄下執行）:
+    python -m benchmarks.import_time                 # 匯入 app.main，列出前 25 名
+    python -m benchmarks.import_time --top 50
+    python -m benchmarks.import_time -m app.api.v1.avatar
+    python -m benchmarks.import_time --runs 5        # 取多次中最快的一次
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .harness import ensure_env
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 冷啟動時不應被匯入的套件（只有特定端點才會用到）
+LAZY_PACKAGES = ("PIL", "resend", "httpx", "jose", "jwt")
+
+
+@dataclass
+class ImportRecord:
+    """單一模組的匯入耗時"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    """一次匯入的量測結果"""
+    wall_seconds: float
+    records: list[ImportRecord]
+
+    @property
+    def modules(self) -> set[str]:
+        return {r.module for r in self.records}
+
+
+def parse_importtime(stderr: str) -> list[ImportRecord]:
+    """解析 `-X importtime` 的輸出"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 標題列
+        name = parts[2][1:]
+        stripped = name.lstrip(" ")
+        records.append(ImportRecord(
+            module=stripped,
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            depth=(len(name) - len(stripped)) // 2,
+        ))
+    return records
+
+
+def profile_import(module: str = "app.main") -> ImportProfile:
+    """在全新的子程序中匯入 module 並量測（不受目前程序已匯入模組影響）"""
+    ensure_env()
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"匯入 {module} 失敗:\n{tail}")
+    return ImportProfile(wall_seconds=wall, records=parse_importtime(proc.stderr))
+
+
+def print_report(profile: ImportProfile, module: str, top: int) -> None:
+    """印出耗時最多的模組與頂層套件"""
+    total_us = sum(r.self_us for r in profile.records)
+    print(f"匯入 {module}: 子程序總耗時 {profile.wall_seconds * 1000:.0f} ms，"
+          f"import 合計 {total_us / 1000:.0f} ms，{len(profile.records)} 個模組\n")
+
+    # 依頂層套件彙總 self time
+    packages: dict[str, int] = {}
+    for r in profile.records:
+        package = r.module.split(".")[0]
+        packages[package] = packages.get(package, 0) + r.self_us
+
+    print(f"{'頂層套件':<32} {'self':>10}")
+    for package, us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{package:<32} {us / 1000:>8.1f}ms")
+
+    print(f"\n{'模組（cumulative）':<48} {'self':>10} {'cumulative':>12}")
+    for r in sorted(profile.records, key=lambda r: -r.cumulative_us)[:top]:
+        print(f"{r.module:<48} {r.self_us / 1000:>8.1f}ms {r.cumulative_us / 1000:>10.1f}ms")
+
+    eager = sorted(
+        m for m in profile.modules
+        if any(m == p or m.startswith(p + ".") for p in LAZY_PACKAGES)
+    )
+    if eager:
+        print(f"\n⚠️ 啟動時匯入了應延遲載入的模組: {', '.join(eager[:10])}"
+              f"{' ...' if len(eager) > 10 else ''}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="量測匯入時間（冷啟動）")
+    parser.add_argument("-m", "--module", default="app.main", help="要匯入的模組（預設 app.main）")
+    parser.add_argument("--top", type=int, default=25, help="列出前幾名（預設 25）")
+    parser.add_argument("--runs", type=int, default=3, help="量測次數，取最快的一次（預設 3）")
+    args = parser.parse_args()
+
+    profiles = [profile_import(args.module) for _ in range(max(args.runs, 1))]
+    print_report(min(profiles, key=lambda p: p.wall_seconds), args.module, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+管理指令
+
+使用方式（在 backend/ 目錄下執行）:
+    python manage.py rebuild-user-stats
+    python manage.py backfill-ratings
+    python manage.py rebuild-freelancer-directory
+    python manage.py refresh-admin-rollups [--since YYYY-MM-DD]
+    python manage.py purge-expired-tokens
+    python manage.py rebuild-unread-counts
+    python manage.py maintain-partitions
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date
+
+from app.db import engine, get_db_connection
+
+
+async def rebuild_user_stats(args: argparse.Namespace) -> None:
+    """由 projects / bids / reviews 重新計算 user_stats"""
+    from app.services import user_stats
+
+    print("⏳ 重新計算 user_stats...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        count = await user_stats.rebuild(conn)
+    print(f"✅ 已更新 {count} 位使用者的統計（{time.perf_counter() - started:.2f}s）")
+
+
+async def backfill_ratings(args: argparse.Namespace) -> None:
+    """由 reviews 重新計算評分統計與 users.rating"""
+    from app.services import user_stats
+
+    print("⏳ 重新計算評分統計...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        count = await user_stats.backfill_ratings(conn)
+    print(f"✅ 已更新 {count} 位使用者的平均評分（{time.perf_counter() - started:.2f}s）")
+
+
+async def rebuild_freelancer_directory(args: argparse.Namespace) -> None:
+    """由 users / user_stats 重新建立 freelancer_directory"""
+    from app.services import freelancer_directory
+
+    print("⏳ 重新建立接案者目錄...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        count = await freelancer_directory.rebuild(conn)
+    print(f"✅ 已寫入 {count} 位接案者（{time.perf_counter() - started:.2f}s）")
+
+
+async def refresh_admin_rollups(args: argparse.Namespace) -> None:
+    """重算管理後台每日統計與總數快照"""
+    from app.services import admin_rollups
+
+    since = date.fromisoformat(args.since) if args.since else None
+    print(f"⏳ 重算管理後台統計（自 {since or '最早的資料'} 起）...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        refreshed = await admin_rollups.refresh(conn, since)
+    if not refreshed:
+        raise RuntimeError("其他程序正在重算，請稍後再試")
+    print(f"✅ 完成（{time.perf_counter() - started:.2f}s）")
+
+
+async def purge_expired_tokens(args: argparse.Namespace) -> None:
+    """清除過期的 refresh / email 驗證 token"""
+    from app.services import refresh_tokens
+
+    print("⏳ 清除過期 token...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        purged = await refresh_tokens.purge_expired(conn)
+    print(
+        f"✅ 已刪除 {purged['refresh_tokens']} 筆 refresh token、"
+        f"{purged['email_verification_tokens']} 筆 email 驗證 token"
+        f"（{time.perf_counter() - started:.2f}s）"
+    )
+
+
+async def rebuild_unread_counts(args: argparse.Namespace) -> None:
+    """由已讀位置重新計算各對話的未讀數"""
+    from app.services import conversation_reads
+
+    print("⏳ 重新計算未讀數...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        count = await conversation_reads.rebuild(conn)
+    print(f"✅ 已更新 {count} 個對話的未讀數（{time.perf_counter() - started:.2f}s）")
+
+
+async def maintain_partitions(args: argparse.Namespace) -> None:
+    """建立未來的按月分區並封存過期的分區"""
+    from app.config import settings
+    from app.services import partitions
+
+    print(f"⏳ 建立未來 {settings.PARTITION_MONTHS_AHEAD} 個月的分區並封存過期的分區...")
+    started = time.perf_counter()
+    async with get_db_connection() as conn:
+        summary = await partitions.maintain(
+            conn, settings.PARTITION_MONTHS_AHEAD, partitions.retention_settings()
+        )
+    if summary is None:
+        raise RuntimeError("其他程序正在維護分區，請稍後再試")
+    for table, item in summary.items():
+        archived = "、".join(item["archived"]) or "無"
+        print(f"   {table}: 新增 {item['created']} 個分區，封存: {archived}")
+    print(f"✅ 完成（{time.perf_counter() - started:.2f}s）")
+
+
+COMMANDS = {
+    "rebuild-user-stats": (rebuild_user_stats, "重新計算所有使用者的統計（user_stats）"),
+    "backfill-ratings": (backfill_ratings, "重新計算評分統計（評價數、各星數）並同步 users.rating"),
+    "rebuild-freelancer-directory": (
+        rebuild_freelancer_directory,
+        "重新建立接案者目錄（freelancer_directory，需先完成 user_stats）",
+    ),
+    "refresh-admin-rollups": (refresh_admin_rollups, "重算管理後台統計（admin_daily_stats / admin_stats_snapshot）"),
+    "purge-expired-tokens": (purge_expired_tokens, "清除過期的 refresh token 與 email 驗證 token"),
+    "rebuild-unread-counts": (rebuild_unread_counts, "由已讀位置重新計算各對話的未讀數"),
+    "maintain-partitions": (maintain_partitions, "建立未來的按月分區並封存過期的分區（messages / token_transactions / notifications）"),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="manage.py", description="200 OK 後端管理指令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text)
+    subparsers.choices["refresh-admin-rollups"].add_argument(
+        "--since", help="從此日期（YYYY-MM-DD，含）開始重算，預設為全部歷史"
+    )
+
+    args = parser.parse_args()
+    handler, _ = COMMANDS[args.command]
+
+    async def run() -> None:
+        try:
+            await handler(args)
+        finally:
+            await engine.dispose()
+
+    try:
+        asyncio.run(run())
+    except Exception as e:
+        print(f"❌ 執行失敗: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
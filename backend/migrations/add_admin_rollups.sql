@@ -0,0 +1,149 @@
+-- 管理後台統計彙總（Rollup）
+-- 管理後台每次載入原本都要對 users / projects / bids 執行十多個 COUNT(*)，
+-- 與一般使用者的請求搶同一個小連線池
+-- 改為定期（讀取時超過 ADMIN_STATS_MAX_AGE_SECONDS 才）重算的彙總表：
+-- - admin_stats_snapshot：總數與各狀態案件數（單一資料列）
+-- - admin_daily_stats：每日註冊、案件、提案與代幣流量（UTC 日期）
+-- 由 app/services/admin_rollups.py 呼叫；補算歷史資料執行 `python manage.py refresh-admin-rollups`
+
+-- ==================== 彙總表 ====================
+
+CREATE TABLE IF NOT EXISTS admin_stats_snapshot (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    total_users INTEGER NOT NULL DEFAULT 0,
+    total_projects INTEGER NOT NULL DEFAULT 0,
+    total_bids INTEGER NOT NULL DEFAULT 0,
+    projects_by_status JSONB NOT NULL DEFAULT '{}',
+    refreshed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS admin_daily_stats (
+    day DATE PRIMARY KEY,
+    signups INTEGER NOT NULL DEFAULT 0,
+    projects_created INTEGER NOT NULL DEFAULT 0,
+    bids_created INTEGER NOT NULL DEFAULT 0,
+    tokens_spent INTEGER NOT NULL DEFAULT 0,
+    tokens_credited INTEGER NOT NULL DEFAULT 0,
+    token_transactions INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 每次只重算最近幾天，以 created_at 範圍掃描
+CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at);
+CREATE INDEX IF NOT EXISTS idx_bids_created_at ON bids(created_at);
+CREATE INDEX IF NOT EXISTS idx_token_transactions_created_at ON token_transactions(created_at);
+
+-- 註解
+COMMENT ON TABLE admin_stats_snapshot IS '管理後台總數快照（單一資料列）';
+COMMENT ON COLUMN admin_stats_snapshot.projects_by_status IS '各狀態案件數（{status: count}）';
+COMMENT ON COLUMN admin_stats_snapshot.refreshed_at IS '最後重算時間';
+COMMENT ON TABLE admin_daily_stats IS '管理後台每日統計（UTC 日期）';
+COMMENT ON COLUMN admin_daily_stats.day IS '日期（UTC）';
+COMMENT ON COLUMN admin_daily_stats.signups IS '新註冊使用者數';
+COMMENT ON COLUMN admin_daily_stats.projects_created IS '新建立案件數';
+COMMENT ON COLUMN admin_daily_stats.bids_created IS '新提交提案數';
+COMMENT ON COLUMN admin_daily_stats.tokens_spent IS '代幣支出總量（扣款）';
+COMMENT ON COLUMN admin_daily_stats.tokens_credited IS '代幣入帳總量（儲值、贈送、退款）';
+COMMENT ON COLUMN admin_daily_stats.token_transactions IS '代幣交易筆數';
+
+
+-- ==================== 重算 ====================
+
+-- 重算 p_since（含）之後的每日統計與總數快照
+-- p_since 為 NULL 時從第一位使用者註冊日開始（補算全部歷史）
+-- 多個 instance 同時呼叫時只有一個會執行，其餘回傳 FALSE
+CREATE OR REPLACE FUNCTION admin_rollups_refresh(p_since DATE DEFAULT NULL)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_since DATE;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('admin_rollups_refresh')) THEN
+        RETURN FALSE;
+    END IF;
+
+    v_since := COALESCE(p_since, (SELECT MIN(created_at)::date FROM users), CURRENT_DATE);
+
+    INSERT INTO admin_daily_stats (
+        day, signups, projects_created, bids_created,
+        tokens_spent, tokens_credited, token_transactions, updated_at
+    )
+    SELECT
+        d.day,
+        COALESCE(u.n, 0),
+        COALESCE(p.n, 0),
+        COALESCE(b.n, 0),
+        COALESCE(t.spent, 0),
+        COALESCE(t.credited, 0),
+        COALESCE(t.n, 0),
+        NOW()
+    FROM (
+        SELECT generate_series(v_since, CURRENT_DATE, INTERVAL '1 day')::date AS day
+    ) d
+    LEFT JOIN (
+        SELECT created_at::date AS day, COUNT(*) AS n
+        FROM users
+        WHERE created_at >= v_since
+        GROUP BY 1
+    ) u ON u.day = d.day
+    LEFT JOIN (
+        SELECT created_at::date AS day, COUNT(*) AS n
+        FROM projects
+        WHERE created_at >= v_since
+        GROUP BY 1
+    ) p ON p.day = d.day
+    LEFT JOIN (
+        SELECT created_at::date AS day, COUNT(*) AS n
+        FROM bids
+        WHERE created_at >= v_since
+        GROUP BY 1
+    ) b ON b.day = d.day
+    LEFT JOIN (
+        SELECT
+            created_at::date AS day,
+            COUNT(*) AS n,
+            SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END) AS spent,
+            SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) AS credited
+        FROM token_transactions
+        WHERE created_at >= v_since
+        GROUP BY 1
+    ) t ON t.day = d.day
+    ON CONFLICT (day) DO UPDATE SET
+        signups = EXCLUDED.signups,
+        projects_created = EXCLUDED.projects_created,
+        bids_created = EXCLUDED.bids_created,
+        tokens_spent = EXCLUDED.tokens_spent,
+        tokens_credited = EXCLUDED.tokens_credited,
+        token_transactions = EXCLUDED.token_transactions,
+        updated_at = NOW();
+
+    INSERT INTO admin_stats_snapshot (
+        id, total_users, total_projects, total_bids, projects_by_status, refreshed_at
+    )
+    SELECT
+        1,
+        (SELECT COUNT(*) FROM users),
+        (SELECT COUNT(*) FROM projects),
+        (SELECT COUNT(*) FROM bids),
+        COALESCE(
+            (SELECT jsonb_object_agg(status, n)
+             FROM (SELECT status, COUNT(*) AS n FROM projects GROUP BY status) s),
+            '{}'::jsonb
+        ),
+        NOW()
+    ON CONFLICT (id) DO UPDATE SET
+        total_users = EXCLUDED.total_users,
+        total_projects = EXCLUDED.total_projects,
+        total_bids = EXCLUDED.total_bids,
+        projects_by_status = EXCLUDED.projects_by_status,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    RETURN TRUE;
+END;
+$$;
+
+COMMENT ON FUNCTION admin_rollups_refresh(DATE) IS '重算管理後台每日統計與總數快照';
+
+-- 初始資料（補算全部歷史）
+SELECT admin_rollups_refresh(NULL);
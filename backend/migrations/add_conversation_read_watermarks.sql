@@ -0,0 +1,100 @@
+-- 對話已讀位置（Read Watermarks）
+-- 標記已讀原本以 UPDATE messages SET is_read = TRUE 更新每一則未讀訊息，再 COUNT 一次；
+-- 對話列表與未讀數端點也都以 is_read 掃描 messages
+-- 改為每位參與者在 conversations 上記錄已讀到哪一則訊息與未讀數：
+-- 發送訊息時對方的未讀數 +1，標記已讀只更新對話這一列，訊息的 is_read 由 watermark 推導
+-- 由 app/services/conversation_reads.py 維護；資料不一致時執行 `python manage.py rebuild-unread-counts`
+-- 需先執行 add_messages_cursor_index.sql（watermark 以 (created_at, id) 比較）
+-- 已套用先前版本（標記已讀會更新 updated_at）的資料庫請改執行 repair_conversations_updated_at.sql
+
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS initiator_last_read_message_id UUID;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS initiator_last_read_at TIMESTAMP;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS initiator_unread_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS recipient_last_read_message_id UUID;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS recipient_last_read_at TIMESTAMP;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS recipient_unread_count INTEGER NOT NULL DEFAULT 0;
+
+-- 註解
+COMMENT ON COLUMN conversations.initiator_last_read_message_id IS '發起者已讀到的最後一則訊息';
+COMMENT ON COLUMN conversations.initiator_last_read_at IS '發起者已讀到的最後一則訊息的建立時間';
+COMMENT ON COLUMN conversations.initiator_unread_count IS '發起者的未讀訊息數（對方在 watermark 之後發送的訊息）';
+COMMENT ON COLUMN conversations.recipient_last_read_message_id IS '接收者已讀到的最後一則訊息';
+COMMENT ON COLUMN conversations.recipient_last_read_at IS '接收者已讀到的最後一則訊息的建立時間';
+COMMENT ON COLUMN conversations.recipient_unread_count IS '接收者的未讀訊息數（對方在 watermark 之後發送的訊息）';
+
+
+-- ==================== updated_at trigger ====================
+-- conversations.updated_at 代表最後活動時間（對話列表依此排序），
+-- 原本的 update_updated_at_column() 在任何 UPDATE 都設為 NOW()，標記已讀會讓舊對話跳到最上面
+-- 改為只有 TG_ARGV 以外的欄位變動時才更新；只變動 TG_ARGV 欄位時保留 updated_at（或 UPDATE 指定的值）
+CREATE OR REPLACE FUNCTION update_updated_at_column_except()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - TG_ARGV - 'updated_at'::text) IS DISTINCT FROM (to_jsonb(OLD) - TG_ARGV - 'updated_at'::text) THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_conversations_updated_at ON conversations;
+CREATE TRIGGER update_conversations_updated_at BEFORE UPDATE ON conversations
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column_except(
+        'initiator_last_read_message_id', 'initiator_last_read_at', 'initiator_unread_count',
+        'recipient_last_read_message_id', 'recipient_last_read_at', 'recipient_unread_count'
+    );
+
+
+-- ==================== 初始資料 ====================
+-- 回填期間停用 updated_at trigger，避免所有對話的 updated_at 被改為執行時間
+BEGIN;
+
+ALTER TABLE conversations DISABLE TRIGGER update_conversations_updated_at;
+
+-- 初始 watermark：對方發送、已標記 is_read 的最後一則訊息
+UPDATE conversations c
+SET initiator_last_read_message_id = last_read.id,
+    initiator_last_read_at = last_read.created_at
+FROM (
+    SELECT DISTINCT ON (m.conversation_id) m.conversation_id, m.id, m.created_at
+    FROM messages m
+    JOIN conversations c2 ON c2.id = m.conversation_id
+    WHERE m.sender_id = c2.recipient_id AND m.is_read = TRUE
+    ORDER BY m.conversation_id, m.created_at DESC, m.id DESC
+) last_read
+WHERE c.id = last_read.conversation_id;
+
+UPDATE conversations c
+SET recipient_last_read_message_id = last_read.id,
+    recipient_last_read_at = last_read.created_at
+FROM (
+    SELECT DISTINCT ON (m.conversation_id) m.conversation_id, m.id, m.created_at
+    FROM messages m
+    JOIN conversations c2 ON c2.id = m.conversation_id
+    WHERE m.sender_id = c2.initiator_id AND m.is_read = TRUE
+    ORDER BY m.conversation_id, m.created_at DESC, m.id DESC
+) last_read
+WHERE c.id = last_read.conversation_id;
+
+-- 初始未讀數（與 rebuild-unread-counts 相同）
+UPDATE conversations c
+SET initiator_unread_count = (
+        SELECT COUNT(*)
+        FROM messages m
+        WHERE m.conversation_id = c.id
+          AND m.sender_id = c.recipient_id
+          AND (c.initiator_last_read_at IS NULL
+              OR (m.created_at, m.id) > (c.initiator_last_read_at, c.initiator_last_read_message_id))
+    ),
+    recipient_unread_count = (
+        SELECT COUNT(*)
+        FROM messages m
+        WHERE m.conversation_id = c.id
+          AND m.sender_id = c.initiator_id
+          AND (c.recipient_last_read_at IS NULL
+              OR (m.created_at, m.id) > (c.recipient_last_read_at, c.recipient_last_read_message_id))
+    );
+
+ALTER TABLE conversations ENABLE TRIGGER update_conversations_updated_at;
+
+COMMIT;
@@ -0,0 +1,44 @@
+-- 對話列表增量同步（Conversation Sync）
+-- GET /conversations 每次輪詢都回傳完整列表；新增 GET /conversations/sync：
+-- 未帶 sync_token 時以 (updated_at, id) keyset 分頁取得完整列表，
+-- 帶 sync_token 時只回傳 changed_at 在其之後的對話
+-- changed_at 於新訊息、已讀、解鎖時更新（updated_at 仍只代表最後活動時間，用於排序）
+-- 刪除紀錄與名稱 / 頭像 / 案件標題變動見 alembic/versions/0003_conversation_sync_tombstones.py
+-- 需先執行 add_conversation_read_watermarks.sql（update_updated_at_column_except()）
+
+ALTER TABLE conversations
+    ADD COLUMN IF NOT EXISTS changed_at TIMESTAMP NOT NULL DEFAULT NOW();
+
+-- 只變動 changed_at（與已讀位置 / 未讀數）時不更新 updated_at
+DROP TRIGGER IF EXISTS update_conversations_updated_at ON conversations;
+CREATE TRIGGER update_conversations_updated_at BEFORE UPDATE ON conversations
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column_except(
+        'initiator_last_read_message_id', 'initiator_last_read_at', 'initiator_unread_count',
+        'recipient_last_read_message_id', 'recipient_last_read_at', 'recipient_unread_count',
+        'changed_at'
+    );
+
+-- 回填期間停用 updated_at trigger，避免所有對話的 updated_at 被改為執行時間
+BEGIN;
+
+ALTER TABLE conversations DISABLE TRIGGER update_conversations_updated_at;
+
+UPDATE conversations
+SET changed_at = COALESCE(updated_at, created_at, NOW());
+
+ALTER TABLE conversations ENABLE TRIGGER update_conversations_updated_at;
+
+COMMIT;
+
+-- 增量查詢依參與者篩選再以 changed_at 範圍掃描
+-- 對話量大時建議以 psql 執行並改用 CREATE INDEX CONCURRENTLY（不可在交易中執行）避免鎖表
+CREATE INDEX IF NOT EXISTS idx_conversations_initiator_changed
+    ON conversations(initiator_id, changed_at);
+CREATE INDEX IF NOT EXISTS idx_conversations_recipient_changed
+    ON conversations(recipient_id, changed_at);
+
+-- 原本的單欄索引為新索引的前綴，已不需要
+DROP INDEX IF EXISTS idx_conversations_initiator;
+DROP INDEX IF EXISTS idx_conversations_recipient;
+
+COMMENT ON COLUMN conversations.changed_at IS '對話列表項目最後變動時間（訊息、已讀、解鎖），供 GET /conversations/sync 增量同步';
@@ -0,0 +1,89 @@
+-- 接案者目錄（Freelancer Directory）
+-- /users/search 原本每筆結果都要以相關子查詢計算投標數與完成案件數，
+-- 並在 users 全表上以 'freelancer' = ANY(roles) 過濾後排序
+-- 改為只包含接案者的投影表，排序分數預先計算，由寫入端點增量更新
+-- 由 app/services/freelancer_directory.py 維護；資料不一致時執行 `python manage.py rebuild-freelancer-directory`
+-- 需先執行 add_user_stats.sql
+
+CREATE TABLE IF NOT EXISTS freelancer_directory (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    name VARCHAR(100) NOT NULL,
+    bio TEXT,
+    skills TEXT[] NOT NULL DEFAULT '{}',
+    avatar_url TEXT,
+    rating NUMERIC(3,2),
+    portfolio_links TEXT[],
+    created_at TIMESTAMP,
+    bids_count INTEGER NOT NULL DEFAULT 0,
+    completed_projects_count INTEGER NOT NULL DEFAULT 0,
+    last_active_at TIMESTAMP,
+    rank_score DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 技能篩選（skills && :skills）
+CREATE INDEX IF NOT EXISTS idx_freelancer_directory_skills ON freelancer_directory USING GIN (skills);
+
+-- 預設排序（綜合分數）與評分排序；user_id 讓分頁順序穩定
+CREATE INDEX IF NOT EXISTS idx_freelancer_directory_rank ON freelancer_directory(rank_score DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_freelancer_directory_rating ON freelancer_directory(rating DESC NULLS LAST, user_id);
+
+-- 目錄只收錄接案者，refresh 時以此 partial index 找出 users 中的接案者
+CREATE INDEX IF NOT EXISTS idx_users_freelancer ON users(id) WHERE 'freelancer' = ANY(roles);
+
+-- 註解
+COMMENT ON TABLE freelancer_directory IS '接案者目錄（搜尋用投影表，增量維護）';
+COMMENT ON COLUMN freelancer_directory.user_id IS '使用者 ID';
+COMMENT ON COLUMN freelancer_directory.skills IS '技能（GIN 索引）';
+COMMENT ON COLUMN freelancer_directory.bids_count IS '提交的提案數';
+COMMENT ON COLUMN freelancer_directory.completed_projects_count IS '曾投標且已完成的案件數';
+COMMENT ON COLUMN freelancer_directory.last_active_at IS '最後活動時間（資料更新或投標）';
+COMMENT ON COLUMN freelancer_directory.rank_score IS '綜合排序分數（評分、完成案件數、活躍度）';
+
+-- ==================== 初始資料 ====================
+-- 接案者搜尋只讀這張表，建立後立即回填，避免部署到手動 rebuild 之間搜尋結果為空
+-- 排序分數的公式與 app/services/freelancer_directory.py 相同
+-- （RATING_WEIGHT = 2.0、COMPLETED_WEIGHT = 3.0、RECENCY_SECONDS_PER_POINT = 90 天）；
+-- 公式調整後執行 `python manage.py rebuild-freelancer-directory` 重新計算
+
+INSERT INTO freelancer_directory (
+    user_id, name, bio, skills, avatar_url, rating, portfolio_links, created_at,
+    bids_count, completed_projects_count, last_active_at, rank_score, updated_at
+)
+SELECT
+    user_id, name, bio, skills, avatar_url, rating, portfolio_links, created_at,
+    bids_count, completed_projects_count, last_active_at,
+    COALESCE(rating, 0) * 2.0
+        + LN(1 + completed_projects_count) * 3.0
+        + COALESCE(EXTRACT(EPOCH FROM last_active_at), 0) / 7776000,
+    NOW()
+FROM (
+    SELECT
+        u.id AS user_id,
+        u.name,
+        u.bio,
+        COALESCE(u.skills, '{}') AS skills,
+        u.avatar_url,
+        u.rating,
+        u.portfolio_links,
+        u.created_at,
+        COALESCE(s.bids_count, 0) AS bids_count,
+        COALESCE(cc.n, 0) AS completed_projects_count,
+        GREATEST(u.updated_at, lb.last_bid_at) AS last_active_at
+    FROM users u
+    LEFT JOIN user_stats s ON s.user_id = u.id
+    LEFT JOIN (
+        SELECT freelancer_id, MAX(created_at) AS last_bid_at
+        FROM bids
+        GROUP BY freelancer_id
+    ) lb ON lb.freelancer_id = u.id
+    LEFT JOIN (
+        SELECT b.freelancer_id, COUNT(DISTINCT p.id) AS n
+        FROM bids b
+        JOIN projects p ON p.id = b.project_id
+        WHERE p.status = 'completed'
+        GROUP BY b.freelancer_id
+    ) cc ON cc.freelancer_id = u.id
+    WHERE 'freelancer' = ANY(u.roles)
+) source
+ON CONFLICT (user_id) DO NOTHING;
@@ -0,0 +1,12 @@
+-- 訊息 cursor 分頁（Messages Cursor Index）
+-- GET /conversations/{id}/messages 原本以 ORDER BY created_at LIMIT/OFFSET 分頁，
+-- 取得最新一頁必須先掃過前面所有訊息，重新整理時也會重新下載全部訊息
+-- 改為以 (created_at, id) 作為 cursor：latest / before=<id> / after=<id>
+-- 同一個索引也供對話列表取得每個對話的最後一則訊息（ORDER BY created_at DESC, id DESC LIMIT 1）
+
+-- 訊息量大時建議以 psql 執行並改用 CREATE INDEX CONCURRENTLY（不可在交易中執行）避免鎖表
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_cursor
+    ON messages(conversation_id, created_at, id);
+
+-- 原本的單欄索引為新索引的前綴，已不需要
+DROP INDEX IF EXISTS idx_messages_conversation;
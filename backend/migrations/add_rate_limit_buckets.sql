@@ -0,0 +1,64 @@
+-- 後端 Rate Limit（Token Bucket）
+-- 原本只有 Next.js 層有 rate limit，直接呼叫 FastAPI 的流量不受限制
+-- RATE_LIMIT_BACKEND=postgres 時（多個 instance 共用額度）使用此表，
+-- 由 app/middleware/rate_limit.py 呼叫 rate_limit_acquire()
+-- UNLOGGED：不寫 WAL，寫入較快；資料庫當機後內容清空（額度重置）可以接受
+
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    key VARCHAR(255) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- 清除閒置的 bucket（閒置超過補滿時間的 bucket 與不存在等價）
+CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated_at ON rate_limit_buckets(updated_at);
+
+-- 註解
+COMMENT ON TABLE rate_limit_buckets IS 'Rate limit token bucket（key = 規則名稱:user/ip）';
+COMMENT ON COLUMN rate_limit_buckets.tokens IS '上次更新時剩餘的額度';
+COMMENT ON COLUMN rate_limit_buckets.updated_at IS '上次更新時間（依經過時間補充額度）';
+
+
+-- 取用一個額度
+-- 回傳 0 代表允許；大於 0 代表額度不足，值為需要等待的秒數
+CREATE OR REPLACE FUNCTION rate_limit_acquire(
+    p_key VARCHAR,
+    p_capacity DOUBLE PRECISION,
+    p_rate DOUBLE PRECISION
+)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_tokens DOUBLE PRECISION;
+    v_updated_at TIMESTAMP WITH TIME ZONE;
+    v_now TIMESTAMP WITH TIME ZONE;
+BEGIN
+    INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+    VALUES (p_key, p_capacity, clock_timestamp())
+    ON CONFLICT (key) DO NOTHING;
+
+    SELECT tokens, updated_at INTO v_tokens, v_updated_at
+    FROM rate_limit_buckets
+    WHERE key = p_key
+    FOR UPDATE;
+
+    -- 取得 row lock 之後才取時間，避免等待期間其他交易更新的 updated_at 比 v_now 晚
+    v_now := clock_timestamp();
+    v_tokens := LEAST(
+        p_capacity,
+        v_tokens + GREATEST(EXTRACT(EPOCH FROM v_now - v_updated_at), 0) * p_rate
+    );
+
+    IF v_tokens >= 1 THEN
+        UPDATE rate_limit_buckets SET tokens = v_tokens - 1, updated_at = v_now WHERE key = p_key;
+        RETURN 0;
+    END IF;
+
+    UPDATE rate_limit_buckets SET tokens = v_tokens, updated_at = v_now WHERE key = p_key;
+    RETURN (1 - v_tokens) / p_rate;
+END;
+$$;
+
+COMMENT ON FUNCTION rate_limit_acquire(VARCHAR, DOUBLE PRECISION, DOUBLE PRECISION)
+    IS '從 token bucket 取用一個額度，回傳 0（允許）或需等待的秒數';
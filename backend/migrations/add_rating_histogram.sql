@@ -0,0 +1,40 @@
+-- 評分分布（1-5 星）
+-- 建立評價時原本每次都以 AVG(rating) 重算該使用者的所有評價，
+-- 改為與 INSERT 同一個 SQL 語句增量更新 user_stats 的 rating_sum / rating_count 與各星數，
+-- users.rating 由 rating_sum / rating_count 算出
+-- 需先執行 add_user_stats.sql；資料不一致時執行 `python manage.py backfill-ratings`
+
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS rating_1_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS rating_2_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS rating_3_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS rating_4_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS rating_5_count INTEGER NOT NULL DEFAULT 0;
+
+-- 註解
+COMMENT ON COLUMN user_stats.rating_1_count IS '收到 1 星評價數';
+COMMENT ON COLUMN user_stats.rating_2_count IS '收到 2 星評價數';
+COMMENT ON COLUMN user_stats.rating_3_count IS '收到 3 星評價數';
+COMMENT ON COLUMN user_stats.rating_4_count IS '收到 4 星評價數';
+COMMENT ON COLUMN user_stats.rating_5_count IS '收到 5 星評價數';
+
+-- 初始資料（與 backfill-ratings 相同）
+WITH review_counts AS (
+    SELECT
+        reviewee_id AS user_id,
+        COUNT(*) FILTER (WHERE rating = 1) AS r1,
+        COUNT(*) FILTER (WHERE rating = 2) AS r2,
+        COUNT(*) FILTER (WHERE rating = 3) AS r3,
+        COUNT(*) FILTER (WHERE rating = 4) AS r4,
+        COUNT(*) FILTER (WHERE rating = 5) AS r5
+    FROM reviews
+    GROUP BY reviewee_id
+)
+UPDATE user_stats s
+SET rating_1_count = rc.r1,
+    rating_2_count = rc.r2,
+    rating_3_count = rc.r3,
+    rating_4_count = rc.r4,
+    rating_5_count = rc.r5,
+    updated_at = NOW()
+FROM review_counts rc
+WHERE s.user_id = rc.user_id;
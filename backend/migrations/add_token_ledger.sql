@@ -0,0 +1,151 @@
+-- 代幣帳本（Token Ledger）
+-- 將「檢查餘額 → 扣款 → 寫交易紀錄」合併為單一資料庫函式，一次 round trip 完成
+-- - 條件式扣款：UPDATE ... WHERE balance + amount >= 0，餘額不足時不更新任何資料列
+-- - 冪等 key：同一個 key 只會生效一次，重複呼叫回傳第一次的結果
+-- 由 app/services/token_ledger.py 呼叫
+
+-- ==================== 冪等 key ====================
+
+CREATE TABLE IF NOT EXISTS token_idempotency_keys (
+    idempotency_key VARCHAR(200) PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    transaction_id UUID REFERENCES token_transactions(id) ON DELETE SET NULL,
+    balance_after INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_token_idempotency_keys_user_id ON token_idempotency_keys(user_id);
+
+COMMENT ON TABLE token_idempotency_keys IS '代幣異動冪等 key';
+COMMENT ON COLUMN token_idempotency_keys.idempotency_key IS '冪等 key（例如 submit_proposal:<project_id>:<user_id>）';
+COMMENT ON COLUMN token_idempotency_keys.user_id IS '使用者 ID';
+COMMENT ON COLUMN token_idempotency_keys.transaction_id IS '第一次生效時寫入的交易紀錄 ID';
+COMMENT ON COLUMN token_idempotency_keys.balance_after IS '第一次生效後的餘額';
+COMMENT ON COLUMN token_idempotency_keys.created_at IS '建立時間';
+
+
+-- ==================== 異動餘額 ====================
+
+-- amount 為負數代表扣款，正數代表入帳
+-- 回傳 0 筆資料列代表餘額不足（或帳戶不存在）
+-- applied = FALSE 代表此 key 先前已生效，本次沒有任何異動
+CREATE OR REPLACE FUNCTION token_ledger_apply(
+    p_user_id UUID,
+    p_amount INTEGER,
+    p_transaction_type transaction_type,
+    p_reference_id UUID DEFAULT NULL,
+    p_description TEXT DEFAULT NULL,
+    p_idempotency_key VARCHAR DEFAULT NULL
+)
+RETURNS TABLE (transaction_id UUID, balance_after INTEGER, applied BOOLEAN)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_balance INTEGER;
+    v_transaction_id UUID;
+BEGIN
+    IF p_idempotency_key IS NOT NULL THEN
+        INSERT INTO token_idempotency_keys (idempotency_key, user_id)
+        VALUES (p_idempotency_key, p_user_id)
+        ON CONFLICT (idempotency_key) DO NOTHING;
+
+        IF NOT FOUND THEN
+            RETURN QUERY
+                SELECT k.transaction_id, k.balance_after, FALSE
+                FROM token_idempotency_keys k
+                WHERE k.idempotency_key = p_idempotency_key;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- 退款只回補餘額，不計入 total_earned（與原本行為一致）
+    UPDATE user_tokens
+    SET balance = balance + p_amount,
+        total_spent = total_spent + CASE WHEN p_amount < 0 THEN -p_amount ELSE 0 END,
+        total_earned = total_earned + CASE
+            WHEN p_amount > 0 AND p_transaction_type <> 'refund' THEN p_amount
+            ELSE 0
+        END,
+        updated_at = NOW()
+    WHERE user_id = p_user_id
+      AND balance + p_amount >= 0
+    RETURNING balance INTO v_balance;
+
+    IF NOT FOUND THEN
+        -- 沒有異動：釋放 key，讓儲值後可以重試
+        IF p_idempotency_key IS NOT NULL THEN
+            DELETE FROM token_idempotency_keys WHERE idempotency_key = p_idempotency_key;
+        END IF;
+        RETURN;
+    END IF;
+
+    INSERT INTO token_transactions (
+        user_id, amount, balance_after, transaction_type,
+        reference_id, description, created_at
+    )
+    VALUES (
+        p_user_id, p_amount, v_balance, p_transaction_type,
+        p_reference_id, p_description, NOW()
+    )
+    RETURNING id INTO v_transaction_id;
+
+    IF p_idempotency_key IS NOT NULL THEN
+        UPDATE token_idempotency_keys
+        SET transaction_id = v_transaction_id,
+            balance_after = v_balance
+        WHERE idempotency_key = p_idempotency_key;
+    END IF;
+
+    RETURN QUERY SELECT v_transaction_id, v_balance, TRUE;
+END;
+$$;
+
+COMMENT ON FUNCTION token_ledger_apply(UUID, INTEGER, transaction_type, UUID, TEXT, VARCHAR)
+    IS '條件式異動代幣餘額並寫入交易紀錄（單一 round trip，支援冪等 key）';
+
+
+-- ==================== 開立帳戶 ====================
+
+-- 帳戶不存在時建立並記錄初始贈送，已存在時直接回傳目前餘額
+-- 依賴 user_tokens.user_id 的 UNIQUE 約束
+CREATE OR REPLACE FUNCTION token_ledger_open_account(
+    p_user_id UUID,
+    p_initial_balance INTEGER DEFAULT 0,
+    p_description TEXT DEFAULT NULL
+)
+RETURNS TABLE (balance INTEGER, total_earned INTEGER, total_spent INTEGER, created BOOLEAN)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    INSERT INTO user_tokens (user_id, balance, total_earned, total_spent, created_at, updated_at)
+    VALUES (p_user_id, p_initial_balance, p_initial_balance, 0, NOW(), NOW())
+    ON CONFLICT (user_id) DO NOTHING;
+
+    IF FOUND THEN
+        IF p_initial_balance > 0 THEN
+            INSERT INTO token_transactions (user_id, amount, balance_after, transaction_type, description, created_at)
+            VALUES (p_user_id, p_initial_balance, p_initial_balance, 'platform_fee', p_description, NOW());
+        END IF;
+        RETURN QUERY SELECT p_initial_balance, p_initial_balance, 0, TRUE;
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+        SELECT t.balance, t.total_earned, t.total_spent, FALSE
+        FROM user_tokens t
+        WHERE t.user_id = p_user_id;
+END;
+$$;
+
+COMMENT ON FUNCTION token_ledger_open_account(UUID, INTEGER, TEXT)
+    IS '建立代幣帳戶（已存在時回傳目前餘額）';
+
+
+-- ==================== 補建帳戶 ====================
+
+-- 既有使用者原本在第一次查詢餘額時才建立帳戶，這裡一次補齊
+SELECT token_ledger_open_account(u.id, 1000, '新用戶註冊贈送')
+FROM users u
+WHERE NOT EXISTS (SELECT 1 FROM user_tokens t WHERE t.user_id = u.id);
@@ -0,0 +1,77 @@
+-- 使用者統計表
+-- 個人頁 / 統計端點原本每次都以相關子查詢 COUNT projects、bids、reviews，
+-- 改為由寫入端點在同一個交易內增量更新，讀取只需一次主鍵查詢
+-- 由 app/services/user_stats.py 維護；資料不一致時執行 `python manage.py rebuild-user-stats`
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    projects_created INTEGER NOT NULL DEFAULT 0,
+    bids_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    reviews_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 註解
+COMMENT ON TABLE user_stats IS '使用者統計（增量維護）';
+COMMENT ON COLUMN user_stats.user_id IS '使用者 ID';
+COMMENT ON COLUMN user_stats.projects_created IS '發布的案件數（作為發案者）';
+COMMENT ON COLUMN user_stats.bids_count IS '提交的提案數（作為接案者）';
+COMMENT ON COLUMN user_stats.completed_count IS '已完成案件數（發案或曾投標的案件）';
+COMMENT ON COLUMN user_stats.reviews_count IS '收到的評價數';
+COMMENT ON COLUMN user_stats.rating_sum IS '收到的評分總和';
+COMMENT ON COLUMN user_stats.rating_count IS '收到的評分筆數';
+COMMENT ON COLUMN user_stats.updated_at IS '最後更新時間（作為個人頁 ETag 的版本）';
+
+-- 初始資料（與 rebuild-user-stats 相同）
+WITH
+project_counts AS (
+    SELECT client_id AS user_id, COUNT(*) AS n
+    FROM projects
+    GROUP BY client_id
+),
+bid_counts AS (
+    SELECT freelancer_id AS user_id, COUNT(*) AS n
+    FROM bids
+    GROUP BY freelancer_id
+),
+completed_counts AS (
+    SELECT user_id, COUNT(*) AS n
+    FROM (
+        SELECT client_id AS user_id, id AS project_id
+        FROM projects
+        WHERE status = 'completed'
+        UNION
+        SELECT b.freelancer_id, p.id
+        FROM projects p
+        JOIN bids b ON b.project_id = p.id
+        WHERE p.status = 'completed'
+    ) completed
+    GROUP BY user_id
+),
+review_counts AS (
+    SELECT reviewee_id AS user_id, COUNT(*) AS n, COALESCE(SUM(rating), 0) AS rating_sum
+    FROM reviews
+    GROUP BY reviewee_id
+)
+INSERT INTO user_stats (
+    user_id, projects_created, bids_count, completed_count,
+    reviews_count, rating_sum, rating_count, updated_at
+)
+SELECT
+    u.id,
+    COALESCE(pc.n, 0),
+    COALESCE(bc.n, 0),
+    COALESCE(cc.n, 0),
+    COALESCE(rc.n, 0),
+    COALESCE(rc.rating_sum, 0),
+    COALESCE(rc.n, 0),
+    NOW()
+FROM users u
+LEFT JOIN project_counts pc ON pc.user_id = u.id
+LEFT JOIN bid_counts bc ON bc.user_id = u.id
+LEFT JOIN completed_counts cc ON cc.user_id = u.id
+LEFT JOIN review_counts rc ON rc.user_id = u.id
+ON CONFLICT (user_id) DO NOTHING;
@@ -0,0 +1,36 @@
+-- Refresh Token 改存雜湊
+-- 原本以完整 JWT 字串（數百 bytes）作為 UNIQUE 欄位查詢，索引隨 token 長度膨脹，
+-- 過期的 token 也只有在被出示時才會刪除，資料表與索引會無限成長
+-- - token_hash：SHA-256(token)，固定 32 bytes，UNIQUE 索引
+-- - 不再保存 token 原文（資料庫外洩時無法直接拿來換發新 token）
+-- - expires_at 索引供定期清除過期的 refresh / email 驗證 token
+--   （app/services/refresh_tokens.py，亦可執行 `python manage.py purge-expired-tokens`）
+-- 注意：舊版程式仍會寫入 token 欄位，請與新版程式一起部署
+
+-- ==================== refresh_tokens ====================
+
+ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS token_hash BYTEA;
+
+-- 既有 token 以相同方式雜湊，已登入的使用者不需重新登入
+UPDATE refresh_tokens
+SET token_hash = sha256(convert_to(token, 'UTF8'))
+WHERE token_hash IS NULL;
+
+ALTER TABLE refresh_tokens ALTER COLUMN token_hash SET NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_refresh_tokens_token_hash ON refresh_tokens(token_hash);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_id ON refresh_tokens(user_id);
+
+-- 原文欄位與其 UNIQUE 索引一併移除
+ALTER TABLE refresh_tokens DROP COLUMN IF EXISTS token;
+
+-- ==================== email_verification_tokens ====================
+
+CREATE INDEX IF NOT EXISTS idx_email_verification_tokens_expires_at ON email_verification_tokens(expires_at);
+
+-- 註解
+COMMENT ON COLUMN refresh_tokens.token_hash IS 'Refresh Token 的 SHA-256 雜湊（不保存原文）';
+
+-- 先清除一次已過期的資料
+DELETE FROM refresh_tokens WHERE expires_at < (NOW() AT TIME ZONE 'utc');
+DELETE FROM email_verification_tokens WHERE expires_at < (NOW() AT TIME ZONE 'utc');
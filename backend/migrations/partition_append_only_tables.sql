@@ -0,0 +1,218 @@
+-- 按月分區（Monthly Partitioning）
+-- messages / token_transactions / notifications 只新增不修改、查詢集中在最近的 created_at，
+-- 原本是單一 heap table，索引隨資料量持續變大
+-- 改為以 created_at 按月 RANGE 分區：
+-- - 分區名稱為 <table>_pYYYYMM，另有 <table>_default 接住沒有對應分區的資料
+-- - create_monthly_partitions()：預先建立未來的分區
+-- - archive_monthly_partitions()：將超過保留期限的分區 detach 並移到 archive schema
+--   （資料仍在資料庫內，確認備份後可 DROP）
+-- - created_at 改用 BRIN 索引（依時間寫入，BRIN 只有數十 KB）
+-- 由 app/services/partitions.py 維護（`python manage.py maintain-partitions` 或 API 程序的背景工作）
+--
+-- 注意：
+-- - 需先執行 add_messages_cursor_index.sql、add_token_ledger.sql
+-- - 轉換期間會鎖住三個資料表並複製全部資料，請在維護時段執行
+-- - 分區表的主鍵必須包含分區欄位，主鍵改為 (id, created_at)；
+--   token_idempotency_keys.transaction_id 無法再以外鍵參照 token_transactions(id)，改為一般欄位
+-- - 新的資料表只啟用 RLS，不建立 policy（API 以資料庫擁有者連線，權限由 API 檢查）
+
+BEGIN;
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+
+-- ==================== 建立分區 ====================
+
+-- 建立 p_from 所在月份到 p_to 所在月份（含）的分區，已存在的略過，回傳新建立的分區數
+-- default 分區中已有落在新分區範圍的資料時，先搬到新分區再掛上
+CREATE OR REPLACE FUNCTION create_monthly_partitions(p_table TEXT, p_from DATE, p_to DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::date;
+    v_next DATE;
+    v_partition TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    WHILE v_month <= p_to LOOP
+        v_next := (v_month + INTERVAL '1 month')::date;
+        v_partition := p_table || '_p' || to_char(v_month, 'YYYYMM');
+
+        IF to_regclass(v_partition) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                v_partition, p_table
+            );
+            IF to_regclass(p_table || '_default') IS NOT NULL THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    p_table || '_default', v_month, v_next, v_partition
+                );
+            END IF;
+            EXECUTE format(
+                'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                p_table, v_partition, v_month, v_next
+            );
+            v_created := v_created + 1;
+        END IF;
+
+        v_month := v_next;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$;
+
+COMMENT ON FUNCTION create_monthly_partitions(TEXT, DATE, DATE)
+    IS '建立按月分區（<table>_pYYYYMM），回傳新建立的分區數';
+
+
+-- ==================== 封存分區 ====================
+
+-- 將整個月份都早於 p_before 的分區 detach 並移到 archive schema，回傳被封存的分區名稱
+-- （DETACH ... CONCURRENTLY 不可在函式 / 交易中執行，這裡使用一般 DETACH，會短暫鎖住父資料表）
+CREATE OR REPLACE FUNCTION archive_monthly_partitions(p_table TEXT, p_before DATE)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_partition TEXT;
+BEGIN
+    FOR v_partition IN
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.oid = p_table::regclass
+          AND child.relname ~ ('^' || p_table || '_p[0-9]{6}$')
+          AND to_date(right(child.relname, 6), 'YYYYMM') + INTERVAL '1 month' <= p_before
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', p_table, v_partition);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', v_partition);
+        RETURN NEXT v_partition;
+    END LOOP;
+END;
+$$;
+
+COMMENT ON FUNCTION archive_monthly_partitions(TEXT, DATE)
+    IS '將早於指定日期的按月分區 detach 並移到 archive schema';
+
+
+-- ==================== messages ====================
+
+-- 分區欄位不可為 NULL
+UPDATE messages SET created_at = NOW() WHERE created_at IS NULL;
+
+ALTER TABLE messages RENAME TO messages_unpartitioned;
+
+CREATE TABLE messages (
+    LIKE messages_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (created_at);
+
+ALTER TABLE messages ALTER COLUMN created_at SET NOT NULL;
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
+
+SELECT create_monthly_partitions(
+    'messages',
+    COALESCE((SELECT MIN(created_at)::date FROM messages_unpartitioned), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO messages
+SELECT * FROM messages_unpartitioned;
+
+DROP TABLE messages_unpartitioned;
+
+ALTER TABLE messages ADD PRIMARY KEY (id, created_at);
+ALTER TABLE messages
+    ADD FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE;
+
+CREATE INDEX idx_messages_conversation_cursor ON messages(conversation_id, created_at, id);
+CREATE INDEX idx_messages_sender ON messages(sender_id);
+CREATE INDEX idx_messages_created_at_brin ON messages USING BRIN (created_at);
+
+ALTER TABLE messages ENABLE ROW LEVEL SECURITY;
+
+
+-- ==================== token_transactions ====================
+
+ALTER TABLE token_idempotency_keys
+    DROP CONSTRAINT IF EXISTS token_idempotency_keys_transaction_id_fkey;
+
+-- 分區欄位不可為 NULL
+UPDATE token_transactions SET created_at = NOW() WHERE created_at IS NULL;
+
+ALTER TABLE token_transactions RENAME TO token_transactions_unpartitioned;
+
+CREATE TABLE token_transactions (
+    LIKE token_transactions_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (created_at);
+
+ALTER TABLE token_transactions ALTER COLUMN created_at SET NOT NULL;
+CREATE TABLE token_transactions_default PARTITION OF token_transactions DEFAULT;
+
+SELECT create_monthly_partitions(
+    'token_transactions',
+    COALESCE((SELECT MIN(created_at)::date FROM token_transactions_unpartitioned), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO token_transactions
+SELECT * FROM token_transactions_unpartitioned;
+
+DROP TABLE token_transactions_unpartitioned;
+
+ALTER TABLE token_transactions ADD PRIMARY KEY (id, created_at);
+ALTER TABLE token_transactions
+    ADD FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE;
+
+-- 使用者交易記錄依 created_at 排序分頁
+CREATE INDEX idx_token_transactions_user_created ON token_transactions(user_id, created_at);
+CREATE INDEX idx_token_transactions_type ON token_transactions(transaction_type);
+CREATE INDEX idx_token_transactions_created_at_brin ON token_transactions USING BRIN (created_at);
+
+ALTER TABLE token_transactions ENABLE ROW LEVEL SECURITY;
+
+
+-- ==================== notifications ====================
+
+-- 分區欄位不可為 NULL
+UPDATE notifications SET created_at = NOW() WHERE created_at IS NULL;
+
+ALTER TABLE notifications RENAME TO notifications_unpartitioned;
+
+CREATE TABLE notifications (
+    LIKE notifications_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (created_at);
+
+ALTER TABLE notifications ALTER COLUMN created_at SET NOT NULL;
+CREATE TABLE notifications_default PARTITION OF notifications DEFAULT;
+
+SELECT create_monthly_partitions(
+    'notifications',
+    COALESCE((SELECT MIN(created_at)::date FROM notifications_unpartitioned), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO notifications
+SELECT * FROM notifications_unpartitioned;
+
+DROP TABLE notifications_unpartitioned;
+
+ALTER TABLE notifications ADD PRIMARY KEY (id, created_at);
+ALTER TABLE notifications
+    ADD FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (related_project_id) REFERENCES projects(id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (related_bid_id) REFERENCES bids(id) ON DELETE CASCADE;
+
+CREATE INDEX idx_notifications_user_created ON notifications(user_id, created_at);
+CREATE INDEX idx_notifications_is_read ON notifications(is_read);
+CREATE INDEX idx_notifications_created_at_brin ON notifications USING BRIN (created_at);
+
+ALTER TABLE notifications ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
@@ -0,0 +1,44 @@
+-- 修復對話的 updated_at（最後活動時間）
+-- 先前版本的 add_conversation_read_watermarks.sql 在 update_updated_at_column() trigger 啟用時回填所有對話，
+-- 標記已讀 / rebuild-unread-counts 也會觸發該 trigger，updated_at 被改為執行時間，對話列表排序錯亂
+-- add_conversation_sync.sql 的 changed_at 回填與之後的 mark_read 同樣會觸發 trigger
+-- 此檔案：
+-- - 改用只在已讀位置 / 未讀數 / changed_at 以外的欄位變動時才更新 updated_at 的 trigger
+--   （與 add_conversation_sync.sql 相同；尚未執行 add_conversation_sync.sql 時 changed_at 參數不影響結果）
+-- - 以最後一則訊息、解鎖、建立時間中最晚者重新推算 updated_at
+-- changed_at 不修改（可能晚於實際變動時間，只會讓用戶端多同步一次）
+-- 只需對已套用先前版本的資料庫執行一次
+
+CREATE OR REPLACE FUNCTION update_updated_at_column_except()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - TG_ARGV - 'updated_at'::text) IS DISTINCT FROM (to_jsonb(OLD) - TG_ARGV - 'updated_at'::text) THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS update_conversations_updated_at ON conversations;
+CREATE TRIGGER update_conversations_updated_at BEFORE UPDATE ON conversations
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column_except(
+        'initiator_last_read_message_id', 'initiator_last_read_at', 'initiator_unread_count',
+        'recipient_last_read_message_id', 'recipient_last_read_at', 'recipient_unread_count',
+        'changed_at'
+    );
+
+ALTER TABLE conversations DISABLE TRIGGER update_conversations_updated_at;
+
+UPDATE conversations c
+SET updated_at = GREATEST(
+    c.created_at,
+    c.initiator_unlocked_at,
+    c.recipient_unlocked_at,
+    (SELECT MAX(m.created_at) FROM messages m WHERE m.conversation_id = c.id)
+);
+
+ALTER TABLE conversations ENABLE TRIGGER update_conversations_updated_at;
+
+COMMIT;
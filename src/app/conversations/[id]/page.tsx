@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState, useRef } from 'react';
+import { useEffect, useLayoutEffect, useState, useRef } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import { useSession } from 'next-auth/react';
 import Link from 'next/link';
@@ -64,6 +64,34 @@ interface Conversation {
   };
 }
 
+// 每頁訊息數（與後端 GET /messages 的 limit 預設值一致）
+const MESSAGES_PAGE_SIZE = 50;
+
+// 合併最新一頁訊息：補上新訊息並更新已載入訊息的已讀狀態
+// 已讀以對方的閱讀位置判定，某則自己的訊息已讀代表更早的訊息也都已讀
+const mergeLatestMessages = (prev: Message[], latest: Message[], userId: string | null): Message[] => {
+  if (latest.length === 0) return prev;
+  const latestIds = new Set(latest.map((message) => message.id));
+  // 與已載入的訊息沒有重疊（中間漏掉超過一頁）：直接以最新一頁取代，較早的訊息可再往上捲動載入
+  if (!prev.some((message) => latestIds.has(message.id))) return latest;
+
+  const oldestLatest = new Date(latest[0].created_at).getTime();
+  const merged = [
+    ...prev.filter((message) => !latestIds.has(message.id) && new Date(message.created_at).getTime() <= oldestLatest),
+    ...latest,
+  ];
+
+  let lastReadIndex = -1;
+  merged.forEach((message, index) => {
+    if (message.sender_id === userId && message.is_read) lastReadIndex = index;
+  });
+  return merged.map((message, index) =>
+    index < lastReadIndex && message.sender_id === userId && !message.is_read
+      ? { ...message, is_read: true }
+      : message
+  );
+};
+
 export default function ConversationPage() {
   const params = useParams();
   const router = useRouter();
@@ -79,10 +107,16 @@ export default function ConversationPage() {
   const [isComposing, setIsComposing] = useState(false);
   const [withdrawing, setWithdrawing] = useState(false);
   const [showHeader, setShowHeader] = useState(true);
+  const [hasOlderMessages, setHasOlderMessages] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const messagesContainerRef = useRef<HTMLDivElement>(null);
   const isInitialLoad = useRef(true);
   const lastScrollTop = useRef(0);
+  const loadingOlderRef = useRef(false);
+  const loadOlderMessagesRef = useRef<() => void>(() => {});
+  const scrollAnchorRef = useRef<{ messageId: string; offset: number } | null>(null);
+  const initialScrollDone = useRef(false);
   
   // 获取项目状态标签
   const getProjectStatusBadge = (status: string) => {
@@ -153,7 +187,7 @@ export default function ConversationPage() {
 
           // 定義請求
           const fetchConvPromise = apiGet(`/api/v1/conversations/${params.id}`);
-          const fetchMsgsPromise = apiGet(`/api/v1/conversations/${params.id}/messages`);
+          const fetchMsgsPromise = apiGet(`/api/v1/conversations/${params.id}/messages?latest=true`);
 
           // 等待所有請求完成
           const [convRes, msgsRes] = await Promise.all([
@@ -170,6 +204,7 @@ export default function ConversationPage() {
 
           setConversation(convRes.data);
           setMessages(msgsRes.data);
+          setHasOlderMessages(msgsRes.data.length >= MESSAGES_PAGE_SIZE);
           
           // #region agent log
           fetch('http://127.0.0.1:7242/ingest/16ae40bb-efbb-40e4-8ead-681f5fa1e1b7',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({location:'conversations/[id]/page.tsx:147',message:'Conversation loaded',data:{type:convRes.data.type,projectId:convRes.data.project?.id,hasProject:!!convRes.data.project},timestamp:Date.now(),sessionId:'debug-session',runId:'run2',hypothesisId:'A'})}).catch(()=>{});
@@ -251,7 +286,59 @@ export default function ConversationPage() {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
-  // 處理滾動事件 - 向下隱藏，向上顯示
+  // 載入較早的訊息（捲動到頂部時觸發）
+  const loadOlderMessages = async () => {
+    const oldestMessage = messages[0];
+    if (!oldestMessage || !hasOlderMessages || loadingOlderRef.current) return;
+
+    loadingOlderRef.current = true;
+    setLoadingOlder(true);
+    try {
+      const { data } = await apiGet(
+        `/api/v1/conversations/${params.id}/messages?before=${oldestMessage.id}&limit=${MESSAGES_PAGE_SIZE}`
+      );
+      // 回傳筆數小於 limit 代表已到最舊
+      setHasOlderMessages(data.length >= MESSAGES_PAGE_SIZE);
+
+      // 記錄原本最舊一則訊息在畫面中的位置，渲染後維持畫面停在該訊息
+      const container = messagesContainerRef.current;
+      const anchor = container?.querySelector<HTMLElement>(`[data-message-id="${oldestMessage.id}"]`);
+      if (container && anchor) {
+        scrollAnchorRef.current = { messageId: oldestMessage.id, offset: anchor.getBoundingClientRect().top - container.getBoundingClientRect().top };
+      }
+      setMessages((prev) => {
+        const known = new Set(prev.map((message) => message.id));
+        return [...data.filter((message: Message) => !known.has(message.id)), ...prev];
+      });
+    } catch (error) {
+      console.error('Failed to load older messages', error);
+    } finally {
+      loadingOlderRef.current = false;
+      setLoadingOlder(false);
+    }
+  };
+  loadOlderMessagesRef.current = loadOlderMessages;
+
+  useLayoutEffect(() => {
+    const container = messagesContainerRef.current;
+    if (!container) return;
+    // 首次載入顯示最新一頁的底部，往上捲動才載入較早的訊息
+    if (!initialScrollDone.current && messages.length > 0) {
+      initialScrollDone.current = true;
+      lastScrollTop.current = container.scrollHeight;
+      container.scrollTop = container.scrollHeight;
+      return;
+    }
+    const restore = scrollAnchorRef.current;
+    if (!restore) return;
+    scrollAnchorRef.current = null;
+    const anchor = container.querySelector<HTMLElement>(`[data-message-id="${restore.messageId}"]`);
+    if (anchor) {
+      container.scrollTop += anchor.getBoundingClientRect().top - container.getBoundingClientRect().top - restore.offset;
+    }
+  }, [messages, loading]);
+
+  // 處理滾動事件 - 向下隱藏，向上顯示，捲到頂部時載入較早的訊息
   useEffect(() => {
     const container = messagesContainerRef.current;
     if (!container) return;
@@ -263,6 +350,7 @@ export default function ConversationPage() {
       if (currentScrollTop <= 10) {
         setShowHeader(true);
         lastScrollTop.current = currentScrollTop;
+        loadOlderMessagesRef.current();
         return;
       }
 
@@ -280,13 +368,20 @@ export default function ConversationPage() {
 
     container.addEventListener('scroll', handleScroll, { passive: true });
     return () => container.removeEventListener('scroll', handleScroll);
-  }, []);
+  }, [loading]);
 
-  // 重新獲取訊息 (用於發送後更新)
+  // 重新獲取訊息 (用於發送後更新)：取最新一頁，補上新訊息並更新已讀狀態
   const refreshMessages = async () => {
     try {
-      const { data } = await apiGet(`/api/v1/conversations/${params.id}/messages`);
-      setMessages(data);
+      const { data } = await apiGet(
+        `/api/v1/conversations/${params.id}/messages?latest=true&limit=${MESSAGES_PAGE_SIZE}`
+      );
+      // 與已載入的訊息沒有重疊時會以最新一頁取代，需重新判斷是否還有較早的訊息
+      const known = new Set(messages.map((message) => message.id));
+      if (!data.some((message: Message) => known.has(message.id))) {
+        setHasOlderMessages(data.length >= MESSAGES_PAGE_SIZE);
+      }
+      setMessages((prev) => mergeLatestMessages(prev, data, userId));
       // 標記新訊息為已讀
       try {
         await apiPost(`/api/v1/conversations/${params.id}/mark-read`, {});
@@ -942,6 +1037,9 @@ export default function ConversationPage() {
             </div>
           ) : (
             <div className="space-y-6">
+              {loadingOlder && (
+                <p className="text-center text-xs text-gray-400">載入較早的訊息...</p>
+              )}
               {messages.map((message, index) => {
                 const isMine = message.sender_id === userId;
                 
@@ -962,7 +1060,7 @@ export default function ConversationPage() {
                 }
 
                 return (
-                  <div key={message.id}>
+                  <div key={message.id} data-message-id={message.id}>
                     {showDateDivider && (
                       <div className="flex justify-center my-6">
                          <span className="text-xs text-gray-500 bg-white px-4 py-1.5 rounded-full border border-gray-200 shadow-sm font-medium">